@@ -1,14 +1,22 @@
 from abc import abstractmethod
 import abc
-from typing import Callable, List, TYPE_CHECKING
+from typing import Any, Callable, Dict, List, TYPE_CHECKING
+
+import numpy as np
 
 from Task import Task
 
 if TYPE_CHECKING:
     from Processor import Processor
+    from TaskGraph import TaskGraph
+    from RunStats import RunStats
 
 
 class Algorithm(metaclass=abc.ABCMeta):
+    # whether static_key reads per-task tables of the graph by task id (ranks, a
+    # priority vector...), such keys only hold for the ids of that graph
+    keys_by_graph_id = False
+
     def __init__(
         self,
         ready_tasks: List["Task"],
@@ -18,6 +26,7 @@ class Algorithm(metaclass=abc.ABCMeta):
         is_mobileye: bool = False,
         is_critical: bool = False,
         threshold: int = -1,
+        graph: "TaskGraph" = None,
     ):
         self.processors = processors
         self.ready_tasks = ready_tasks
@@ -26,59 +35,92 @@ class Algorithm(metaclass=abc.ABCMeta):
         self.is_mobileye = is_mobileye
         self.threshold = threshold
         self.is_critical = is_critical
+        self._graph = graph
+        # the RunStats of the current run (or None), heuristics can add their own
+        # counters with self.stats.count(...)
+        self.stats: "RunStats" = None
+
+        # rank table of the last offline order (see rank_of)
+        self._ranked_order: List["Task"] = None
+        self._ranks: Dict["Task", int] = {}
+
+    # the compiled graph of all_tasks, compiled here if the simulator didn't pass it
+    @property
+    def graph(self) -> "TaskGraph":
+        if self._graph is None:
+            from TaskGraph import TaskGraph
+
+            self._graph = TaskGraph.compile(self.all_tasks, self.processors)
+        return self._graph
+
+    def rank_of(self, order: List["Task"]) -> Callable[["Task"], int]:
+        """constant time lookup of a task's place in an offline order, the table is
+        built once per order instead of calling order.index() inside sort keys
+
+        Args:
+            order (List[Task]): the order calculate() returned
+
+        Returns:
+            Callable[[Task], int]: the index of a task in order, tasks missing
+            from the order come after all the others
+        """
+        if self._ranked_order is not order:
+            self._ranked_order = order
+            self._ranks = {task: i for i, task in enumerate(order)}
+        ranks = self._ranks
+        missing = len(order)
+        return lambda task: ranks.get(task, missing)
 
     def update_lists(self, processors, ready_tasks, all_tasks):
         self.processors = processors
         self.ready_tasks = ready_tasks
         self.all_tasks = all_tasks
 
-    # finds the threshold for a specific heuristic
-    def _find_thresholds(
-        self,
-        recursion_depth: int,
-        task_list: List["Task"],
-        attribute_extractor: Callable[["Task"], "float"],
+    @staticmethod
+    def threshold_values(graph: "TaskGraph") -> np.ndarray:
+        """the value of every task (by task id) that a heuristic compares with its
+        threshold, None for algorithms without thresholds
+        """
+        return None
+
+    # finds the thresholds for a specific heuristic, the middle value of the list,
+    # then of each of its halves and so on
+    @staticmethod
+    def thresholds_from_values(
+        recursion_depth: int, values: List[float]
     ) -> List[float]:
-
-        n = len(task_list)
-        if recursion_depth == 0 or n <= 1:
-            return []
-
-        # use the extractor to get the threshold value
-        thresh_value = attribute_extractor(task_list[n // 2])
-        return (
-            [thresh_value]
-            + self._find_thresholds(
-                recursion_depth - 1, task_list[: n // 2], attribute_extractor
-            )
-            + self._find_thresholds(
-                recursion_depth - 1, task_list[n // 2 :], attribute_extractor
-            )
+        thresholds = []
+
+        def split(depth: int, start: int, end: int):
+            n = end - start
+            if depth == 0 or n <= 1:
+                return
+            thresholds.append(values[start + n // 2])
+            split(depth - 1, start, start + n // 2)
+            split(depth - 1, start + n // 2, end)
+
+        split(recursion_depth, 0, len(values))
+        return thresholds
+
+    def _find_thresholds(self, recursion_depth: int) -> List[float]:
+        return self.thresholds_from_values(
+            recursion_depth, self.graph.analytics.threshold_values(type(self)).tolist()
         )
 
-    def _color_tasks(
-        self, priority_decider: Callable[["Task"], "float"]
-    ) -> List[float]:
-        from Algorithms.GreedyHeuristics import FromCriticalPath
-
-        for task in self.all_tasks:
-            if priority_decider(task):
-                task.priority = Task.TASK_PRIORITY_HIGH
-            else:
-                task.priority = Task.TASK_PRIORITY_LOW
+    def _color_tasks(self, high_priority: np.ndarray):
+        """colors all the tasks at once
 
+        Args:
+            high_priority (np.ndarray): by task id, True for the high priority tasks
+        """
+        priorities = np.where(
+            high_priority, Task.TASK_PRIORITY_HIGH, Task.TASK_PRIORITY_LOW
+        )
         if self.is_critical:
-            critical_path_instance = FromCriticalPath(
-                self.ready_tasks,
-                self.processors,
-                self.all_tasks,
-                offline=True,
-                is_mobileye=True,
-            )
-            critical_path = critical_path_instance.calculate()
-            for task in self.all_tasks:
-                if task in critical_path:
-                    task.priority = Task.TASK_PRIORITY_CRITICAL
+            priorities[self.graph.analytics.critical] = Task.TASK_PRIORITY_CRITICAL
+
+        for task, priority in zip(self.graph.tasks, priorities.tolist()):
+            task.priority = priority
 
     @abstractmethod
     def find_thresholds(self, recursion_depth: int) -> List[float]:
@@ -92,6 +134,21 @@ class Algorithm(metaclass=abc.ABCMeta):
     def decide(self) -> List["Task"]:
         pass
 
+    def static_key(self, order: List["Task"] = None) -> Callable[["Task"], Any]:
+        """optional, for heuristics whose order of ready tasks only depends on values
+        that don't change during a run (out-degree, duration, color priority...).
+        the simulator computes the key once per task when it becomes ready, keeps the
+        ready tasks in a heap per processor type and never calls decide()
+
+        Args:
+            order (List[Task], optional): what calculate() returned, for offline algorithms
+
+        Returns:
+            Callable[[Task], Any]: smaller keys run first, ties go to the task that became
+            ready first. None (the default) falls back to decide() on the full ready list
+        """
+        return None
+
     def calculate(self) -> List["Task"]:
         pass
 
@@ -2,6 +2,7 @@ from typing import List
 from Task import Task
 from Algorithms.Algorithm import Algorithm
 from Processor import Processor
+from TaskGraph import TaskGraph
 
 
 class Greedy(Algorithm):
@@ -14,6 +15,7 @@ class Greedy(Algorithm):
         is_mobileye: bool = False,
         is_critical: bool = False,
         threshold: float = -1,
+        graph: "TaskGraph" = None,
     ):
         super().__init__(
             ready_tasks,
@@ -23,6 +25,7 @@ class Greedy(Algorithm):
             is_mobileye,
             is_critical,
             threshold,
+            graph,
         )
 
     # simply returns the order that was given, since the greedy doesn't care
@@ -30,6 +33,10 @@ class Greedy(Algorithm):
     def decide(self):
         return self.ready_tasks.copy()
 
+    # every task has the same key, so ready tasks run in the order they got ready
+    def static_key(self, order=None):
+        return lambda task: 0
+
     def find_thresholds(self, recursion_depth: int) -> List[float]:
         return super().find_thresholds()
 
@@ -52,3 +59,6 @@ class MobileyeGreedy(Algorithm):
     def decide(self):
         result = sorted(self.ready_tasks, key=lambda task: task.priority)
         return result
+
+    def static_key(self, order=None):
+        return lambda task: task.priority
@@ -2,7 +2,10 @@ from typing import List
 from Task import Task
 from Algorithms.Algorithm import Algorithm
 from Processor import Processor
+from TaskGraph import TaskGraph
+from CriticalPath import CriticalPathAnalysis
 import random
+import numpy as np
 
 
 class OutDegreesFirst(Algorithm):
@@ -15,6 +18,7 @@ class OutDegreesFirst(Algorithm):
         is_mobileye: bool = False,
         is_critical: bool = False,
         threshold: float = -1,
+        graph: "TaskGraph" = None,
     ):
         super().__init__(
             ready_tasks,
@@ -24,24 +28,35 @@ class OutDegreesFirst(Algorithm):
             is_mobileye,
             is_critical,
             threshold,
+            graph,
         )
         if self.is_mobileye and type(threshold) != str:
             self.color_tasks()
 
     # prioritize tasks with high amount of out-degrees
     def decide(self):
-        result = sorted(self.ready_tasks, key=lambda task: -len(task.blocking))
+        out_degrees = self.graph.analytics.out_degrees_list
+        result = sorted(self.ready_tasks, key=lambda task: -out_degrees[task.id])
         if self.is_mobileye:
             result = Algorithm.sort_by_priority(result)
         return result
 
+    def static_key(self, order=None):
+        if self.is_mobileye:
+            return lambda task: (task.priority, -len(task.blocking))
+        return lambda task: -len(task.blocking)
+
+    # out-degree of every task
+    @staticmethod
+    def threshold_values(graph: "TaskGraph") -> np.ndarray:
+        return np.diff(graph.succ_offsets)
+
     def find_thresholds(self, recursion_depth: int) -> List[float]:
-        return super()._find_thresholds(
-            recursion_depth, self.all_tasks, lambda task: len(task.blocking)
-        )
+        return super()._find_thresholds(recursion_depth)
 
     def color_tasks(self) -> None:
-        return super()._color_tasks(lambda task: len(task.blocking) > self.threshold)
+        values = self.graph.analytics.threshold_values(type(self))
+        return super()._color_tasks(values > self.threshold)
 
 
 class OutDegreesLast(Algorithm):
@@ -54,6 +69,7 @@ class OutDegreesLast(Algorithm):
         is_mobileye: bool = False,
         is_critical: bool = False,
         threshold: float = -1,
+        graph: "TaskGraph" = None,
     ):
         super().__init__(
             ready_tasks,
@@ -63,24 +79,35 @@ class OutDegreesLast(Algorithm):
             is_mobileye,
             is_critical,
             threshold,
+            graph,
         )
         if self.is_mobileye and type(threshold) != str and type(threshold) != str:
             self.color_tasks()
 
     # prioritize tasks with high amount of out-degrees
     def decide(self):
-        result = sorted(self.ready_tasks, key=lambda task: len(task.blocking))
+        out_degrees = self.graph.analytics.out_degrees_list
+        result = sorted(self.ready_tasks, key=lambda task: out_degrees[task.id])
         if self.is_mobileye:
             result = Algorithm.sort_by_priority(result)
         return result
 
-    def find_thresholds(self, recursion_depth: int) -> int:
-        return super()._find_thresholds(
-            recursion_depth, self.all_tasks, lambda task: len(task.blocking)
-        )
+    def static_key(self, order=None):
+        if self.is_mobileye:
+            return lambda task: (task.priority, len(task.blocking))
+        return lambda task: len(task.blocking)
+
+    # out-degree of every task
+    @staticmethod
+    def threshold_values(graph: "TaskGraph") -> np.ndarray:
+        return np.diff(graph.succ_offsets)
+
+    def find_thresholds(self, recursion_depth: int) -> List[float]:
+        return super()._find_thresholds(recursion_depth)
 
     def color_tasks(self) -> None:
-        return super()._color_tasks(lambda task: len(task.blocking) < self.threshold)
+        values = self.graph.analytics.threshold_values(type(self))
+        return super()._color_tasks(values < self.threshold)
 
 
 class MinRuntimeFirst(Algorithm):
@@ -93,6 +120,7 @@ class MinRuntimeFirst(Algorithm):
         is_mobileye: bool = False,
         threshold: float = -1,
         is_critical: bool = False,
+        graph: "TaskGraph" = None,
     ):
         super().__init__(
             ready_tasks,
@@ -102,6 +130,7 @@ class MinRuntimeFirst(Algorithm):
             is_mobileye,
             is_critical,
             threshold,
+            graph,
         )
         if self.is_mobileye and type(threshold) != str:
             self.color_tasks()
@@ -114,13 +143,22 @@ class MinRuntimeFirst(Algorithm):
             result = Algorithm.sort_by_priority(self.ready_tasks)
         return result
 
-    def find_thresholds(self, recursion_depth: int) -> int:
-        return super()._find_thresholds(
-            recursion_depth, self.all_tasks, lambda task: task.duration
-        )
+    # the mobileye variant reshuffles on every decision, so it stays on decide()
+    def static_key(self, order=None):
+        if self.is_mobileye:
+            return None
+        return lambda task: task.duration
+
+    @staticmethod
+    def threshold_values(graph: "TaskGraph") -> np.ndarray:
+        return graph.durations
+
+    def find_thresholds(self, recursion_depth: int) -> List[float]:
+        return super()._find_thresholds(recursion_depth)
 
     def color_tasks(self) -> None:
-        return super()._color_tasks(lambda task: task.duration < self.threshold)
+        values = self.graph.analytics.threshold_values(type(self))
+        return super()._color_tasks(values < self.threshold)
 
 
 class MaxRuntimeFirst(Algorithm):
@@ -133,6 +171,7 @@ class MaxRuntimeFirst(Algorithm):
         is_mobileye: bool = False,
         is_critical: bool = False,
         threshold: int = -1,
+        graph: "TaskGraph" = None,
     ):
         super().__init__(
             ready_tasks,
@@ -142,6 +181,7 @@ class MaxRuntimeFirst(Algorithm):
             is_mobileye,
             is_critical,
             threshold,
+            graph,
         )
         if self.is_mobileye and type(threshold) != str:
             self.color_tasks()
@@ -154,13 +194,22 @@ class MaxRuntimeFirst(Algorithm):
             result = Algorithm.sort_by_priority(self.ready_tasks)
         return result
 
-    def find_thresholds(self, recursion_depth: int) -> int:
-        return super()._find_thresholds(
-            recursion_depth, self.all_tasks, lambda task: task.duration
-        )
+    # the mobileye variant reshuffles on every decision, so it stays on decide()
+    def static_key(self, order=None):
+        if self.is_mobileye:
+            return None
+        return lambda task: -task.duration
+
+    @staticmethod
+    def threshold_values(graph: "TaskGraph") -> np.ndarray:
+        return graph.durations
+
+    def find_thresholds(self, recursion_depth: int) -> List[float]:
+        return super()._find_thresholds(recursion_depth)
 
     def color_tasks(self) -> None:
-        return super()._color_tasks(lambda task: task.duration > self.threshold)
+        values = self.graph.analytics.threshold_values(type(self))
+        return super()._color_tasks(values > self.threshold)
 
 
 class FromCriticalPath(Algorithm):
@@ -173,6 +222,7 @@ class FromCriticalPath(Algorithm):
         is_mobileye: bool = False,
         is_critical: bool = False,
         threshold: float = -1,
+        graph: "TaskGraph" = None,
     ):
         super().__init__(
             ready_tasks,
@@ -182,18 +232,25 @@ class FromCriticalPath(Algorithm):
             is_mobileye=is_mobileye,
             is_critical=is_critical,
             threshold=threshold,
+            graph=graph,
         )
         if self.is_mobileye and not self.offline:
             self.color_tasks()
 
     def decide(self, critical_order=[]):
         if self.offline:
-            result = sorted(self.ready_tasks, key=lambda x: critical_order.index(x))
+            result = sorted(self.ready_tasks, key=self.rank_of(critical_order))
         if self.is_mobileye:
             random.shuffle(self.ready_tasks)
             result = Algorithm.sort_by_priority(self.ready_tasks)
         return result
 
+    # offline, a task's key is its place in the critical order
+    def static_key(self, order=None):
+        if not self.offline or self.is_mobileye:
+            return None
+        return self.rank_of(order)
+
     def calculate(self):
         return (
             self._calc_using_topological_sort()
@@ -202,73 +259,103 @@ class FromCriticalPath(Algorithm):
         )
 
     def _calc_using_critical_time(self):
-        def update_critical_time(node: Task):
-            node.critical_time = (
-                max([n.critical_time for n in node.blocking])
-                if len(node.blocking) > 0
-                else 0
-            ) + node.duration
-            if len(node.blocked_by) == 0:
-                return
-            for n in [n for n in node.blocked_by if n.critical_time > 0]:
-                update_critical_time(n)
-
-        end_tasks = [task for task in self.all_tasks if len(task.blocking) == 0]
-        for t in end_tasks:
-            update_critical_time(t)
-
-        return sorted(self.all_tasks, key=lambda task: -task.critical_time)
+        analysis = self.graph.analytics.critical_path
+        analysis.write_to_tasks()
+        tasks = self.graph.tasks
+        return [tasks[i] for i in analysis.by_critical_time().tolist()]
 
     def _calc_using_topological_sort(self):
-        # helper function for find_critical_path
-        def _topological_sort():
-            stack = []
-            visited = set()
-
-            def dfs(task):
-                if task in visited:
-                    return
-                visited.add(task)
-                for dependency in task.blocked_by:
-                    dfs(dependency)
-                stack.append(task)
-
-            for task in self.all_tasks:
-                dfs(task)
-
-            # Reverse the stack to get the correct topological order
-            return stack
-
-        def find_critical_path():
-            # perform topological sort to get the tasks in order
-            sorted_tasks = _topological_sort()
-
-            # calculate earliest start time (ES) for each task
-            for task in sorted_tasks:
-                es = 0
-                for dependency in task.blocked_by:
-                    es = max(es, dependency.es)
-                task.es = es + task.duration
-
-            # calculate latest start time (LS) for each task
-            for task in reversed(sorted_tasks):
-                ls = float("inf")
-                if not task.blocking:  # if task is a sink node
-                    ls = task.es
-                for predecessor in task.blocked_by:
-                    ls = min(ls, predecessor.es - predecessor.duration)
-                task.ls = ls
-
-            # identify critical path tasks
-            critical_path = [task for task in sorted_tasks if task.es == task.ls]
-
-            return critical_path
-
-        return find_critical_path()
+        analysis = self.graph.analytics.critical_path
+        analysis.write_to_tasks()
+        tasks = self.graph.tasks
+        return [tasks[i] for i in analysis.critical_path().tolist()]
 
     def color_tasks(self) -> None:
-        critical_path = self.calculate()
-        return super()._color_tasks(lambda task: task in critical_path)
+        analysis = self.graph.analytics.critical_path
+        analysis.write_to_tasks()
+        return super()._color_tasks(analysis.critical)
 
     def find_thresholds(self, recursion_depth: int) -> List[float]:
         return super().find_thresholds(recursion_depth)
+
+
+class UpwardRank(Algorithm):
+    """HEFT-style list scheduling: a task's upward rank is its weight plus the
+    largest upward rank of its successors, where the weight is its duration scaled
+    by how loaded its processor type is (work / processors, relative to the most
+    loaded type). ready tasks run from the highest rank, every processor of a type
+    runs a task equally fast so the idle one the simulator picks finishes earliest
+    """
+
+    keys_by_graph_id = True
+
+    def __init__(
+        self,
+        ready_tasks: List["Task"],
+        processors: List["Processor"],
+        all_tasks: List["Task"],
+        offline: bool = False,
+        is_mobileye: bool = False,
+        is_critical: bool = False,
+        threshold: float = -1,
+        graph: "TaskGraph" = None,
+    ):
+        super().__init__(
+            ready_tasks,
+            processors,
+            all_tasks,
+            offline,
+            is_mobileye,
+            is_critical,
+            threshold,
+            graph,
+        )
+        # computed once per graph, O(V + E)
+        self.ranks: List[float] = self.graph.analytics.threshold_values(
+            UpwardRank
+        ).tolist()
+        if self.is_mobileye and type(threshold) != str:
+            self.color_tasks()
+
+    # prioritize tasks with a long, loaded path after them
+    def decide(self):
+        ranks = self.ranks
+        result = sorted(self.ready_tasks, key=lambda task: -ranks[task.id])
+        if self.is_mobileye:
+            result = Algorithm.sort_by_priority(result)
+        return result
+
+    def static_key(self, order=None):
+        ranks = self.ranks
+        if self.is_mobileye:
+            return lambda task: (task.priority, -ranks[task.id])
+        return lambda task: -ranks[task.id]
+
+    # upward rank of every task
+    @staticmethod
+    def threshold_values(graph: "TaskGraph") -> np.ndarray:
+        loads = graph.analytics.type_work
+        finite = [load for load in loads.values() if load != float("inf")]
+        most_loaded = max(finite, default=0.0)
+        if most_loaded <= 0:
+            return graph.analytics.bottom_level
+
+        # types without single-type work (every task eligible elsewhere or of
+        # duration 0) aren't in loads, they keep a pressure of 1
+        highest_type = max(
+            [int(graph.types.max(initial=-1))]
+            + [processor.type for processor in graph.processors]
+        )
+        pressure = np.ones(highest_type + 1, dtype=np.float64)
+        for processor_type, load in loads.items():
+            if load != float("inf"):
+                pressure[processor_type] = load / most_loaded
+        weights = graph.durations * pressure[graph.types]
+        return CriticalPathAnalysis(graph, weights).bottom_level
+
+    def find_thresholds(self, recursion_depth: int) -> List[float]:
+        return super()._find_thresholds(recursion_depth)
+
+    def color_tasks(self) -> None:
+        ranks = self.graph.analytics.threshold_values(UpwardRank)
+        return super()._color_tasks(ranks > self.threshold)
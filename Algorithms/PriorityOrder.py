@@ -0,0 +1,82 @@
+from typing import Dict, List
+from Task import Task
+from Algorithms.Algorithm import Algorithm
+from Processor import Processor
+from TaskGraph import TaskGraph
+import json
+
+
+class PriorityOrder(Algorithm):
+    """runs ready tasks by a priority vector given from outside (by task id, the
+    lowest runs first, ties go to the task that became ready first), e.g. the best
+    order Optimizer.py found, replayed from its order file
+    """
+
+    keys_by_graph_id = True
+
+    def __init__(
+        self,
+        ready_tasks: List["Task"],
+        processors: List["Processor"],
+        all_tasks: List["Task"],
+        offline: bool = True,
+        is_mobileye: bool = False,
+        is_critical: bool = False,
+        threshold: float = -1,
+        graph: "TaskGraph" = None,
+        priorities: List[float] = None,
+        order_path: str = None,
+    ):
+        super().__init__(
+            ready_tasks,
+            processors,
+            all_tasks,
+            offline,
+            is_mobileye,
+            is_critical,
+            threshold,
+            graph,
+        )
+        if order_path is not None:
+            priorities = self.load_order(order_path)
+        self.priorities: List[float] = priorities
+
+    def decide(self, order=None):
+        return sorted(self.ready_tasks, key=self.static_key())
+
+    def static_key(self, order=None):
+        priorities = self.priorities
+        return lambda task: priorities[task.id]
+
+    # the whole order, from the first task to run to the last
+    def calculate(self):
+        return sorted(self.graph.tasks, key=self.static_key())
+
+    @staticmethod
+    def write_order(path: str, order: List[str], **info):
+        """writes an order file, task names from the first to run to the last,
+        extra info (makespan...) is kept next to them
+        """
+        with open(path, "w") as order_file:
+            json.dump({**info, "order": order}, order_file)
+
+    def load_order(self, path: str) -> List[float]:
+        """
+        Returns:
+            List[float]: the place of every task in the order file, tasks missing
+            from it come after all the others
+        """
+        with open(path) as order_file:
+            order: List[str] = json.load(order_file)["order"]
+        ids: Dict[str, int] = {name: i for i, name in enumerate(self.graph.names)}
+        priorities = [len(order)] * len(ids)
+        for rank, name in enumerate(order):
+            if name in ids:
+                priorities[ids[name]] = rank
+        return priorities
+
+    def find_thresholds(self, recursion_depth: int) -> List[float]:
+        return []
+
+    def color_tasks(self) -> None:
+        pass
@@ -0,0 +1,21 @@
+from Algorithms.Greedy import Greedy
+from Algorithms.GreedyHeuristics import (
+    OutDegreesFirst,
+    OutDegreesLast,
+    MinRuntimeFirst,
+    MaxRuntimeFirst,
+    FromCriticalPath,
+    UpwardRank,
+)
+
+# name -> (algorithm class, offline), the algorithms the benchmark, FrameSim's
+# command line and the tests run
+ALGORITHMS = {
+    "Greedy": (Greedy, False),
+    "OutDegreesFirst": (OutDegreesFirst, False),
+    "OutDegreesLast": (OutDegreesLast, False),
+    "MinRuntimeFirst": (MinRuntimeFirst, False),
+    "MaxRuntimeFirst": (MaxRuntimeFirst, False),
+    "FromCriticalPath": (FromCriticalPath, True),
+    "UpwardRank": (UpwardRank, False),
+}
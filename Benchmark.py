@@ -0,0 +1,282 @@
+"""benchmarks the simulator on generated DAGs
+
+for every size it builds a layered DAG, writes it as a parsed json profile and
+times Sim.read_data (json and binary cache), FromCriticalPath.calculate and
+Sim.start with every algorithm. results go to a json file that can be compared
+with the results of another commit:
+
+    python Benchmark.py --sizes 1000 10000 100000 --output bench.json
+    python Benchmark.py --sizes 1000 10000 100000 --compare bench.json
+"""
+
+from typing import Dict, List
+import argparse
+import json
+import subprocess
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+
+from Sim import Sim
+from Algorithms import ALGORITHMS
+from Algorithms.GreedyHeuristics import FromCriticalPath
+
+
+def generate_profile(
+    file_path: str,
+    size: int,
+    depth: int,
+    processor_types: int = 4,
+    processors_per_type: int = 2,
+    fan_out: int = 3,
+    seed: int = 0,
+):
+    """writes a random layered DAG as a parsed json profile (see Parser.to_json)
+
+    Args:
+        file_path (str): where to write the json
+        size (int): number of tasks
+        depth (int): number of layers, every layer has size / depth tasks (the width)
+        processor_types (int, optional): number of processor types. Defaults to 4.
+        processors_per_type (int, optional): processors of every type. Defaults to 2.
+        fan_out (int, optional): most tasks a task blocks, in the next two layers.
+            Defaults to 3.
+        seed (int, optional): random seed. Defaults to 0.
+    """
+    rng = np.random.default_rng(seed)
+    depth = max(1, min(depth, size))
+    width = -(-size // depth)
+
+    layer = np.arange(size) // width
+    durations = np.round(rng.lognormal(8, 1, size), 3).tolist()
+    types = rng.integers(0, processor_types, size).tolist()
+    priorities = rng.integers(0, 2, size).tolist()
+    # successors are in the next one or two layers
+    fan_outs = np.where(layer < layer[-1], rng.integers(0, fan_out + 1, size), 0)
+    next_layer = layer[:, None] + 1 + rng.integers(0, 2, (size, fan_out))
+    targets = next_layer * width + rng.integers(0, width, (size, fan_out))
+    targets = np.minimum(targets, size - 1).tolist()
+    fan_outs = fan_outs.tolist()
+
+    tasks = {}
+    for i in range(size):
+        tasks[f"t{i}"] = {
+            "duration": durations[i],
+            "processor_type": types[i],
+            "blocking": [f"t{j}" for j in sorted(set(targets[i][: fan_outs[i]]))],
+            "priority": priorities[i],
+        }
+    processors = [
+        f"P{processor_type}_{i}:{processor_type}"
+        for processor_type in range(processor_types)
+        for i in range(processors_per_type)
+    ]
+    with open(file_path, "w") as json_file:
+        json.dump({"Tasks": tasks, "Processors": processors}, json_file)
+
+
+def _measure(function, memory: bool, repeat: int = 1):
+    """runs function, returns (result, best seconds of `repeat` runs,
+    peak traced bytes or None)
+    """
+    seconds = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        seconds = min(seconds, time.perf_counter() - start)
+    peak = None
+    if memory:
+        # a second run, tracemalloc slows the first one down too much to time it
+        tracemalloc.start()
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return result, seconds, peak
+
+
+def benchmark_size(
+    file_path: str, algorithms: List[str], memory: bool, repeat: int = 1
+) -> Dict[str, Dict[str, float]]:
+    """times every phase on one generated profile"""
+    results = {}
+
+    def read_json():
+        sim = Sim()
+        sim.read_data(file_path, use_cache=False)
+        return sim
+
+    def read_cached():
+        sim = Sim()
+        sim.read_data(file_path)
+        return sim
+
+    _, seconds, peak = _measure(read_json, memory, repeat)
+    results["read_data json"] = {"seconds": seconds, "peak_bytes": peak}
+    # the first cached read builds the cache
+    read_cached()
+    sim, seconds, peak = _measure(read_cached, memory, repeat)
+    results["read_data cache"] = {"seconds": seconds, "peak_bytes": peak}
+
+    # the analytics are cached on the graph, every timed run computes them again
+    # like the first run on a loaded profile does
+    def calculate():
+        sim.graph.restore_tasks()
+        sim.graph.clear_analytics()
+        return FromCriticalPath(
+            sim.tasks, sim.processors, sim.tasks, offline=True, graph=sim.graph
+        ).calculate()
+
+    _, seconds, peak = _measure(calculate, memory, repeat)
+    results["FromCriticalPath.calculate"] = {"seconds": seconds, "peak_bytes": peak}
+
+    for name in algorithms:
+        algorithm, offline = ALGORITHMS[name]
+
+        def start():
+            sim.graph.restore_tasks()
+            sim.graph.clear_analytics()
+            instance = algorithm(
+                sim.tasks,
+                sim.processors,
+                sim.tasks,
+                offline=offline,
+                graph=sim.graph,
+            )
+            return sim.start(instance)
+
+        (_, end_time), seconds, peak = _measure(start, memory, repeat)
+        results[f"start {name}"] = {
+            "seconds": seconds,
+            "peak_bytes": peak,
+            # every task is one completion event
+            "events_per_second": len(sim.tasks) / seconds if seconds > 0 else None,
+            "final_end_time": end_time,
+        }
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(old: dict, new: dict, tolerance: float) -> List[str]:
+    """
+    Returns:
+        List[str]: a line for every phase that got slower by more than tolerance
+    """
+    regressions = []
+    for size, phases in new["sizes"].items():
+        for phase, result in phases.items():
+            old_result = old["sizes"].get(size, {}).get(phase)
+            if old_result is None or not old_result["seconds"]:
+                continue
+            ratio = result["seconds"] / old_result["seconds"]
+            if ratio > 1 + tolerance:
+                regressions.append(
+                    f"{size} tasks, {phase}: {old_result['seconds']:.4f}s -> "
+                    f"{result['seconds']:.4f}s ({ratio:.2f}x)"
+                )
+    return regressions
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 1000000]
+    )
+    arg_parser.add_argument(
+        "--width", type=int, default=None, help="tasks per layer (default sqrt(size))"
+    )
+    arg_parser.add_argument(
+        "--depth", type=int, default=None, help="number of layers, overrides --width"
+    )
+    arg_parser.add_argument("--processor-types", type=int, default=4)
+    arg_parser.add_argument("--processors-per-type", type=int, default=2)
+    arg_parser.add_argument("--fan-out", type=int, default=3)
+    arg_parser.add_argument(
+        "--algorithms", nargs="+", default=list(ALGORITHMS), choices=list(ALGORITHMS)
+    )
+    arg_parser.add_argument(
+        "--no-memory", action="store_true", help="skip the peak memory runs"
+    )
+    arg_parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="timed runs of every phase, the best counts",
+    )
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--output", default="benchmark_results.json")
+    arg_parser.add_argument(
+        "--compare", default=None, help="an earlier output file to check against"
+    )
+    arg_parser.add_argument(
+        "--tolerance", type=float, default=0.2, help="allowed slowdown when comparing"
+    )
+    args = arg_parser.parse_args()
+
+    output = {
+        "commit": _git_commit(),
+        "time": time.time(),
+        "settings": {
+            key: value
+            for key, value in vars(args).items()
+            if key not in ("output", "compare")
+        },
+        "sizes": {},
+    }
+
+    with tempfile.TemporaryDirectory() as folder:
+        for size in args.sizes:
+            if args.depth:
+                depth = args.depth
+            else:
+                width = args.width or max(1, int(size**0.5))
+                depth = -(-size // width)
+            file_path = f"{folder}/generated.{size}.json"
+            generate_profile(
+                file_path,
+                size,
+                depth=depth,
+                processor_types=args.processor_types,
+                processors_per_type=args.processors_per_type,
+                fan_out=args.fan_out,
+                seed=args.seed,
+            )
+            results = benchmark_size(
+                file_path, args.algorithms, not args.no_memory, args.repeat
+            )
+            output["sizes"][str(size)] = results
+
+            print(f"{size} tasks")
+            for phase, result in results.items():
+                line = f"  {phase:<30} {result['seconds']:>9.4f}s"
+                if result.get("events_per_second"):
+                    line += f"  {result['events_per_second']:>12.0f} events/s"
+                if result["peak_bytes"] is not None:
+                    line += f"  {result['peak_bytes'] / 2**20:>9.1f} MiB peak"
+                print(line)
+
+    with open(args.output, "w") as output_file:
+        json.dump(output, output_file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as old_file:
+            regressions = compare(json.load(old_file), output, args.tolerance)
+        for regression in regressions:
+            print(f"regression: {regression}")
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
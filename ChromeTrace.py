@@ -0,0 +1,142 @@
+"""schedules as Chrome trace-event JSON, opened by chrome://tracing, Perfetto
+(ui.perfetto.dev) and speedscope
+
+every processor is a track (a thread of one process) and every task a complete
+("X") slice on its processor's track, with its priority and whether it is on the
+critical path as slice args. the file is written while the simulation runs, a
+slice when its task finishes, so the schedule is never held in memory
+"""
+
+from typing import List, TYPE_CHECKING
+import json
+
+if TYPE_CHECKING:
+    from Processor import Processor
+    from ScheduleTrace import ScheduleTrace
+    from TaskGraph import TaskGraph
+
+# the simulator has no time unit, by default one unit is one microsecond, the unit
+# of trace-event timestamps
+DEFAULT_TIME_SCALE = 1.0
+PROCESS_ID = 1
+
+
+class ChromeTraceWriter:
+    def __init__(
+        self,
+        path: str,
+        graph: "TaskGraph",
+        processors: List["Processor"],
+        process_name: str = "Sim",
+        time_scale: float = DEFAULT_TIME_SCALE,
+    ):
+        """opens the file and writes a track per processor
+
+        Args:
+            path (str): the .json file to write
+            graph (TaskGraph): the simulated graph, for task names and the critical path
+            processors (List[Processor]): the tracks, in the order of processor ids
+            process_name (str, optional): the name above all the tracks, e.g. the
+                algorithm. Defaults to "Sim".
+            time_scale (float, optional): microseconds per simulation time unit.
+                Defaults to 1.
+        """
+        self.time_scale = time_scale
+        self.tasks = graph.tasks
+        self.critical: List[bool] = graph.analytics.critical.tolist()
+        self.slices = 0
+        self._file = open(path, "w")
+        self._file.write('{"displayTimeUnit": "ms", "traceEvents": [\n')
+        self._separator = ""
+
+        self._write_event(
+            {
+                "ph": "M",
+                "pid": PROCESS_ID,
+                "name": "process_name",
+                "args": {"name": process_name},
+            }
+        )
+        for processor_id, processor in enumerate(processors):
+            self._write_event(
+                {
+                    "ph": "M",
+                    "pid": PROCESS_ID,
+                    "tid": processor_id,
+                    "name": "thread_name",
+                    "args": {"name": f"{processor.name} (type {processor.type})"},
+                }
+            )
+            # keep the tracks in processor order instead of by name
+            self._write_event(
+                {
+                    "ph": "M",
+                    "pid": PROCESS_ID,
+                    "tid": processor_id,
+                    "name": "thread_sort_index",
+                    "args": {"sort_index": processor_id},
+                }
+            )
+
+    def _write_event(self, event: dict):
+        self._file.write(self._separator)
+        self._file.write(json.dumps(event))
+        self._separator = ",\n"
+
+    def add_slice(self, task_id: int, processor_id: int, start: float, end: float):
+        """writes one task's slice"""
+        task = self.tasks[task_id]
+        scale = self.time_scale
+        self._write_event(
+            {
+                "ph": "X",
+                "pid": PROCESS_ID,
+                "tid": processor_id,
+                "name": task.name,
+                "ts": start * scale,
+                "dur": (end - start) * scale,
+                "args": {
+                    "id": task_id,
+                    "priority": task.priority,
+                    "critical": self.critical[task_id],
+                },
+            }
+        )
+        self.slices += 1
+
+    def add_trace(self, trace: "ScheduleTrace"):
+        """writes every row of a finished run's schedule"""
+        for task_id, processor_id, start, end in zip(
+            trace.task_id.tolist(),
+            trace.processor_id.tolist(),
+            trace.start.tolist(),
+            trace.end.tolist(),
+        ):
+            self.add_slice(task_id, processor_id, start, end)
+
+    def close(self):
+        if self._file.closed:
+            return
+        self._file.write("\n]}\n")
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def write_chrome_trace(
+    path: str,
+    trace: "ScheduleTrace",
+    graph: "TaskGraph",
+    processors: List["Processor"],
+    process_name: str = "Sim",
+    time_scale: float = DEFAULT_TIME_SCALE,
+):
+    """exports a schedule that was already simulated (e.g. loaded with
+    ScheduleTrace.from_npz), Sim.start(trace_path=...) streams it instead
+    """
+    with ChromeTraceWriter(path, graph, processors, process_name, time_scale) as writer:
+        writer.add_trace(trace)
@@ -0,0 +1,188 @@
+from typing import List, TYPE_CHECKING
+import numpy as np
+
+# average tasks per level from which the analysis switches to numpy
+_MIN_VECTOR_LEVEL = 64
+
+if TYPE_CHECKING:
+    from TaskGraph import TaskGraph
+
+
+def _out_edges(offsets: np.ndarray, ids: np.ndarray, nodes: np.ndarray):
+    """gathers the CSR edges leaving a set of nodes
+
+    Returns:
+        (np.ndarray, np.ndarray, np.ndarray): source and target of every edge, and
+        its position in ids
+    """
+    starts = offsets[nodes]
+    counts = offsets[nodes + 1] - starts
+    total = int(counts.sum())
+    if total == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, empty
+    # position of every edge in ids: its node's start plus its index in the node
+    first = np.cumsum(counts) - counts
+    positions = np.arange(total, dtype=np.int64) + np.repeat(starts - first, counts)
+    return np.repeat(nodes, counts), ids[positions], positions
+
+
+def topological_levels(graph: "TaskGraph") -> List[List[int]]:
+    """splits the graph into levels with Kahn's algorithm, every task only
+    depends on tasks in earlier levels
+
+    Raises:
+        ValueError: if the graph has a cycle
+
+    Returns:
+        List[List[int]]: task ids of every level
+    """
+    succ_offsets = graph.succ_offsets_list
+    succ_ids = graph.succ_ids_list
+    in_degrees = graph.in_degrees_list.copy()
+
+    frontier = [i for i, in_degree in enumerate(in_degrees) if in_degree == 0]
+    levels = []
+    visited = 0
+    while frontier:
+        levels.append(frontier)
+        visited += len(frontier)
+        next_level = []
+        for task_id in frontier:
+            for i in range(succ_offsets[task_id], succ_offsets[task_id + 1]):
+                successor = succ_ids[i]
+                in_degrees[successor] -= 1
+                if in_degrees[successor] == 0:
+                    next_level.append(successor)
+        frontier = next_level
+
+    if visited != len(graph):
+        raise ValueError("the task graph has a cycle")
+    return levels
+
+
+def _vectorized_passes(
+    graph: "TaskGraph", levels: List[List[int]], durations: np.ndarray
+):
+    es = np.zeros(len(graph), dtype=np.float64)
+    bottom_level = durations.copy()
+    levels = [np.array(level, dtype=np.int64) for level in levels]
+
+    # forward pass - earliest start, pushed to the successors
+    for level in levels:
+        sources, targets, edges = _out_edges(graph.succ_offsets, graph.succ_ids, level)
+        if targets.size > 0:
+            ends = es[sources] + durations[sources]
+            if graph.succ_costs is not None:
+                ends += graph.succ_costs[edges]
+            np.maximum.at(es, targets, ends)
+
+    # backward pass - bottom level, pushed to the predecessors
+    longest_after = np.zeros(len(graph), dtype=np.float64)
+    for level in reversed(levels):
+        bottom_level[level] = durations[level] + longest_after[level]
+        sources, targets, edges = _out_edges(graph.pred_offsets, graph.pred_ids, level)
+        if targets.size > 0:
+            after = bottom_level[sources]
+            if graph.pred_costs is not None:
+                after = after + graph.pred_costs[edges]
+            np.maximum.at(longest_after, targets, after)
+
+    return es, bottom_level
+
+
+def _scalar_passes(graph: "TaskGraph", order: List[int], durations: List[float]):
+    succ_offsets = graph.succ_offsets_list
+    succ_ids = graph.succ_ids_list
+    # edges without transfer costs cost 0
+    costs = graph.succ_costs_list or [0.0] * len(succ_ids)
+    es = [0.0] * len(graph)
+    bottom_level = durations.copy()
+
+    for task_id in order:
+        end = es[task_id] + durations[task_id]
+        for i in range(succ_offsets[task_id], succ_offsets[task_id + 1]):
+            successor = succ_ids[i]
+            if es[successor] < end + costs[i]:
+                es[successor] = end + costs[i]
+
+    for task_id in reversed(order):
+        longest_after = 0.0
+        for i in range(succ_offsets[task_id], succ_offsets[task_id + 1]):
+            after = bottom_level[succ_ids[i]] + costs[i]
+            if after > longest_after:
+                longest_after = after
+        bottom_level[task_id] = durations[task_id] + longest_after
+
+    return np.array(es, dtype=np.float64), np.array(bottom_level, dtype=np.float64)
+
+
+class CriticalPathAnalysis:
+    """earliest/latest start, slack and bottom level of every task, indexed by task id
+
+    es: earliest start, when all the predecessors could be done
+    bottom_level: the task's duration plus the longest path after it (critical time)
+    ls: latest start that doesn't delay the critical path length
+    slack: ls - es, zero on the critical path
+
+    transfer costs of the graph's edges (see TaskGraph) are part of every path.
+    durations (by task id) can replace the tasks' own, to weigh them differently
+    """
+
+    def __init__(self, graph: "TaskGraph", durations: np.ndarray = None):
+        self.graph = graph
+        if durations is None:
+            durations = graph.durations
+        durations = np.asarray(durations, dtype=np.float64)
+        self.levels = topological_levels(graph)
+        self.order = np.fromiter(
+            (task_id for level in self.levels for task_id in level),
+            dtype=np.int64,
+            count=len(graph),
+        )
+
+        # numpy calls cost the same for a level of 1 task or of 10000, so deep
+        # chain-like graphs are walked with plain lists instead
+        if len(graph) >= _MIN_VECTOR_LEVEL * len(self.levels):
+            self.es, self.bottom_level = _vectorized_passes(
+                graph, self.levels, durations
+            )
+        else:
+            self.es, self.bottom_level = _scalar_passes(
+                graph, self.order.tolist(), durations.tolist()
+            )
+
+        n = len(graph)
+        self.length = float(self.bottom_level.max()) if n > 0 else 0.0
+        self.ls = self.length - self.bottom_level
+        self.slack = self.ls - self.es
+        self.critical = np.isclose(
+            self.slack, 0.0, rtol=0.0, atol=1e-9 * max(self.length, 1.0)
+        )
+
+    def critical_path(self) -> np.ndarray:
+        """
+        Returns:
+            np.ndarray: ids of the tasks with no slack, in topological order
+        """
+        return self.order[self.critical[self.order]]
+
+    def by_critical_time(self) -> np.ndarray:
+        """
+        Returns:
+            np.ndarray: all task ids from the longest bottom level to the shortest,
+            ties keep the order of the tasks in the graph
+        """
+        return np.argsort(-self.bottom_level, kind="stable")
+
+    def write_to_tasks(self):
+        """copies the results onto the task objects (critical_time, es, ls)"""
+        for task, critical_time, es, ls in zip(
+            self.graph.tasks,
+            self.bottom_level.tolist(),
+            self.es.tolist(),
+            self.ls.tolist(),
+        ):
+            task.critical_time = critical_time
+            task.es = es
+            task.ls = ls
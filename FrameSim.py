@@ -0,0 +1,287 @@
+"""pipelined simulation of a sequence of frames on one pool of processors
+
+prof2text.py writes a profile per frame and Sim schedules one frame from time 0.
+here the frames are joined into one graph (frame k's tasks are named "k:<task>"),
+frame k is released at k * frame_period and all of them run as one event stream on
+the processors of the first frame, so a slow frame delays the ones after it:
+
+    python FrameSim.py Parser/Data/parsed/gsf.*.prof.json --period 16666
+    python FrameSim.py frame.json --repeat 100 --period 5000 --algorithm UpwardRank
+
+the report has the throughput, the latency of every frame (release to its last task
+finishing) and the backlog, how many frames were in flight when each one was released
+"""
+
+from typing import Dict, List, NamedTuple, Tuple
+import argparse
+import numpy as np
+
+from Sim import Sim, Preemption, algorithm_thresholds
+from RunStats import RunStats
+from TaskGraph import TaskGraph
+from GraphCache import load_cached_graph
+from Algorithms import ALGORITHMS
+from Algorithms.Algorithm import Algorithm
+
+LATENCY_PERCENTILES = (50, 90, 99)
+
+
+class PipelineReport(NamedTuple):
+    frames: int
+    frame_period: float
+    # time the last frame finished
+    makespan: float
+    # frames per time unit over the whole run
+    throughput: float
+    # by frame, release to the end of its last task
+    latencies: np.ndarray
+    # by frame, frames released and not finished right after it was released
+    backlog: np.ndarray
+    # slope of the backlog, frames per frame, above 0 the pool can't keep up
+    backlog_growth: float
+
+    def latency_percentiles(self) -> Dict[int, float]:
+        return {
+            percentile: float(np.percentile(self.latencies, percentile))
+            for percentile in LATENCY_PERCENTILES
+        }
+
+    def frames_per_second(self, seconds_per_unit: float = 1e-6) -> float:
+        """the throughput in frames per second, durations are microseconds by
+        default
+        """
+        return self.throughput / seconds_per_unit
+
+    def __str__(self):
+        percentiles = ", ".join(
+            f"p{percentile} {latency:.2f}"
+            for percentile, latency in self.latency_percentiles().items()
+        )
+        return (
+            f"Frames: {self.frames} every {self.frame_period}\n"
+            f"End Time: {self.makespan:.2f}\n"
+            f"Throughput: {self.throughput * self.frame_period:.3f} of the frame rate\n"
+            f"Latency: {percentiles}, max {self.latencies.max():.2f}\n"
+            f"Backlog: max {int(self.backlog.max())}, "
+            f"growth {self.backlog_growth:.3f} frames per frame"
+        )
+
+
+def join_frames(graphs: List[TaskGraph]) -> Tuple[TaskGraph, np.ndarray]:
+    """joins the frames' graphs into one, with the processors of the first
+
+    Raises:
+        ValueError: if the frames weren't recorded on the same processors
+
+    Returns:
+        (TaskGraph, np.ndarray): the joined graph (with task objects) and the first
+        task id of every frame, followed by the number of tasks
+    """
+    processors = graphs[0].processors
+    pool = [
+        (processor.name, processor.type, processor.speed) for processor in processors
+    ]
+    for graph in graphs[1:]:
+        if [
+            (processor.name, processor.type, processor.speed)
+            for processor in graph.processors
+        ] != pool:
+            raise ValueError("all the frames must run on the same processors")
+
+    frame_offsets = np.zeros(len(graphs) + 1, dtype=np.int64)
+    np.cumsum([len(graph) for graph in graphs], out=frame_offsets[1:])
+    edge_offsets = np.zeros(len(graphs) + 1, dtype=np.int64)
+    np.cumsum([len(graph.succ_ids) for graph in graphs], out=edge_offsets[1:])
+
+    names = [
+        f"{frame}:{name}" for frame, graph in enumerate(graphs) for name in graph.names
+    ]
+    succ_offsets = np.concatenate(
+        [[0]]
+        + [
+            graph.succ_offsets[1:] + edge_offsets[frame]
+            for frame, graph in enumerate(graphs)
+        ]
+    )
+    succ_ids = np.concatenate(
+        [graph.succ_ids + frame_offsets[frame] for frame, graph in enumerate(graphs)]
+    )
+
+    # frames without transfer costs have free edges
+    succ_costs = None
+    if any(graph.succ_costs is not None for graph in graphs):
+        succ_costs = np.concatenate(
+            [
+                (
+                    graph.succ_costs
+                    if graph.succ_costs is not None
+                    else np.zeros(len(graph.succ_ids))
+                )
+                for graph in graphs
+            ]
+        )
+
+    # frames where every task runs on its own type get a table of one type per task
+    eligible_offsets = eligible_types = eligible_durations = None
+    if any(graph.eligible_offsets is not None for graph in graphs):
+        tables = [
+            (
+                (graph.eligible_offsets, graph.eligible_types, graph.eligible_durations)
+                if graph.eligible_offsets is not None
+                else (np.arange(len(graph) + 1), graph.types, graph.durations)
+            )
+            for graph in graphs
+        ]
+        entry_offsets = np.zeros(len(graphs) + 1, dtype=np.int64)
+        np.cumsum([len(types) for _, types, _ in tables], out=entry_offsets[1:])
+        eligible_offsets = np.concatenate(
+            [[0]]
+            + [
+                offsets[1:] + entry_offsets[frame]
+                for frame, (offsets, _, _) in enumerate(tables)
+            ]
+        )
+        eligible_types = np.concatenate([types for _, types, _ in tables])
+        eligible_durations = np.concatenate([durations for _, _, durations in tables])
+
+    joined = TaskGraph(
+        names,
+        np.concatenate([graph.durations for graph in graphs]),
+        np.concatenate([graph.types for graph in graphs]),
+        np.concatenate([graph.priorities for graph in graphs]),
+        succ_offsets,
+        succ_ids,
+        processors,
+        eligible_offsets,
+        eligible_types,
+        eligible_durations,
+        succ_costs,
+    )
+    joined.build_tasks()
+    return joined, frame_offsets
+
+
+class FrameSim:
+    def __init__(self, frame_paths: List[str], frame_period: float, repeat: int = 1):
+        """
+        Args:
+            frame_paths (List[str]): parsed profiles, one per frame, in release order
+            frame_period (float): time between two frame releases
+            repeat (int, optional): plays the sequence this many times, for longer
+                runs out of a few frames. Defaults to 1.
+        """
+        graphs = [load_cached_graph(path) for path in frame_paths]
+        graph, self.frame_offsets = join_frames(graphs * repeat)
+        self.frame_period = frame_period
+        self.frames = len(self.frame_offsets) - 1
+        # the joined graph in a Sim, for the algorithms and schedule_trace()
+        self.sim = Sim()
+        self.sim.use_graph(graph)
+
+    def release_time(self, frame: int) -> float:
+        return frame * self.frame_period
+
+    def run(
+        self,
+        algorithm: type,
+        threshold: "str | float" = -1,
+        offline=False,
+        is_mobileye: bool = False,
+        is_critical: bool = False,
+        stats: RunStats = None,
+        trace_path: str = None,
+        preemption: Preemption = None,
+    ) -> PipelineReport:
+        """colors the joined graph with the algorithm and simulates all the frames
+        with Sim.start, every task released with its frame
+
+        Args:
+            stats (RunStats, optional): see Sim.start. Defaults to None.
+            trace_path (str, optional): see Sim.start. Defaults to None.
+            preemption (Preemption, optional): see Sim.start. Defaults to None.
+
+        Returns:
+            PipelineReport: throughput, latencies and backlog of the run
+        """
+        sim = self.sim
+        sim.graph.restore_tasks()
+        threshold = algorithm_thresholds(algorithm, [threshold], offline)[0]
+        instance: Algorithm = algorithm(
+            sim.tasks,
+            sim.processors,
+            sim.tasks,
+            offline=offline,
+            is_mobileye=is_mobileye,
+            is_critical=is_critical,
+            threshold=threshold,
+            graph=sim.graph,
+        )
+        releases = self.release_time(np.arange(self.frames, dtype=np.float64))
+        frame_sizes = np.diff(self.frame_offsets)
+        sim.start(
+            instance,
+            stats=stats,
+            keep_work_order=False,
+            trace_path=trace_path,
+            preemption=preemption,
+            release_times=np.repeat(releases, frame_sizes).tolist(),
+        )
+
+        # a frame finishes when its last task does, an empty one when it's released
+        completion = releases.copy()
+        filled = np.flatnonzero(frame_sizes)
+        if len(filled):
+            completion[filled] = np.maximum.reduceat(
+                np.asarray(sim.state.end_time), self.frame_offsets[filled]
+            )
+        sim.final_end_time = max(sim.final_end_time, completion.max(initial=0))
+
+        latencies = completion - releases
+        # frames finished before (or when) each frame was released
+        finished = np.searchsorted(np.sort(completion), releases, side="right")
+        backlog = np.arange(1, self.frames + 1) - finished
+        backlog_growth = (
+            float(np.polyfit(np.arange(self.frames), backlog, 1)[0])
+            if self.frames > 1
+            else 0.0
+        )
+        makespan = sim.final_end_time
+        return PipelineReport(
+            self.frames,
+            self.frame_period,
+            makespan,
+            self.frames / makespan if makespan > 0 else 0.0,
+            latencies,
+            backlog,
+            backlog_growth,
+        )
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("frame_paths", nargs="+", help="parsed profiles, in order")
+    arg_parser.add_argument(
+        "--period", type=float, required=True, help="time between frame releases"
+    )
+    arg_parser.add_argument("--repeat", type=int, default=1)
+    arg_parser.add_argument(
+        "--algorithm", choices=list(ALGORITHMS), default="OutDegreesFirst"
+    )
+    arg_parser.add_argument("--threshold", type=float, default=-1)
+    arg_parser.add_argument("--critical", action="store_true")
+    args = arg_parser.parse_args()
+
+    algorithm, offline = ALGORITHMS[args.algorithm]
+    frame_sim = FrameSim(args.frame_paths, args.period, args.repeat)
+    print(
+        frame_sim.run(
+            algorithm,
+            threshold=args.threshold,
+            offline=offline,
+            is_critical=args.critical,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
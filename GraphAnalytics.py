@@ -0,0 +1,101 @@
+from typing import Callable, Dict, List, TYPE_CHECKING
+import numpy as np
+
+from CriticalPath import CriticalPathAnalysis
+from LowerBounds import MakespanBounds, type_work
+
+if TYPE_CHECKING:
+    from TaskGraph import TaskGraph
+
+
+class GraphAnalytics:
+    """properties of a graph that heuristics keep asking for, every one computed
+    the first time it's read and then shared by all the algorithm instances and
+    thresholds that run on the graph (see TaskGraph.analytics)
+
+    the graph doesn't change after it's compiled, so nothing here is ever
+    recomputed. the arrays are shared too, don't write to them
+    """
+
+    def __init__(self, graph: "TaskGraph"):
+        self.graph = graph
+        self._out_degrees: np.ndarray = None
+        self._out_degrees_list: List[int] = None
+        self._critical_path: CriticalPathAnalysis = None
+        self._type_work: Dict[int, float] = None
+        self._bounds: MakespanBounds = None
+        # threshold_values function -> its values on the graph
+        self._threshold_values: Dict[Callable, np.ndarray] = {}
+
+    @property
+    def out_degrees(self) -> np.ndarray:
+        if self._out_degrees is None:
+            self._out_degrees = np.diff(self.graph.succ_offsets)
+        return self._out_degrees
+
+    @property
+    def out_degrees_list(self) -> List[int]:
+        """out_degrees as a list, for sort keys"""
+        if self._out_degrees_list is None:
+            self._out_degrees_list = self.out_degrees.tolist()
+        return self._out_degrees_list
+
+    @property
+    def in_degrees(self) -> np.ndarray:
+        return self.graph.in_degrees
+
+    @property
+    def critical_path(self) -> CriticalPathAnalysis:
+        """ES/LS, slack, bottom level and the critical set with the graph's own
+        durations
+        """
+        if self._critical_path is None:
+            self._critical_path = CriticalPathAnalysis(self.graph)
+        return self._critical_path
+
+    @property
+    def bottom_level(self) -> np.ndarray:
+        return self.critical_path.bottom_level
+
+    @property
+    def es(self) -> np.ndarray:
+        return self.critical_path.es
+
+    @property
+    def ls(self) -> np.ndarray:
+        return self.critical_path.ls
+
+    @property
+    def slack(self) -> np.ndarray:
+        return self.critical_path.slack
+
+    @property
+    def critical(self) -> np.ndarray:
+        """by task id, True for the tasks on the critical path"""
+        return self.critical_path.critical
+
+    @property
+    def type_work(self) -> Dict[int, float]:
+        """see LowerBounds.type_work"""
+        if self._type_work is None:
+            self._type_work = type_work(self.graph)
+        return self._type_work
+
+    @property
+    def bounds(self) -> MakespanBounds:
+        if self._bounds is None:
+            self._bounds = MakespanBounds(self.graph)
+        return self._bounds
+
+    def threshold_values(self, algorithm: type) -> np.ndarray:
+        """an algorithm's threshold_values on the graph, computed once for it and
+        every algorithm that inherits them
+
+        Returns:
+            np.ndarray: see Algorithm.threshold_values, None for algorithms without
+            thresholds
+        """
+        values_of = algorithm.threshold_values
+        if values_of not in self._threshold_values:
+            self._threshold_values[values_of] = values_of(self.graph)
+        return self._threshold_values[values_of]
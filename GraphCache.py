@@ -0,0 +1,224 @@
+"""binary cache of compiled task graphs
+
+a parsed profile "x.prof.json" is cached as "x.prof.graph" next to it:
+
+    MAGIC | header length (uint64) | header (json) | arrays, each 64 byte aligned
+
+the header holds the source file's mtime/size/sha1, the processors and where every
+array starts. the arrays are read through one read-only memory map, so every worker
+process that loads the same profile shares the same pages of the OS page cache
+"""
+
+from typing import Dict, List
+import hashlib
+import json
+import os
+import numpy as np
+
+from Processor import Processor
+from TaskGraph import TaskGraph
+
+MAGIC = b"TSKGRPH1"
+ALIGNMENT = 64
+
+# array name -> dtype, in the order they are written
+ARRAYS = {
+    "durations": np.float64,
+    "types": np.int64,
+    "priorities": np.int64,
+    "succ_offsets": np.int64,
+    "succ_ids": np.int64,
+    # task names, "\n" separated utf-8
+    "names": np.uint8,
+}
+# only in graphs with tasks that run on more than one processor type
+ELIGIBILITY_ARRAYS = {
+    "eligible_offsets": np.int64,
+    "eligible_types": np.int64,
+    "eligible_durations": np.float64,
+}
+# only in graphs with edge transfer costs
+COST_ARRAYS = {"succ_costs": np.float64}
+
+
+def cache_path(file_path: str) -> str:
+    return os.path.splitext(file_path)[0] + ".graph"
+
+
+def _file_hash(file_path: str) -> str:
+    digest = hashlib.sha1()
+    with open(file_path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def save_graph(graph: TaskGraph, path: str, source_path: str = None):
+    """writes a graph in the binary cache format, through a temporary file so
+    processes reading the cache never see half of it
+
+    Args:
+        graph (TaskGraph): the graph to save
+        path (str): the cache file
+        source_path (str, optional): the json the graph was read from, its mtime,
+            size and hash are stored to tell when the cache is stale
+    """
+    if any("\n" in name for name in graph.names):
+        raise ValueError("task names can't contain new lines")
+    names = "\n".join(graph.names)
+
+    arrays = {
+        "durations": graph.durations,
+        "types": graph.types,
+        "priorities": graph.priorities,
+        "succ_offsets": graph.succ_offsets,
+        "succ_ids": graph.succ_ids,
+        "names": np.frombuffer(names.encode(), dtype=np.uint8),
+    }
+    dtypes = dict(ARRAYS)
+    if graph.eligible_offsets is not None:
+        for name in ELIGIBILITY_ARRAYS:
+            arrays[name] = getattr(graph, name)
+        dtypes.update(ELIGIBILITY_ARRAYS)
+    if graph.succ_costs is not None:
+        arrays["succ_costs"] = graph.succ_costs
+        dtypes.update(COST_ARRAYS)
+
+    layout: Dict[str, List[int]] = {}
+    offset = 0
+    for name, dtype in dtypes.items():
+        array = np.ascontiguousarray(arrays[name], dtype=dtype)
+        arrays[name] = array
+        layout[name] = [offset, array.size]
+        offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+
+    source = None
+    if source_path is not None:
+        stat = os.stat(source_path)
+        source = {
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "sha1": _file_hash(source_path),
+        }
+
+    header = json.dumps(
+        {
+            "source": source,
+            "tasks": len(graph),
+            "processors": [f"{p.name}:{p.type}" for p in graph.processors],
+            "speeds": [p.speed for p in graph.processors],
+            "arrays": layout,
+        }
+    ).encode()
+    data_start = len(MAGIC) + 8 + len(header)
+    padding = -data_start % ALIGNMENT
+
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as file:
+        file.write(MAGIC)
+        file.write(np.uint64(len(header) + padding).tobytes())
+        file.write(header + b" " * padding)
+        for name in dtypes:
+            array = arrays[name]
+            file.write(array.tobytes())
+            file.write(b"\0" * (-array.nbytes % ALIGNMENT))
+    os.replace(temp_path, path)
+
+
+def _read_header(path: str):
+    with open(path, "rb") as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a task graph cache")
+        header_length = int(np.frombuffer(file.read(8), dtype=np.uint64)[0])
+        header = json.loads(file.read(header_length))
+    return header, len(MAGIC) + 8 + header_length
+
+
+def load_graph(path: str) -> TaskGraph:
+    """loads a cached graph, the arrays are views into a read-only memory map
+
+    Args:
+        path (str): the cache file
+
+    Returns:
+        TaskGraph: the graph, with its task and processor objects
+    """
+    header, data_start = _read_header(path)
+    memory = np.memmap(path, dtype=np.uint8, mode="r")
+
+    arrays = {}
+    for name, dtype in {**ARRAYS, **ELIGIBILITY_ARRAYS, **COST_ARRAYS}.items():
+        if name not in header["arrays"]:
+            arrays[name] = None
+            continue
+        offset, count = header["arrays"][name]
+        start = data_start + offset
+        end = start + count * np.dtype(dtype).itemsize
+        arrays[name] = memory[start:end].view(dtype)
+
+    names_blob = arrays["names"].tobytes().decode()
+    names = names_blob.split("\n") if header["tasks"] > 0 else []
+
+    processors = []
+    # caches written before processors had speeds don't list them
+    speeds = header.get("speeds") or [1.0] * len(header["processors"])
+    for processor_str, speed in zip(header["processors"], speeds):
+        processor_name, processor_type = processor_str.rsplit(":", 1)
+        processors.append(Processor(processor_name, int(processor_type), speed))
+
+    graph = TaskGraph(
+        names,
+        arrays["durations"],
+        arrays["types"],
+        arrays["priorities"],
+        arrays["succ_offsets"],
+        arrays["succ_ids"],
+        processors,
+        arrays["eligible_offsets"],
+        arrays["eligible_types"],
+        arrays["eligible_durations"],
+        arrays["succ_costs"],
+    )
+    graph.build_tasks()
+    return graph
+
+
+def _is_fresh(path: str, source_path: str) -> bool:
+    if not os.path.exists(path):
+        return False
+    try:
+        header, _ = _read_header(path)
+    except (OSError, ValueError):
+        return False
+
+    source = header["source"]
+    if source is None:
+        return False
+    stat = os.stat(source_path)
+    if stat.st_mtime_ns == source["mtime_ns"] and stat.st_size == source["size"]:
+        return True
+    # touched or copied, but maybe with the same content
+    return stat.st_size == source["size"] and _file_hash(source_path) == source["sha1"]
+
+
+def load_cached_graph(file_path: str) -> TaskGraph:
+    """loads a parsed json profile through its binary cache, the cache is
+    (re)built when it's missing or the json's mtime/hash changed
+
+    Args:
+        file_path (str): full path to the json profile
+
+    Returns:
+        TaskGraph: the graph, with its task and processor objects
+    """
+    path = cache_path(file_path)
+    if _is_fresh(path, file_path):
+        return load_graph(path)
+
+    graph = TaskGraph.from_json(file_path)
+    try:
+        save_graph(graph, path, file_path)
+    except OSError:
+        # read-only data folder, just don't cache
+        pass
+    return graph
@@ -0,0 +1,315 @@
+"""re-simulation from the first decision a change can affect
+
+a run of a static-key algorithm (see Algorithm.static_key) is recorded as a decision
+trace by TraceEngine, Sim's engine with recording hooks: the task every event
+finished, the tasks every event started and the event every task became ready at.
+an event is a step of the loop, a task that ends or the pending tasks that get
+released. every `checkpoint_interval` events the running tasks, pending tasks and
+idle processors heaps are copied, the first two hold at most one entry per processor
+and per task waiting for its inputs. the ready heaps aren't copied: their entries
+are totally ordered by (key, ready order), so rebuilding them from the trace pops
+them in the same order.
+
+a task's key or duration only matters from the event it became ready at: until then
+it isn't in any ready heap, so every earlier decision is the same. rerun() undoes the
+trace back to the last checkpoint before the first changed task got ready, restores
+the heaps and resumes the engine from there
+"""
+
+from typing import Iterable, List, Tuple
+
+from Sim import Sim
+from Task import Task
+from TaskGraph import TaskGraph, RunState
+from SimEngine import DecideQueue, SimEngine
+from Algorithms.Algorithm import Algorithm
+
+
+class TraceEngine(SimEngine):
+    """SimEngine that records the decision trace and the checkpoints of a run"""
+
+    def __init__(
+        self,
+        graph: TaskGraph,
+        state: RunState,
+        algorithm: Algorithm,
+        checkpoint_interval: int,
+        release_times: List[float] = None,
+    ):
+        # the event the loop is at, the initial matching is event 0
+        self.event = 0
+        # the task that ended in the current event, -1 when it released tasks
+        self.finishing = -1
+        # started[-1], the tasks the current event started
+        self.starting: List[int] = None
+        super().__init__(
+            graph, state, algorithm, keep_work_order=False, release_times=release_times
+        )
+        if isinstance(self.queue, DecideQueue):
+            raise ValueError(
+                f"{algorithm.__class__.__qualname__} has no static key, "
+                "its decisions can't be replayed"
+            )
+        self.checkpoint_interval = checkpoint_interval
+
+        n = len(graph)
+        # decision trace, event i (1..) finished finished[i - 1] (or released
+        # tasks, -1) and started started[i], event 0 is the initial matching
+        self.finished: List[int] = []
+        self.started: List[List[int]] = []
+        self.ready_event: List[int] = [0] * n
+        self.ready_seq: List[int] = [0] * n
+        # (task id, data_ready before) of every input that arrived, to undo them
+        self.data_ready_log: List[Tuple[int, float]] = []
+        # (event, running tasks heap, pending tasks heap, idle processors heaps,
+        #  idle count, ready count, done count, total time, final end time, data
+        #  ready log length) before the event
+        self.checkpoints: List[tuple] = []
+
+    # the trace runs without preemption, the hooks call the ready queue directly
+    def add_ready(self, task: Task):
+        queue = self.queue
+        self.ready_event[task.id] = self.event
+        self.ready_seq[task.id] = queue.ready_count
+        queue.add(task)
+
+    def start(self, task: Task, processor_id: int, current_time):
+        self.starting.append(task.id)
+        super().start(task, processor_id, current_time)
+
+    def start_on(self, task: Task, processor_id: int, current_time, duration):
+        self.starting.append(task.id)
+        super().start_on(task, processor_id, current_time, duration)
+
+    def task_finished(self, task: Task, processor_id: int, current_time):
+        task_id = task.id
+        self.finishing = task_id
+        data_ready = self.data_ready
+        if data_ready is not None:
+            self.data_ready_log.extend(
+                (successor, data_ready[successor])
+                for successor in self.succ_ids[
+                    self.succ_offsets[task_id] : self.succ_offsets[task_id + 1]
+                ]
+            )
+        super().task_finished(task, processor_id, current_time)
+
+    def match(self, current_time):
+        if self.event:
+            self.finished.append(self.finishing)
+            self.finishing = -1
+        self.starting = []
+        self.started.append(self.starting)
+        self.queue.match(current_time)
+        self.event += 1
+        if self.event % self.checkpoint_interval == 0:
+            self.checkpoints.append(
+                (
+                    self.event,
+                    self.events.copy(),
+                    self.pending.copy(),
+                    {t: idle.copy() for t, idle in self.idle_processors.items()},
+                    self.idle_count,
+                    self.queue.ready_count,
+                    self.done_count,
+                    self.total_time,
+                    self.final_end_time,
+                    len(self.data_ready_log),
+                )
+            )
+
+    def undo(self, checkpoint_index: int):
+        """rolls the run back to a checkpoint, the tasks that were ready before it
+        and started after it are its ready heaps again
+        """
+        checkpoint = self.checkpoints[checkpoint_index]
+        event = checkpoint[0]
+        succ_offsets = self.succ_offsets
+        succ_ids = self.succ_ids
+        remaining_in_degree = self.remaining_in_degree
+        processed_by = self.processed_by
+        ready_event = self.ready_event
+        waiting = []
+        for i in range(len(self.finished), event - 1, -1):
+            for task_id in self.started[i]:
+                processed_by[task_id] = -1
+                if ready_event[task_id] < event:
+                    waiting.append(task_id)
+            done_id = self.finished[i - 1]
+            if done_id == -1:
+                continue
+            for j in range(succ_offsets[done_id], succ_offsets[done_id + 1]):
+                remaining_in_degree[succ_ids[j]] += 1
+        del self.finished[event - 1 :]
+        del self.started[event:]
+        del self.checkpoints[checkpoint_index + 1 :]
+
+        (
+            self.event,
+            events,
+            pending,
+            idle_processors,
+            self.idle_count,
+            ready_count,
+            self.done_count,
+            self.total_time,
+            self.final_end_time,
+            data_ready_length,
+        ) = checkpoint
+        self.events = events.copy()
+        self.pending = pending.copy()
+        self.idle_processors = {t: idle.copy() for t, idle in idle_processors.items()}
+        data_ready = self.data_ready
+        data_ready_log = self.data_ready_log
+        while len(data_ready_log) > data_ready_length:
+            successor, previous = data_ready_log.pop()
+            data_ready[successor] = previous
+        self.finishing = -1
+
+        queue = self.queue
+        tasks = self.tasks
+        ready_seq = self.ready_seq
+        queue.ready_heaps = {}
+        for task_id in waiting:
+            queue.ready_count = ready_seq[task_id]
+            queue.add(tasks[task_id])
+        queue.ready_count = ready_count
+
+
+class IncrementalSim:
+    def __init__(
+        self,
+        sim: Sim,
+        checkpoint_interval: int = 16,
+        release_times: List[float] = None,
+    ):
+        """
+        Args:
+            sim (Sim): a Sim with the profile loaded
+            checkpoint_interval (int, optional): events between checkpoints, fewer
+                means less memory and longer undo/redo. Defaults to 16.
+            release_times (List[float], optional): see Sim.start. Defaults to None.
+        """
+        self.sim = sim
+        self.graph = sim.graph
+        self.checkpoint_interval = max(1, checkpoint_interval)
+        self.release_times = release_times
+        # the schedule of the last run, apart from sim.state
+        self.state = RunState(self.graph)
+        self.engine: TraceEngine = None
+        # duration of every task by id when run() or rerun() got them, None for
+        # the loaded ones
+        self.durations: List[float] = None
+        # how many events the last run reused instead of simulating
+        self.reused_events = 0
+
+    @property
+    def processed_by(self) -> List[int]:
+        return self.state.processed_by
+
+    @property
+    def end_time(self) -> List[float]:
+        return self.state.end_time
+
+    def run(
+        self, algorithm: Algorithm, durations: List[float] = None
+    ) -> Tuple[float, float]:
+        """simulates from time 0 and records the trace, the schedule is the same
+        as Sim.start's
+
+        Args:
+            algorithm (Algorithm): an algorithm with a static_key
+            durations (List[float], optional): duration of every task by id, instead
+                of the loaded ones, on homogeneous graphs
+
+        Returns:
+            (float, float): total duration of all tasks, final end time of all tasks
+        """
+        self.engine = TraceEngine(
+            self.graph,
+            self.state,
+            algorithm,
+            self.checkpoint_interval,
+            self.release_times,
+        )
+        self._set_durations(durations or self.durations)
+        self.reused_events = 0
+        return self.engine.run()
+
+    def divergence(self, changed: Iterable[int]) -> int:
+        """
+        Returns:
+            int: the first event whose decisions a change of these tasks' keys or
+            durations can affect, None when nothing changed
+        """
+        ready_event = self.engine.ready_event
+        return min((ready_event[task_id] for task_id in changed), default=None)
+
+    def rerun(
+        self,
+        algorithm: Algorithm,
+        changed: Iterable[int],
+        durations: List[float] = None,
+    ) -> Tuple[float, float]:
+        """simulates again after the keys or durations of some tasks changed since
+        the last run, reusing the trace up to the first affected event
+
+        Args:
+            algorithm (Algorithm): the algorithm, with the new keys
+            changed (Iterable[int]): ids of every task whose key or duration changed
+            durations (List[float], optional): the new durations of all tasks,
+                defaults to the last run's
+
+        Returns:
+            (float, float): total duration of all tasks, final end time of all tasks
+        """
+        engine = self.engine
+        if engine is None:
+            return self.run(algorithm, durations)
+        first_event = self.divergence(changed)
+        if first_event is None:
+            self._set_algorithm(algorithm)
+            self._set_durations(durations)
+            return engine.total_time, engine.final_end_time
+        # the last checkpoint before the first affected event
+        checkpoint_index = first_event // self.checkpoint_interval - 1
+        if checkpoint_index < 0:
+            return self.run(algorithm, durations)
+        self._set_algorithm(algorithm)
+        self._set_durations(durations)
+        engine.undo(checkpoint_index)
+        self.reused_events = engine.event - 1
+        return engine.resume()
+
+    def apply_to_processors(self):
+        """fills the processors' work_order with the last run's schedule"""
+        processors = self.sim.processors
+        tasks = self.graph.tasks
+        processed_by = self.processed_by
+        for processor in processors:
+            processor.reset()
+        for started in self.engine.started:
+            for task_id in started:
+                processors[processed_by[task_id]].work_order.append(tasks[task_id])
+
+    def _set_algorithm(self, algorithm: Algorithm):
+        order = algorithm.calculate() if algorithm.offline else None
+        key = algorithm.static_key(order)
+        if key is None:
+            raise ValueError(
+                f"{algorithm.__class__.__qualname__} has no static key, "
+                "its decisions can't be replayed"
+            )
+        self.engine.algorithm = algorithm
+        self.engine.queue.key = key
+
+    def _set_durations(self, durations: List[float]):
+        if durations is None:
+            return
+        if self.graph.heterogeneous:
+            raise ValueError(
+                "a heterogeneous graph's durations are its eligibility tables, "
+                "load a graph with the new ones"
+            )
+        self.durations = durations
+        self.engine.work = self.engine.run_durations = durations
@@ -0,0 +1,143 @@
+from typing import Dict, List, TYPE_CHECKING
+import numpy as np
+
+from CriticalPath import CriticalPathAnalysis
+
+if TYPE_CHECKING:
+    from TaskGraph import TaskGraph
+
+
+class MakespanBounds:
+    """lower bounds on the final end time of any schedule of a graph
+
+    critical_path: the longest chain of durations (and edge transfer costs), no
+        schedule is shorter
+    type_work: for every processor type, its total work divided by its processor
+        count (inf when tasks need a type no processor has)
+    capacity: the work of all the tasks divided by the speed of all the processors
+    combined: the largest of the above
+
+    on heterogeneous graphs (see TaskGraph.heterogeneous) every task counts with its
+    shortest duration on any processor it can run on, and type_work only counts the
+    tasks that can't run on another type
+    """
+
+    def __init__(self, graph: "TaskGraph"):
+        if not graph.heterogeneous:
+            # the graph's own critical path, shared with the heuristics
+            self.critical_path = graph.analytics.critical_path.length
+        else:
+            durations = fastest_durations(graph)
+            if float("inf") in durations:
+                # a task no processor can run
+                self.critical_path = float("inf")
+            else:
+                self.critical_path = CriticalPathAnalysis(graph, durations).length
+
+        self.type_work = graph.analytics.type_work
+        total_speed = sum(processor.speed for processor in graph.processors)
+        if graph.heterogeneous:
+            work = sum(_least_work(graph))
+        else:
+            work = float(graph.durations.sum())
+        if work == 0:
+            self.capacity = 0.0
+        else:
+            self.capacity = work / total_speed if total_speed else float("inf")
+        self.combined = max(
+            [self.critical_path, self.capacity, *self.type_work.values()]
+        )
+
+    def gap(self, final_end_time: float) -> float:
+        """
+        Returns:
+            float: how far above the combined bound a schedule ended, 0.05 is 5%
+        """
+        return optimality_gap(final_end_time, self.combined)
+
+    def as_dict(self) -> dict:
+        return {
+            "critical_path": self.critical_path,
+            "type_work": dict(self.type_work),
+            "capacity": self.capacity,
+            "combined": self.combined,
+        }
+
+
+def type_work(graph: "TaskGraph") -> Dict[int, float]:
+    """
+    Returns:
+        Dict[int, float]: total duration of every processor type's tasks divided by
+        its processors' speed (their count, without speeds), inf for a type that has
+        tasks but no processors. tasks that can run on more than one type aren't
+        counted
+    """
+    type_speeds: Dict[int, float] = {}
+    for processor in graph.processors:
+        type_speeds[processor.type] = (
+            type_speeds.get(processor.type, 0) + processor.speed
+        )
+
+    loads: Dict[int, float] = {}
+    if len(graph) == 0:
+        return loads
+    weights = graph.durations
+    if graph.eligible_offsets is not None:
+        weights = np.where(np.diff(graph.eligible_offsets) == 1, weights, 0)
+    work = np.bincount(graph.types, weights=weights).tolist()
+    for processor_type, total in enumerate(work):
+        if total == 0:
+            continue
+        speed = type_speeds.get(processor_type, 0)
+        loads[processor_type] = total / speed if speed else float("inf")
+    return loads
+
+
+def _least_work(graph: "TaskGraph") -> List[float]:
+    """by task id, its shortest duration on a type that has processors, before
+    speeds (inf when it has none)
+    """
+    types = {processor.type for processor in graph.processors}
+    return [
+        min(
+            (
+                duration
+                for processor_type, duration in eligible
+                if processor_type in types
+            ),
+            default=float("inf"),
+        )
+        for eligible in graph.eligibility_lists()
+    ]
+
+
+def fastest_durations(graph: "TaskGraph") -> List[float]:
+    """
+    Returns:
+        List[float]: by task id, how long it runs on the fastest processor it can
+        run on (inf when there is none), the durations on homogeneous graphs
+    """
+    if not graph.heterogeneous:
+        return graph.durations_list
+    fastest: Dict[int, float] = {}
+    for processor in graph.processors:
+        fastest[processor.type] = max(fastest.get(processor.type, 0), processor.speed)
+    return [
+        min(
+            (
+                duration / fastest[processor_type]
+                for processor_type, duration in eligible
+                if processor_type in fastest
+            ),
+            default=float("inf"),
+        )
+        for eligible in graph.eligibility_lists()
+    ]
+
+
+def optimality_gap(final_end_time: float, lower_bound: float) -> float:
+    if lower_bound is None:
+        return None
+    if lower_bound <= 0:
+        return 0.0
+    return (final_end_time - lower_bound) / lower_bound
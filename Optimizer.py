@@ -0,0 +1,299 @@
+"""improves a schedule by simulated annealing over a priority vector
+
+the search starts from the order of an offline heuristic (FromCriticalPath or
+MinRuntimeFirst) as a rank per task. every step swaps the ranks of two tasks of the
+same processor type that are close in the order, re-simulates on the already loaded
+Sim (from the first event the swap can change, see IncrementalSim) and keeps the
+move by the Metropolis rule. restarts run on a process pool and the
+best order is written as an order file PriorityOrder can replay:
+
+    python Optimizer.py Parser/Data/parsed/x.prof.json --time-budget 60 --restarts 4
+    python Optimizer.py x.prof.json --start MinRuntimeFirst --output x.order.json
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple
+import argparse
+import math
+import random
+import time
+
+from Sim import Sim
+from IncrementalSim import IncrementalSim
+from Algorithms.GreedyHeuristics import FromCriticalPath
+from Algorithms.PriorityOrder import PriorityOrder
+
+START_ORDERS = ("FromCriticalPath", "MinRuntimeFirst")
+
+
+class SearchResult(NamedTuple):
+    initial_makespan: float
+    best_makespan: float
+    # task names, from the first to run to the last
+    order: List[str]
+    steps: int
+    seed: int
+
+
+def initial_priorities(sim: Sim, start: str = "FromCriticalPath") -> List[int]:
+    """
+    Returns:
+        List[int]: the rank of every task (by task id) in the start heuristic's order
+    """
+    graph = sim.graph
+    graph.restore_tasks()
+    if start == "FromCriticalPath":
+        order = [
+            task.id
+            for task in FromCriticalPath(
+                sim.tasks, sim.processors, sim.tasks, offline=True, graph=graph
+            ).calculate()
+        ]
+        graph.restore_tasks()
+    elif start == "MinRuntimeFirst":
+        durations = graph.durations_list
+        order = sorted(range(len(graph)), key=lambda task_id: durations[task_id])
+    else:
+        raise ValueError(f"unknown start order {start}, use one of {START_ORDERS}")
+
+    priorities = [0] * len(graph)
+    for rank, task_id in enumerate(order):
+        priorities[task_id] = rank
+    return priorities
+
+
+class PrioritySearch:
+    """simulated annealing over the priorities of one loaded Sim"""
+
+    def __init__(
+        self,
+        sim: Sim,
+        priorities: List[int],
+        seed: int = 0,
+        temperature: float = 0.001,
+        max_distance: int = 8,
+    ):
+        """
+        Args:
+            sim (Sim): a Sim with the profile loaded, reused by every evaluation
+            priorities (List[int]): the start ranks, see initial_priorities()
+            seed (int, optional): random seed. Defaults to 0.
+            temperature (float, optional): the starting temperature, relative to the
+                initial makespan, it cools linearly to zero. Defaults to 0.001.
+            max_distance (int, optional): how far apart in their type's order two
+                swapped tasks can be. Defaults to 8.
+        """
+        self.sim = sim
+        self.engine = IncrementalSim(sim)
+        # tasks whose rank differs from the engine's last run
+        self.changed = set()
+        self.random = random.Random(seed)
+        self.temperature = temperature
+        self.max_distance = max_distance
+        self.algorithm = PriorityOrder(
+            sim.tasks,
+            sim.processors,
+            sim.tasks,
+            offline=False,
+            graph=sim.graph,
+            priorities=list(priorities),
+        )
+
+        # task ids of every processor type, from the first to run. only tasks of
+        # the same type compete for processors, so only they are swapped
+        types = sim.graph.types_list
+        by_type: Dict[int, List[int]] = {}
+        for task_id in sorted(range(len(priorities)), key=priorities.__getitem__):
+            by_type.setdefault(types[task_id], []).append(task_id)
+        self.orders = [order for order in by_type.values() if len(order) > 1]
+        self.order_sizes = [len(order) for order in self.orders]
+
+        self.steps = 0
+        _, self.makespan = self.engine.run(self.algorithm)
+        self.initial_makespan = self.makespan
+        self.best_makespan = self.makespan
+        self.best_priorities = list(priorities)
+
+    def evaluate(self) -> float:
+        _, final_end_time = self.engine.rerun(self.algorithm, self.changed)
+        self.changed = set()
+        return final_end_time
+
+    def step(self, temperature: float) -> bool:
+        """tries one swap
+
+        Returns:
+            bool: whether the swap was kept
+        """
+        order = self.random.choices(self.orders, weights=self.order_sizes)[0]
+        i = self.random.randrange(len(order))
+        distance = self.random.randint(1, self.max_distance)
+        j = i + distance if self.random.random() < 0.5 else i - distance
+        j = min(max(j, 0), len(order) - 1)
+        if i == j:
+            j = i + 1 if i + 1 < len(order) else i - 1
+
+        priorities = self.algorithm.priorities
+        a, b = order[i], order[j]
+        priorities[a], priorities[b] = priorities[b], priorities[a]
+        self.changed.update((a, b))
+        self.steps += 1
+        makespan = self.evaluate()
+
+        delta = makespan - self.makespan
+        if delta <= 0 or (
+            temperature > 0 and self.random.random() < math.exp(-delta / temperature)
+        ):
+            order[i], order[j] = b, a
+            self.makespan = makespan
+            if makespan < self.best_makespan:
+                self.best_makespan = makespan
+                self.best_priorities = priorities.copy()
+            return True
+
+        # the engine's last run is the rejected one
+        priorities[a], priorities[b] = priorities[b], priorities[a]
+        self.changed.update((a, b))
+        return False
+
+    def run(self, time_budget: float, max_steps: int = None):
+        """steps until the time budget (seconds) or max_steps runs out"""
+        start_temperature = self.temperature * self.initial_makespan
+        start_time = time.perf_counter()
+        steps = 0
+        while max_steps is None or steps < max_steps:
+            elapsed = time.perf_counter() - start_time
+            if elapsed >= time_budget:
+                break
+            self.step(start_temperature * (1 - elapsed / time_budget))
+            steps += 1
+
+    def best_order(self) -> List[str]:
+        names = self.sim.graph.names
+        priorities = self.best_priorities
+        return [
+            names[task_id]
+            for task_id in sorted(range(len(priorities)), key=priorities.__getitem__)
+        ]
+
+
+def search(
+    file_path: str,
+    start: str = "FromCriticalPath",
+    time_budget: float = 60,
+    seed: int = 0,
+    temperature: float = 0.001,
+    max_distance: int = 8,
+    max_steps: int = None,
+) -> SearchResult:
+    """a single restart, the profile is loaded once and every step re-simulates it"""
+    sim = Sim()
+    sim.read_data(file_path)
+    local_search = PrioritySearch(
+        sim, initial_priorities(sim, start), seed, temperature, max_distance
+    )
+    local_search.run(time_budget, max_steps)
+    return SearchResult(
+        local_search.initial_makespan,
+        local_search.best_makespan,
+        local_search.best_order(),
+        local_search.steps,
+        seed,
+    )
+
+
+def optimize(
+    file_path: str,
+    start: str = "FromCriticalPath",
+    time_budget: float = 60,
+    restarts: int = 1,
+    max_workers: int = None,
+    seed: int = 0,
+    temperature: float = 0.001,
+    max_distance: int = 8,
+    output_path: str = None,
+) -> SearchResult:
+    """runs `restarts` independent searches (each with the whole time budget) on a
+    process pool and keeps the best one
+
+    Args:
+        output_path (str, optional): where to write the best order, for
+            PriorityOrder(order_path=...). Defaults to None, not written.
+
+    Returns:
+        SearchResult: the best restart
+    """
+    seeds = [seed + i for i in range(restarts)]
+    if restarts == 1 or max_workers == 1:
+        results = [
+            search(
+                file_path, start, time_budget, restart_seed, temperature, max_distance
+            )
+            for restart_seed in seeds
+        ]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(
+                executor.map(
+                    search,
+                    [file_path] * restarts,
+                    [start] * restarts,
+                    [time_budget] * restarts,
+                    seeds,
+                    [temperature] * restarts,
+                    [max_distance] * restarts,
+                )
+            )
+
+    best = min(results, key=lambda result: result.best_makespan)
+    if output_path is not None:
+        PriorityOrder.write_order(
+            output_path,
+            best.order,
+            source=file_path,
+            start=start,
+            makespan=best.best_makespan,
+            initial_makespan=best.initial_makespan,
+        )
+    return best
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("file_path", help="a parsed profile")
+    arg_parser.add_argument("--start", choices=START_ORDERS, default=START_ORDERS[0])
+    arg_parser.add_argument(
+        "--time-budget", type=float, default=60, help="seconds of every restart"
+    )
+    arg_parser.add_argument("--restarts", type=int, default=1)
+    arg_parser.add_argument(
+        "--workers", type=int, default=None, help="defaults to the number of cores"
+    )
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--temperature", type=float, default=0.001)
+    arg_parser.add_argument("--max-distance", type=int, default=8)
+    arg_parser.add_argument(
+        "--output", default=None, help="defaults to <profile>.order.json"
+    )
+    args = arg_parser.parse_args()
+
+    output_path = args.output or args.file_path.rsplit(".", 1)[0] + ".order.json"
+    best = optimize(
+        args.file_path,
+        start=args.start,
+        time_budget=args.time_budget,
+        restarts=args.restarts,
+        max_workers=args.workers,
+        seed=args.seed,
+        temperature=args.temperature,
+        max_distance=args.max_distance,
+        output_path=output_path,
+    )
+    print(
+        f"{args.start}: {best.initial_makespan} -> {best.best_makespan} "
+        f"({best.steps} steps, seed {best.seed}), order written to {output_path}"
+    )
+
+
+if __name__ == "__main__":
+    main()
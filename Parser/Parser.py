@@ -1,7 +1,14 @@
 import re
-from typing import List
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Tuple
+import argparse
 import json
 import os
+import sys
+
+# hoisted so they're compiled once, not on every line
+PROCESSOR_PATTERN = re.compile(r"\('(\w+)', (\d+)\)")
+BLOCKING_PATTERN = re.compile(r"'(.*?)'")
 
 
 class Task:
@@ -29,6 +36,11 @@ class Parser:
         self.processors: List[Processor] = []
         self.processor_types: List[str] = []
 
+        # interning tables, so every lookup is a dict access instead of a list scan
+        self._processor_by_info: Dict[Tuple[str, str], Processor] = {}
+        self._processor_type_ids: Dict[str, int] = {}
+        self._task_names: Dict[str, str] = {}
+
     def read_prof(self, file_path: str):
         """reads a .prof file and stores all the information
           about tasks and processors as objects inside this class
@@ -36,32 +48,39 @@ class Parser:
         Args:
             file_path (str): full path to the .prof file to read
         """
-        file = open(file_path, "r")
-        for line in file.readlines():
-            split = line.split("|")
-            processor = self.extract_processor_info(split[1])
-
-            # add only unique processors
-            processor_exists = False
-            for p in self.processors:
-                if p.name == processor.name and p.type == processor.type:
-                    processor_exists = True
-                    break
-
-            if not processor_exists:
-                self.processors.append(processor)
-
-            # add task
-            task = Task(
-                split[0],
-                float(split[2]),
-                int(split[3]),
-                processor.type,
-                self.extract_blocking_tasks(split[-1]),
-            )
-            self.tasks.append(task)
+        self.tasks.extend(self.iter_prof(file_path))
+
+    def iter_prof(self, file_path: str) -> Iterator[Task]:
+        """reads a .prof file one line at a time, yields its tasks and registers
+        their processors in self.processors
+
+        Args:
+            file_path (str): full path to the .prof file to read
+
+        Yields:
+            Task: every task, in the order of the file
+        """
+        with open(file_path, "r") as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                split = line.split("|")
+                processor = self.extract_processor_info(split[1])
 
-        file.close()
+                yield Task(
+                    self._intern(split[0]),
+                    float(split[2]),
+                    int(split[3]),
+                    processor.type,
+                    [
+                        self._intern(name)
+                        for name in self.extract_blocking_tasks(split[-1])
+                    ],
+                )
+
+    def _intern(self, task_name: str) -> str:
+        # task names repeat in every blocking list, keep one string per name
+        return self._task_names.setdefault(task_name, task_name)
 
     def to_json(self, file_path: str, priority: int):
         """extracts all the tasks and processors
@@ -95,6 +114,105 @@ class Parser:
         with open(file_path, "w") as json_file:
             json.dump(data, json_file)
 
+    def convert_to_json(self, prof_path: str, file_path: str, priority: int):
+        """streams a .prof file into the same json to_json writes, one task at a
+        time, without keeping the tasks in memory
+
+        a task name that appears twice is written twice, json.load keeps the
+        first position and the last values, exactly like to_json's dictionary
+
+        Args:
+            prof_path (str): full path to the .prof file to read
+            file_path (str): full path to the output file (including .json at the end)
+            priority (int): tasks priority, like to_json
+        """
+        with open(file_path, "w") as json_file:
+            json_file.write('{"Tasks": {')
+            first = True
+            for task in self.iter_prof(prof_path):
+                if priority != self.PRIORITY_BOTH and task.priority != priority:
+                    continue
+                if not first:
+                    json_file.write(", ")
+                first = False
+                json_file.write(json.dumps(task.name))
+                json_file.write(": ")
+                json_file.write(
+                    json.dumps(
+                        {
+                            "duration": task.duration,
+                            "processor_type": task.processor_type,
+                            "blocking": task.blocking,
+                            "priority": task.priority,
+                        }
+                    )
+                )
+            json_file.write('}, "Processors": ')
+            json.dump(
+                [f"{processor.name}:{processor.type}" for processor in self.processors],
+                json_file,
+            )
+            json_file.write("}")
+
+    def convert_to_graph(self, prof_path: str, file_path: str, priority: int):
+        """streams a .prof file straight into the simulator's binary graph format
+        (see GraphCache), only the columns of the graph are kept in memory
+
+        Args:
+            prof_path (str): full path to the .prof file to read
+            file_path (str): full path to the output file (including .graph at the end)
+            priority (int): tasks priority, like to_json
+        """
+        # the simulator's modules live one folder up
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        if root not in sys.path:
+            sys.path.append(root)
+        from GraphCache import save_graph
+        from Processor import Processor as SimProcessor
+        from TaskGraph import TaskGraph
+
+        task_ids: Dict[str, int] = {}
+        durations: List[float] = []
+        types: List[int] = []
+        priorities: List[int] = []
+        blocking: List[List[str]] = []
+
+        for task in self.iter_prof(prof_path):
+            if priority != self.PRIORITY_BOTH and task.priority != priority:
+                continue
+            # a repeated name keeps its first position and its last values
+            task_id = task_ids.setdefault(task.name, len(task_ids))
+            if task_id == len(durations):
+                durations.append(task.duration)
+                types.append(task.processor_type)
+                priorities.append(task.priority)
+                blocking.append(task.blocking)
+            else:
+                durations[task_id] = task.duration
+                types[task_id] = task.processor_type
+                priorities[task_id] = task.priority
+                blocking[task_id] = task.blocking
+
+        succ_offsets = [0]
+        succ_ids: List[int] = []
+        for task_name, names in zip(task_ids, blocking):
+            for name in names:
+                if name not in task_ids:
+                    raise ValueError(f"{task_name} is blocking unknown task {name}")
+                succ_ids.append(task_ids[name])
+            succ_offsets.append(len(succ_ids))
+
+        graph = TaskGraph(
+            list(task_ids),
+            durations,
+            types,
+            priorities,
+            succ_offsets,
+            succ_ids,
+            [SimProcessor(p.name, p.type) for p in self.processors],
+        )
+        save_graph(graph, file_path)
+
     def extract_processor_info(self, text: str) -> Processor:
         """helper function for read_prof, reads the processor name and type and extracts to an object
 
@@ -102,22 +220,32 @@ class Parser:
             text (str): text to extract the information from
 
         Returns:
-            Processor: the processor object with the info extracted to it
+            Processor: the processor object with the info extracted to it, the same
+            object for every line of the same processor
         """
-        match = re.match(r"\('(\w+)', (\d+)\)", text)
+        match = PROCESSOR_PATTERN.match(text)
         processor_type = match.group(1)
         processor_name = match.group(2)
 
+        processor = self._processor_by_info.get((processor_type, processor_name))
+        if processor is not None:
+            return processor
+
         # add unique processor types
-        if processor_type not in self.processor_types:
+        if processor_type not in self._processor_type_ids:
+            self._processor_type_ids[processor_type] = len(self.processor_types)
             self.processor_types.append(processor_type)
 
-        return Processor(
+        # add only unique processors
+        processor = Processor(
             f"{processor_type}{processor_name}",
-            self.processor_types.index(processor_type),
+            self._processor_type_ids[processor_type],
         )
+        self._processor_by_info[(processor_type, processor_name)] = processor
+        self.processors.append(processor)
+        return processor
 
-    def extract_blocking_tasks(self, text:str):
+    def extract_blocking_tasks(self, text: str):
         """helper function for read_prof, extracts all the tasks
         the current one we're reading is blocking, and returns all the matches
 
@@ -127,17 +255,46 @@ class Parser:
         Returns:
             List[str]: list of all the task names
         """
-        pattern = re.compile(r"'(.*?)'")
-        matches = pattern.findall(text)
-        return matches
+        return BLOCKING_PATTERN.findall(text)
+
+
+def convert_file(prof_path: str, output_path: str, binary: bool = False):
+    parser = Parser()
+    if binary:
+        parser.convert_to_graph(prof_path, output_path, Parser.PRIORITY_BOTH)
+    else:
+        parser.convert_to_json(prof_path, output_path, Parser.PRIORITY_BOTH)
 
 
 def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument(
+        "--binary", action="store_true", help="write .graph files instead of json"
+    )
+    arg_parser.add_argument(
+        "--workers", type=int, default=None, help="defaults to the number of cores"
+    )
+    args = arg_parser.parse_args()
+
     folder_path = "Parser/Data"
-    for filename in os.listdir(f"{folder_path}/gsf-profs"):
-        parser = Parser()
-        parser.read_prof(f"{folder_path}/gsf-profs/{filename}")
-        parser.to_json(f"{folder_path}/parsed/{filename}.json", Parser.PRIORITY_BOTH)
+    extension = "graph" if args.binary else "json"
+    filenames = os.listdir(f"{folder_path}/gsf-profs")
+
+    # files are independent, convert them in parallel
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        workers = args.workers or os.cpu_count() or 1
+        list(
+            executor.map(
+                convert_file,
+                [f"{folder_path}/gsf-profs/{filename}" for filename in filenames],
+                [
+                    f"{folder_path}/parsed/{filename}.{extension}"
+                    for filename in filenames
+                ],
+                [args.binary] * len(filenames),
+                chunksize=max(1, len(filenames) // (workers * 4)),
+            )
+        )
 
 
 if __name__ == "__main__":
@@ -5,9 +5,11 @@ if TYPE_CHECKING:
 
 
 class Processor:
-    def __init__(self, name: str, processor_type: int):
+    def __init__(self, name: str, processor_type: int, speed: float = 1.0):
         self.name = name
         self.type = processor_type
+        # a task runs on this processor for its duration / speed
+        self.speed = speed
         self.idle = True
         self.current_task = None
         self.work_order: List["Task"] = []
@@ -16,19 +18,13 @@ class Processor:
         self.idle = False
         self.work_order.append(task)
         self.current_task = task
-        self.current_task.processed_by = self
-        self.current_task.being_processed = True
 
-    def task_finished(self, ready_tasks):
-        self.current_task.done = True
-        self.current_task.processed_by = None
-
-        # remove current task from all blocked_by lists of the tasks its blocking
-        # and update ready_tasks
-        for task in self.current_task.blocking:
-            task.blocked_by.remove(self.current_task)
-            if len(task.blocked_by) == 0:
-                ready_tasks.append(task)
+    def task_finished(self):
+        self.idle = True
+        self.current_task = None
 
+    # clears what the previous simulation run left on this processor
+    def reset(self):
         self.idle = True
         self.current_task = None
+        self.work_order = []
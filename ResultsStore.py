@@ -0,0 +1,271 @@
+from typing import Dict, List, Tuple
+import json
+import os
+import sqlite3
+import time
+import uuid
+
+from openpyxl import Workbook
+import openpyxl
+
+# (input file name, algorithm name, threshold, is_mobileye, final end time,
+# makespan lower bound or None)
+ResultRow = Tuple[str, str, "str | float", bool, float, float]
+
+
+def clear_sheet(sheet):
+    for row in sheet.iter_rows():
+        for cell in row:
+            cell.value = None
+            cell.style = "Normal"
+
+
+def prepare_sheet(
+    workbook: Workbook,
+    algorithm_name: str,
+    thresholds: list["str | float"],
+    file_to_index: Dict[str, int],
+):
+    """(re)creates an algorithm's sheet: a "Regular" column, a column per
+    threshold and a row per input file
+    """
+    if "Sheet1" in workbook.sheetnames:
+        del workbook["Sheet1"]
+    sheet = None
+    if algorithm_name in workbook.sheetnames:
+        sheet = workbook[algorithm_name]
+        clear_sheet(sheet)
+    else:
+        workbook.create_sheet(algorithm_name)
+        sheet = workbook[algorithm_name]
+
+    sheet.cell(1, 2).value = "Regular"
+    for i, threshold in enumerate(thresholds):
+        sheet.cell(1, i + 3).value = threshold
+
+    for key in file_to_index.keys():
+        sheet.cell(file_to_index[key], 1).value = key
+    return sheet
+
+
+def find_threshold_column(sheet, threshold: "str | float", is_mobileye: bool) -> int:
+    def same_value(value1, value2):
+        if value1 is None or value2 is None:
+            return False
+
+        if type(value1) == str and type(value2) == str:
+            return value1 == value2
+
+        if type(value1) != type(value2):
+            if type(value1) == str or type(value2) == str:
+                return False
+
+        return abs(value1 - value2) < 0.1 * value1
+
+    if not is_mobileye:
+        return 2
+    i = 2
+    while i < 13:
+        if same_value(sheet.cell(1, i).value, threshold):
+            return i
+        i += 1
+    return -1
+
+
+class ResultsStore:
+    """append-only SQLite store of simulation results
+
+    rows are buffered in memory and inserted in one transaction per batch, and
+    the excel workbook is written once, by export_excel(). every process opens
+    its own connection and SQLite serializes the writers, so parallel workers
+    can share one database file
+
+    every row belongs to a sweep, the store's own unless another one is given.
+    sweeps pick their thresholds from random files, so rows() and export_excel()
+    only read the rows of this store's sweep
+    """
+
+    def __init__(
+        self, db_path: str = "Results.sqlite", batch_size: int = 500, sweep: str = None
+    ):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.sweep = sweep if sweep is not None else uuid.uuid4().hex
+        self.buffer: List[ResultRow] = []
+        self._connection: sqlite3.Connection = None
+        self._connection_pid = None
+
+    def _connect(self) -> sqlite3.Connection:
+        # a connection can't be shared with a forked worker, open one per process
+        if self._connection is None or self._connection_pid != os.getpid():
+            self._connection = sqlite3.connect(self.db_path, timeout=60)
+            self._connection_pid = os.getpid()
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "input_file TEXT, algorithm TEXT, threshold TEXT, "
+                "is_mobileye INTEGER, runtime REAL, created REAL, lower_bound REAL, "
+                "sweep TEXT)"
+            )
+            columns = [
+                row[1] for row in self._connection.execute("PRAGMA table_info(results)")
+            ]
+            if "lower_bound" not in columns:
+                # a database from before the bounds were stored
+                self._connection.execute(
+                    "ALTER TABLE results ADD COLUMN lower_bound REAL"
+                )
+            if "sweep" not in columns:
+                # a database from before the sweeps, its rows belong to none
+                self._connection.execute("ALTER TABLE results ADD COLUMN sweep TEXT")
+        return self._connection
+
+    def add(
+        self,
+        input_file: str,
+        algorithm_name: str,
+        threshold: "str | float",
+        is_mobileye: bool,
+        runtime: float,
+        lower_bound: float = None,
+    ):
+        self.buffer.append(
+            (
+                input_file.split("/")[-1],
+                algorithm_name,
+                threshold,
+                is_mobileye,
+                runtime,
+                lower_bound,
+            )
+        )
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        connection = self._connect()
+        now = time.time()
+        with connection:
+            connection.executemany(
+                "INSERT INTO results (input_file, algorithm, threshold, "
+                "is_mobileye, runtime, created, lower_bound, sweep) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    # json keeps "Offline" a string and 3 a number
+                    (
+                        file,
+                        algorithm,
+                        json.dumps(threshold),
+                        int(mobileye),
+                        runtime,
+                        now,
+                        lower_bound,
+                        self.sweep,
+                    )
+                    for (
+                        file,
+                        algorithm,
+                        threshold,
+                        mobileye,
+                        runtime,
+                        lower_bound,
+                    ) in self.buffer
+                ],
+            )
+        self.buffer = []
+
+    def rows(self, all_sweeps=False) -> List[ResultRow]:
+        """
+        Args:
+            all_sweeps (bool, optional): the rows of every sweep in the database.
+                Defaults to False, only this store's sweep.
+
+        Returns:
+            List[ResultRow]: the stored rows, oldest first
+        """
+        self.flush()
+        query = (
+            "SELECT input_file, algorithm, threshold, is_mobileye, runtime, "
+            "lower_bound FROM results"
+        )
+        if all_sweeps:
+            cursor = self._connect().execute(query + " ORDER BY rowid")
+        else:
+            cursor = self._connect().execute(
+                query + " WHERE sweep = ? ORDER BY rowid", (self.sweep,)
+            )
+        return [
+            (file, algorithm, json.loads(threshold), bool(mobileye), runtime, bound)
+            for file, algorithm, threshold, mobileye, runtime, bound in cursor
+        ]
+
+    def clear(self):
+        self.buffer = []
+        with self._connect() as connection:
+            connection.execute("DELETE FROM results")
+
+    def export_excel(
+        self,
+        output_file: str,
+        thresholds: Dict[str, list["str | float"]],
+        file_to_index: Dict[str, int],
+    ) -> List[ResultRow]:
+        """writes the results of this store's sweep to the workbook with one load
+        and one save, in the layout init_sheet() and write_results() produce
+
+        Args:
+            output_file (str): the workbook, created if it doesn't exist
+            thresholds (Dict[str, list]): thresholds of every algorithm, by class name
+            file_to_index (Dict[str, int]): row of every input file
+
+        Returns:
+            List[ResultRow]: the rows that weren't written, their file has no row or
+            their threshold no column in the sheet
+        """
+        rows = self.rows()
+        skipped: List[ResultRow] = []
+        new_workbook = not os.path.exists(output_file)
+        if new_workbook:
+            workbook = Workbook()
+            default_sheet = workbook.active
+        else:
+            workbook: Workbook = openpyxl.load_workbook(output_file)
+
+        sheets = {}
+        for row in rows:
+            file, algorithm, threshold, is_mobileye, runtime, _ = row
+            if algorithm not in sheets:
+                sheets[algorithm] = prepare_sheet(
+                    workbook, algorithm, thresholds.get(algorithm, []), file_to_index
+                )
+            sheet = sheets[algorithm]
+            column = find_threshold_column(sheet, threshold, is_mobileye)
+            if file not in file_to_index or column == -1:
+                skipped.append(row)
+                continue
+            sheet.cell(row=file_to_index[file], column=column).value = runtime
+
+        if new_workbook and sheets:
+            workbook.remove(default_sheet)
+        workbook.save(output_file)
+        workbook.close()
+        if skipped:
+            print(
+                f"{len(skipped)} results have no cell in {output_file}, "
+                f"e.g. {skipped[0][1]} threshold {skipped[0][2]} on {skipped[0][0]}"
+            )
+        return skipped
+
+    def close(self):
+        self.flush()
+        if self._connection is not None and self._connection_pid == os.getpid():
+            self._connection.close()
+        self._connection = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,62 @@
+from typing import Dict
+
+
+class RunStats:
+    """where a single Sim.start run spent its time, pass one to Sim.start to fill it
+
+    phases (cumulative seconds):
+        calculate: the offline algorithm's calculate()
+        decide: algorithm.decide() on the full ready list, or computing the static
+            keys of the ready queue
+        match: looking for idle processors for the ordered ready tasks
+        queue: pushing and popping the running tasks' event heap
+        task_finished: freeing processors and updating successors' in-degrees
+        timeline: recording the illustration
+    """
+
+    PHASES = ("calculate", "decide", "match", "queue", "task_finished", "timeline")
+
+    def __init__(self):
+        self.phase_seconds: Dict[str, float] = dict.fromkeys(self.PHASES, 0.0)
+        self.counters: Dict[str, int] = {
+            "events": 0,
+            "decide_calls": 0,
+            # sum and max of the ready list sizes decide() was called with
+            "ready_tasks_seen": 0,
+            "max_ready_tasks": 0,
+            "matches_attempted": 0,
+            "matches_made": 0,
+        }
+        self.total_seconds = 0.0
+        self.algorithm_name = None
+        self.final_end_time = 0
+
+    def count(self, name: str, amount: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def as_dict(self) -> dict:
+        return {
+            "algorithm": self.algorithm_name,
+            "final_end_time": self.final_end_time,
+            "total_seconds": self.total_seconds,
+            "phase_seconds": dict(self.phase_seconds),
+            "counters": dict(self.counters),
+        }
+
+    def __str__(self):
+        lines = [
+            f"{self.algorithm_name}: {self.total_seconds:.4f}s, "
+            f"end time {self.final_end_time}"
+        ]
+        for phase, seconds in self.phase_seconds.items():
+            share = seconds / self.total_seconds if self.total_seconds else 0
+            lines.append(f"  {phase:<14} {seconds:>9.4f}s {100 * share:>5.1f}%")
+        other = self.total_seconds - sum(self.phase_seconds.values())
+        lines.append(f"  {'other':<14} {other:>9.4f}s")
+
+        for name, value in self.counters.items():
+            lines.append(f"  {name:<18} {value}")
+        if self.counters["decide_calls"]:
+            average = self.counters["ready_tasks_seen"] / self.counters["decide_calls"]
+            lines.append(f"  {'avg_ready_tasks':<18} {average:.1f}")
+        return "\n".join(lines)
@@ -0,0 +1,104 @@
+from typing import List, NamedTuple, Tuple
+import numpy as np
+
+
+class RunMetrics(NamedTuple):
+    """what a metrics-only run keeps, O(1) per run"""
+
+    makespan: float
+    # sum of all the tasks' durations
+    total_work: float
+    # total_work / (makespan * number of processors)
+    utilization: float
+
+
+class ScheduleTrace:
+    """the schedule of a run as columns, a row per task ordered by start time
+    (ties by task id)
+
+    task_id: the task's index in the graph
+    processor_id: index into sim.processors
+    start, end: when the task ran
+    """
+
+    COLUMNS = ("task_id", "processor_id", "start", "end")
+
+    def __init__(
+        self,
+        task_id: np.ndarray,
+        processor_id: np.ndarray,
+        start: np.ndarray,
+        end: np.ndarray,
+    ):
+        self.task_id = np.asarray(task_id, dtype=np.int64)
+        self.processor_id = np.asarray(processor_id, dtype=np.int32)
+        self.start = np.asarray(start, dtype=np.float64)
+        self.end = np.asarray(end, dtype=np.float64)
+
+    @classmethod
+    def from_run(
+        cls,
+        processed_by: List[int],
+        end_time: List[float],
+        durations: np.ndarray,
+        segments: List[Tuple[int, int, float, float]] = None,
+    ) -> "ScheduleTrace":
+        """builds the columns in one vectorized pass over a finished run's state
+        (see RunState), nothing is recorded while simulating. preempted runs
+        (segments) are rows of their own
+        """
+        n = len(processed_by)
+        end = np.fromiter(end_time, dtype=np.float64, count=n)
+        start = end - durations
+        task_id = np.arange(n, dtype=np.int64)
+        processor_id = np.fromiter(processed_by, dtype=np.int32, count=n)
+        if segments:
+            columns = list(zip(*segments))
+            task_id = np.concatenate((task_id, columns[0]))
+            processor_id = np.concatenate((processor_id, columns[1]))
+            start = np.concatenate((start, columns[2]))
+            end = np.concatenate((end, columns[3]))
+        order = np.lexsort((task_id, start))
+        return cls(task_id[order], processor_id[order], start[order], end[order])
+
+    def __len__(self):
+        return len(self.task_id)
+
+    def to_npz(self, path: str, **extra):
+        """writes the columns (and extra arrays, e.g. task names) to a .npz"""
+        np.savez_compressed(
+            path,
+            task_id=self.task_id,
+            processor_id=self.processor_id,
+            start=self.start,
+            end=self.end,
+            **extra,
+        )
+
+    @classmethod
+    def from_npz(cls, path: str) -> "ScheduleTrace":
+        with np.load(path) as data:
+            return cls(
+                data["task_id"], data["processor_id"], data["start"], data["end"]
+            )
+
+    def to_csv(self, path: str):
+        table = np.empty(
+            len(self),
+            dtype=[
+                ("task_id", np.int64),
+                ("processor_id", np.int32),
+                ("start", np.float64),
+                ("end", np.float64),
+            ],
+        )
+        for column in self.COLUMNS:
+            table[column] = getattr(self, column)
+        np.savetxt(
+            path,
+            table,
+            fmt=("%d", "%d", "%.17g", "%.17g"),
+            delimiter=",",
+            header=",".join(self.COLUMNS),
+            comments="",
+        )
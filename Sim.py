@@ -3,6 +3,13 @@ import openpyxl
 import random
 from Task import Task
 from Processor import Processor
+from TaskGraph import TaskGraph, RunState
+from GraphCache import load_cached_graph, load_graph
+from ResultsStore import (
+    ResultsStore,
+    find_threshold_column,
+    prepare_sheet,
+)
 from Algorithms.Algorithm import Algorithm
 from Algorithms.Greedy import Greedy, MobileyeGreedy
 from Algorithms.GreedyHeuristics import (
@@ -11,12 +18,21 @@ from Algorithms.GreedyHeuristics import (
     MaxRuntimeFirst,
     FromCriticalPath,
     OutDegreesLast,
+    UpwardRank,
 )
-from queue import PriorityQueue
 from TimeLineIlustration import TimeLineIlustartion
-from typing import List, Tuple, Dict
-import json
+from RunStats import RunStats
+from ScheduleTrace import RunMetrics, ScheduleTrace
+from ChromeTrace import ChromeTraceWriter
+from SimEngine import Preemption, SimEngine
+from LowerBounds import MakespanBounds, optimality_gap
+from typing import List, NamedTuple, Tuple, Dict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import contextlib
+import cProfile
 import os
+import time
+import numpy as np
 
 # for writing the results to excel
 FILE_TO_INDEX = {}
@@ -27,157 +43,273 @@ class Sim:
         self.tasks: List["Task"] = []
         self.processors: List["Processor"] = []
 
+        # compiled view of the tasks and the state of the current run
+        self.graph: TaskGraph = None
+        self.state: RunState = None
+
         self.algorithm = None
 
         self.total_time = 0
         self.final_end_time = 0
 
-    def read_data(self, file_path: str):
+    def read_data(self, file_path: str, use_cache=True):
         """reads data from a json file to objects (tasks, processors) in this class
 
         Args:
             file_path (str): full path to the file to read the data from
+            use_cache (bool, optional): load the binary graph cache next to the file,
+                (re)building it when the json changed. Defaults to True.
         """
-        input_file = open(file_path)
-        data = json.load(input_file)
-
-        tasks_json = data["Tasks"]
-        processors_json: List[str] = data["Processors"]
-
-        # to connect a task name to its object, improves efficiency
-        # when adding in and out degrees
-        temp: Dict[str, Task] = {}
-
-        # create all tasks
-        for task_name in tasks_json:
-            task_info = tasks_json[task_name]
-            task = Task(
-                task_name,
-                task_info["duration"],
-                task_info["processor_type"],
-                task_info["priority"],
-                [],
-                [],
-            )
-            self.tasks.append(task)
-            temp[task_name] = task
-
-        # add in and out degrees to the tasks
-        for task_name in tasks_json:
-            # add out-degrees
-            task_info = tasks_json[task_name]
-
-            blocking = [
-                temp[task_name_blocking] for task_name_blocking in task_info["blocking"]
-            ]
-            temp[task_name].blocking = blocking
-
-            # add in-degrees
-            for task in temp[task_name].blocking:
-                task.blocked_by.append(temp[task_name])
-
-        # read processors
-        for processor_str in processors_json:
-            processor_name = processor_str.split(":")[0]
-            processor_type = int(processor_str.split(":")[1])
-            processor = Processor(processor_name, processor_type)
-
-            if processor not in self.processors:
-                self.processors.append(processor)
-
+        if file_path.endswith(".graph"):
+            # written directly by the parser, there is no json behind it
+            graph = load_graph(file_path)
+        elif use_cache:
+            graph = load_cached_graph(file_path)
+        else:
+            graph = TaskGraph.from_json(file_path)
+
+        if not self.tasks:
+            self.use_graph(graph)
+        else:
+            # more than one file, compile them as one graph
+            self.tasks.extend(graph.tasks)
+            self.processors.extend(graph.processors)
+            self.use_graph(TaskGraph.compile(self.tasks, self.processors))
+
+    def use_graph(self, graph: TaskGraph):
+        """simulates an already compiled graph (e.g. the frames FrameSim joins)"""
+        self.tasks = graph.tasks
+        self.processors = graph.processors
+        self.graph = graph
+        self.state = self.graph.new_state()
         self.timeLineIlustartor = TimeLineIlustartion(self.processors)
 
     def start(
         self,
         algorithm: Algorithm,
         illustration=False,
+        stats: RunStats = None,
+        profile_path: str = None,
+        keep_work_order=True,
+        trace_path: str = None,
+        preemption: "Preemption" = None,
+        release_times: List[float] = None,
     ):
         """starts the simulation, matches tasks for processors
 
         Args:
             algorithm (Algorithm): the algorithm to apply the order of tasks
             illustration (bool, optional): adds an illustration to the sim. Defaults to False.
+            keep_work_order (bool, optional): fill every processor's work_order. False
+                leaves the processor objects alone, for runs that only need metrics()
+                or schedule_trace(). Defaults to True.
+            trace_path (str, optional): streams the schedule there as Chrome
+                trace-event JSON (see ChromeTrace.py), a slice as every task
+                finishes. Defaults to None.
+            preemption (Preemption, optional): lets ready critical tasks take the
+                processor of the lowest priority running task of their type.
+                Defaults to None, tasks always run to the end.
+            release_times (List[float], optional): by task id, the earliest time
+                every task can start, e.g. the release of its frame (see FrameSim).
+                Defaults to None, every task can start at 0.
+            stats (RunStats, optional): filled with per-phase timers and counters of this
+                run. Defaults to None, which skips all the measuring.
+            profile_path (str, optional): runs under cProfile and dumps the pstats there.
+                Defaults to None.
 
         Returns:
             (float, int): total duration of all tasks, final end time of all tasks
         """
-        self.algorithm = algorithm
-        working_processors = []
-        idle_processors: List["Processor"] = self.processors.copy()
-
-        current_tasks: PriorityQueue[Tuple[float, Task]] = PriorityQueue()
-        ready_tasks = [task for task in self.tasks if task.is_ready()]
-
-        # for offline algorithms
-        if algorithm.offline:
-            order = algorithm.calculate()
-
-        def match_ready_tasks(current_time):
-            algorithm.update_lists(idle_processors, ready_tasks, self.tasks)
-            if algorithm.offline:
-                ready_tasks_order = algorithm.decide(order)
-            else:
-                ready_tasks_order = algorithm.decide()
-            for task in ready_tasks_order:
-                for processor in self.processors:
-                    if processor.type == task.processor_type and processor.idle:
-                        # work on the task
-                        processor.work_on_task(task)
-                        task.end_time = current_time + task.duration
-
-                        # update processor lists
-                        working_processors.append(processor)
-                        idle_processors.remove(processor)
-
-                        # update task lists
-                        current_tasks.put((task.end_time, task))
-                        ready_tasks.remove(task)
-
-                        # a task can only run on one processor
-                        break
-
-        # init - assign all the tasks you can
-        match_ready_tasks(0)
-
-        # main loop
-        while len(self.tasks) > 0:
-            # pop the first task to finish
-            current_time, done_task = current_tasks.get()
-            self.total_time += done_task.duration
-            self.final_end_time = done_task.end_time
-
-            # free the processor and update in-degrees
-            processor = done_task.processed_by
-            processor.task_finished(ready_tasks)
-
-            # add to time line
-            if illustration:
-                self.timeLineIlustartor.add_to_timeline(
-                    processor, done_task, current_time - done_task.duration
+        trace_writer = None
+        if trace_path is not None:
+            trace_writer = ChromeTraceWriter(
+                trace_path,
+                self.graph,
+                self.processors,
+                process_name=algorithm.__class__.__qualname__,
+            )
+        # the trace file is closed (and valid json) even when the run raises
+        with trace_writer or contextlib.nullcontext():
+            if profile_path is None:
+                return self._start(
+                    algorithm,
+                    illustration,
+                    stats,
+                    keep_work_order,
+                    trace_writer,
+                    preemption,
+                    release_times,
                 )
 
-            # update working/idle processors
-            working_processors.remove(processor)
-            idle_processors.append(processor)
+            profiler = cProfile.Profile()
+            try:
+                return profiler.runcall(
+                    self._start,
+                    algorithm,
+                    illustration,
+                    stats,
+                    keep_work_order,
+                    trace_writer,
+                    preemption,
+                    release_times,
+                )
+            finally:
+                profiler.dump_stats(profile_path)
+
+    def _start(
+        self,
+        algorithm: Algorithm,
+        illustration,
+        stats: RunStats,
+        keep_work_order,
+        trace_writer: ChromeTraceWriter,
+        preemption: "Preemption",
+        release_times: List[float],
+    ):
+        run_start = time.perf_counter()
+        self.algorithm = algorithm
+        self.total_time = 0
+        self.final_end_time = 0
 
-            self.tasks.remove(done_task)
+        timed = stats is not None
+        if timed:
+            stats.algorithm_name = algorithm.__class__.__qualname__
+        algorithm.stats = stats
 
-            match_ready_tasks(current_time)
+        engine = SimEngine(
+            self.graph,
+            self.state,
+            algorithm,
+            stats,
+            keep_work_order,
+            trace_writer,
+            preemption,
+            release_times,
+        )
+        self.total_time, self.final_end_time = engine.run()
+        self.state.done_count = engine.done_count
 
+        # the time line is built from the run's state, not recorded per event
+        if illustration:
+            if timed:
+                phase_start = time.perf_counter()
+            self.timeLineIlustartor = TimeLineIlustartion(self.processors)
+            self.timeLineIlustartor.set_trace(self.schedule_trace(), self.graph.names)
+            if timed:
+                stats.phase_seconds["timeline"] += time.perf_counter() - phase_start
+
+        if timed:
+            stats.total_seconds = time.perf_counter() - run_start
+            stats.final_end_time = self.final_end_time
         return self.total_time, self.final_end_time
 
-    def show_illustration(self):
-        self.timeLineIlustartor.show()
+    def schedule_trace(self) -> ScheduleTrace:
+        """the last run's schedule as columns (task, processor, start, end)"""
+        durations = self.state.durations
+        return ScheduleTrace.from_run(
+            self.state.processed_by,
+            self.state.end_time,
+            self.graph.durations if durations is None else np.asarray(durations),
+            self.state.segments,
+        )
+
+    def metrics(self) -> RunMetrics:
+        """makespan, total work and utilization of the last run"""
+        capacity = self.final_end_time * len(self.processors)
+        return RunMetrics(
+            self.final_end_time,
+            self.total_time,
+            self.total_time / capacity if capacity > 0 else 0.0,
+        )
+
+    def show_illustration(self, file_path: str = None):
+        """shows the timeline of the last run (started with illustration=True), or
+        writes it to an image (.png, .svg...) when file_path is given
+        """
+        if file_path is not None:
+            self.timeLineIlustartor.save(file_path)
+        else:
+            self.timeLineIlustartor.show()
 
     def set_critical_path(self, critical_path):
         self.timeLineIlustartor.set_critical_path(critical_path)
 
+    def lower_bounds(self) -> MakespanBounds:
+        """lower bounds on the final end time of the loaded graph, computed once
+        per graph (see TaskGraph.analytics) and shared by every run on it
+        """
+        return self.graph.analytics.bounds
+
     def __str__(self):
+        bounds = self.lower_bounds()
         return (
-            f"{self.algorithm.__class__.__qualname__} End Time: {self.final_end_time}\n"
+            f"{self.algorithm.__class__.__qualname__} End Time: {self.final_end_time}, "
+            f"Lower Bound: {bounds.combined} "
+            f"(gap {100 * bounds.gap(self.final_end_time):.1f}%)\n"
         )
 
 
+class SimResult(NamedTuple):
+    """a row of a sweep, lower_bound is the graph's combined makespan bound"""
+
+    file_path: str
+    algorithm: str
+    threshold: "str | float"
+    final_end_time: float
+    lower_bound: float
+
+    @property
+    def gap(self) -> float:
+        return optimality_gap(self.final_end_time, self.lower_bound)
+
+
+def algorithm_thresholds(
+    algorithm: type, thresholds: list["str | float"], offline=False
+) -> list["str | float"]:
+    """the thresholds an algorithm actually runs with, FromCriticalPath has none
+    and runs once, as "Offline" or "Online"
+    """
+    if algorithm.__qualname__ == "FromCriticalPath":
+        return ["Offline" if offline else "Online"]
+    return thresholds
+
+
+def run_threshold(
+    sim: Sim,
+    algorithm: type,
+    threshold: "str | float",
+    offline=False,
+    is_mobileye: bool = False,
+    is_critical: bool = False,
+    illustration=False,
+    keep_work_order=True,
+) -> Tuple[Algorithm, float]:
+    """runs one threshold on an already loaded sim, keep_work_order=False for
+    sweeps that only keep the end time (see Sim.start)
+
+    Returns:
+        (Algorithm, float): the algorithm instance, final end time
+    """
+    # the profile is loaded once, only undo the previous run's coloring
+    sim.graph.restore_tasks()
+    algorithm_instance = algorithm(
+        sim.tasks,
+        sim.processors,
+        sim.tasks,
+        offline=offline,
+        is_mobileye=is_mobileye,
+        is_critical=is_critical,
+        threshold=threshold,
+        graph=sim.graph,
+    )
+    _, total_time = sim.start(
+        algorithm_instance,
+        illustration=illustration,
+        keep_work_order=keep_work_order,
+    )
+    return algorithm_instance, total_time
+
+
 def run_sim_once(
     algorithm: Algorithm,
     file_path: str,
@@ -188,40 +320,32 @@ def run_sim_once(
     thresholds: list["str | float"] = [],
     should_write_results=False,
     output_file: str = "Results.xlsx",
+    results: ResultsStore = None,
 ):
     sim = Sim()
     sim.read_data(file_path)
 
-    if algorithm.__qualname__ == "FromCriticalPath" and len(thresholds) > 1:
-        run_sim_once(
+    for threshold in algorithm_thresholds(algorithm, thresholds, offline):
+        algorithm_instance, total_time = run_threshold(
+            sim,
             algorithm,
-            file_path,
-            illustration,
-            offline,
-            is_mobileye,
-            is_critical,
-            ["Offline" if offline else "Online"],
-            output_file,
-        )
-        return sim
-
-    for threshold in thresholds:
-        # run sim and get total time
-        algorithm_instance = algorithm(
-            sim.tasks,
-            sim.processors,
-            sim.tasks,
+            threshold,
             offline,
             is_mobileye,
             is_critical,
-            threshold,
-        )
-        _, total_time = sim.start(
-            algorithm_instance,
             illustration=illustration,
         )
-        # write to excel
-        if should_write_results:
+        # write to excel, or buffer in the results store to export later
+        if should_write_results and results is not None:
+            results.add(
+                file_path,
+                algorithm.__qualname__,
+                threshold,
+                algorithm_instance.is_mobileye,
+                total_time,
+                sim.lower_bounds().combined,
+            )
+        elif should_write_results:
             write_results(
                 output_file,
                 input_file=file_path,
@@ -232,7 +356,12 @@ def run_sim_once(
 
         if illustration:
             critical_path_instance = FromCriticalPath(
-                sim.tasks, sim.processors, sim.tasks, offline, is_mobileye
+                sim.tasks,
+                sim.processors,
+                sim.tasks,
+                offline,
+                is_mobileye,
+                graph=sim.graph,
             )
 
             critical_path = critical_path_instance.calculate()
@@ -241,15 +370,98 @@ def run_sim_once(
             sim.set_critical_path(critical_path)
             sim.show_illustration()
 
-        # init sim for the new threshold
+    return sim
+
+
+def find_thresholds(
+    algorithm: type, graphs: List[TaskGraph], recursion_depth: int = 3
+) -> list["float"]:
+    """an algorithm's thresholds over one or more loaded profiles, as if their
+    tasks were in a single list
+
+    Returns:
+        list[float]: the thresholds, empty for algorithms without thresholds
+    """
+    values = [graph.analytics.threshold_values(algorithm) for graph in graphs]
+    if not graphs or values[0] is None:
+        return []
+    return algorithm.thresholds_from_values(
+        recursion_depth, np.concatenate(values).tolist()
+    )
+
+
+def run_threshold_sweep(
+    algorithm: type,
+    file_path: str,
+    thresholds: list["str | float"] = None,
+    offline=False,
+    is_mobileye: bool = True,
+    is_critical: bool = False,
+    recursion_depth: int = 3,
+    max_workers: int = 1,
+) -> List[SimResult]:
+    """runs a list of thresholds of one algorithm on one profile, which is
+    loaded once (once per worker when running in parallel)
+
+    Args:
+        algorithm (type): the Algorithm class
+        file_path (str): the parsed profile
+        thresholds (list, optional): Defaults to all of find_thresholds(recursion_depth)
+            on this profile.
+        max_workers (int, optional): worker processes, None for the number of cores
+            and 1 to run everything in this process. Defaults to 1.
+
+    Returns:
+        List[SimResult]: a row per threshold, in the order of thresholds
+    """
+    parallel = max_workers is None or max_workers > 1
+    if thresholds is None or not parallel:
         sim = Sim()
         sim.read_data(file_path)
+    if thresholds is None:
+        # the halving repeats values, run each of them once
+        thresholds = list(
+            dict.fromkeys(find_thresholds(algorithm, [sim.graph], recursion_depth))
+        )
+    thresholds = algorithm_thresholds(algorithm, thresholds, offline)
+
+    if not parallel:
+        lower_bound = sim.lower_bounds().combined
+        return [
+            SimResult(
+                file_path,
+                algorithm.__qualname__,
+                threshold,
+                run_threshold(
+                    sim,
+                    algorithm,
+                    threshold,
+                    offline,
+                    is_mobileye,
+                    is_critical,
+                    keep_work_order=False,
+                )[1],
+                lower_bound,
+            )
+            for threshold in thresholds
+        ]
 
-    return sim
-
-    # writes the results to an excel spreadsheet
+    # one chunk per worker, so every worker parses the profile once
+    jobs: List[SimJob] = [
+        (file_path, algorithm, threshold, offline, is_mobileye, is_critical)
+        for threshold in thresholds
+    ]
+    max_workers = min(max_workers or os.cpu_count() or 1, max(1, len(jobs)))
+    chunksize = -(-len(jobs) // max_workers)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        chunks = executor.map(
+            _run_chunk,
+            [jobs[i : i + chunksize] for i in range(0, len(jobs), chunksize)],
+        )
+        return [row for chunk in chunks for row in chunk]
 
 
+# writes the results to an excel spreadsheet
 def write_results(
     output_file: str,
     input_file: str,
@@ -265,69 +477,44 @@ def write_results(
     else:
         raise Exception("init the sheet before write result (use init_sheet())")
 
-    def same_value(value1, value2):
-        if type(value1) == str and type(value2) == str:
-            return value1 == value2
-
-        if type(value1) != type(value2):
-            if type(value1) == str or type(value2) == str:
-                return False
-
-        return abs(value1 - value2) < 0.1 * value1
-
-    def find_threshold_column(threshold):
-        if not algorithm.is_mobileye:
-            return 2
-        i = 2
-        while i < 13:
-            if same_value(sheet.cell(1, i).value, threshold):
-                return i
-            i += 1
-        return -1
-
     sheet.cell(
-        row=FILE_TO_INDEX[input_file], column=find_threshold_column(threshold)
+        row=FILE_TO_INDEX[input_file],
+        column=find_threshold_column(sheet, threshold, algorithm.is_mobileye),
     ).value = runtime
     workbook.save(output_file)
     workbook.close()
 
 
+def list_profiles(folder_path: str) -> List[str]:
+    """the parsed profiles in a folder: json files, and .graph files the parser
+    wrote without a json (the other .graph files are caches of a json)
+    """
+    filenames = os.listdir(folder_path)
+    json_files = {filename for filename in filenames if filename.endswith(".json")}
+    return [
+        filename
+        for filename in filenames
+        if filename in json_files
+        or (
+            filename.endswith(".graph")
+            and filename[: -len(".graph")] + ".json" not in json_files
+        )
+    ]
+
+
 def init_dictionary():
     global FILE_TO_INDEX
-    files = os.listdir("Parser/Data/parsed")
+    files = list_profiles("Parser/Data/parsed")
     files_dict = {file.split("/")[-1]: i + 2 for i, file in enumerate(files)}
     FILE_TO_INDEX = files_dict
 
 
 def init_sheet(output_file: str, algorithm_name: str, thresholds: list["float"]):
     workbook: Workbook = openpyxl.load_workbook(output_file)
-    if "Sheet1" in workbook.sheetnames:
-        del workbook["Sheet1"]
-    sheet = None
-    if algorithm_name in workbook.sheetnames:
-        sheet = workbook[algorithm_name]
-        clear_sheet(sheet)
-    else:
-        workbook.create_sheet(algorithm_name)
-        sheet = workbook[algorithm_name]
-
-    sheet.cell(1, 2).value = "Regular"
-    for i, threshold in enumerate(thresholds):
-        sheet.cell(1, i + 3).value = threshold
-
-    for key in FILE_TO_INDEX.keys():
-        sheet.cell(FILE_TO_INDEX[key], 1).value = key
-
+    prepare_sheet(workbook, algorithm_name, thresholds, FILE_TO_INDEX)
     workbook.save(output_file)
 
 
-def clear_sheet(sheet):
-    for row in sheet.iter_rows():
-        for cell in row:
-            cell.value = None
-            cell.style = "Normal"
-
-
 def run_sim_all(
     algorithm: Algorithm,
     folder_path: str,
@@ -336,48 +523,199 @@ def run_sim_all(
     offline=False,
     is_mobileye: bool = False,
     is_critical: bool = False,
-    thresholds: list["float"] = [],
-):
-    count = 0
-    for filename in os.listdir(folder_path):
-        run_sim_once(
-            algorithm,
-            f"{folder_path}/{filename}",
-            False,
+    thresholds: Dict[str, list["str | float"]] = {},
+    should_write_results=False,
+    max_workers: int = None,
+    results_db: str = "Results.sqlite",
+) -> List[SimResult]:
+    """runs an algorithm on every profile in a folder (see run_sim_parallel)
+
+    with should_write_results the results are stored in results_db as a sweep of
+    their own and exported to output_file once, the database's earlier sweeps
+    aren't exported again
+
+    Returns:
+        List[SimResult]: the result of every job, not in job order
+    """
+    results = list(
+        run_sim_parallel(
+            [algorithm],
+            folder_path,
+            thresholds,
             offline,
             is_mobileye,
             is_critical,
-            thresholds[algorithm.__qualname__],
+            max_workers=max_workers,
+        )
+    )
+    if should_write_results:
+        with ResultsStore(results_db) as store:
+            for result in results:
+                store.add(
+                    result.file_path,
+                    result.algorithm,
+                    result.threshold,
+                    is_mobileye,
+                    result.final_end_time,
+                    result.lower_bound,
+                )
+            # one workbook load and save for the whole sweep
+            store.export_excel(output_file, thresholds, FILE_TO_INDEX)
+    return results
+
+
+# a job is (file path, algorithm class, threshold, offline, is_mobileye, is_critical)
+SimJob = Tuple[str, type, "str | float", bool, bool, bool]
+
+# the last profile a worker process loaded, jobs of a chunk are consecutive
+# thresholds/algorithms of the same file so it's parsed once per chunk
+_worker_sim: Tuple[str, "Sim"] = (None, None)
+
+
+def _load_worker_sim(file_path: str) -> "Sim":
+    global _worker_sim
+    if _worker_sim[0] != file_path:
+        sim = Sim()
+        sim.read_data(file_path)
+        _worker_sim = (file_path, sim)
+    return _worker_sim[1]
+
+
+def run_job(job: SimJob) -> SimResult:
+    """runs a single (file, algorithm, threshold) simulation"""
+    file_path, algorithm, threshold, offline, is_mobileye, is_critical = job
+    sim = _load_worker_sim(file_path)
+    _, total_time = run_threshold(
+        sim,
+        algorithm,
+        threshold,
+        offline,
+        is_mobileye,
+        is_critical,
+        keep_work_order=False,
+    )
+    return SimResult(
+        file_path,
+        algorithm.__qualname__,
+        threshold,
+        total_time,
+        sim.lower_bounds().combined,
+    )
+
+
+def _run_chunk(jobs: List[SimJob]):
+    return [run_job(job) for job in jobs]
+
+
+class ProgressReport:
+    """prints how many jobs are done and an estimate of the time left,
+    at most once every `interval` seconds
+    """
+
+    def __init__(self, total: int, interval: float = 5):
+        self.total = total
+        self.done = 0
+        self.interval = interval
+        self.start_time = time.perf_counter()
+        self.last_report = 0
+
+    def update(self, count: int = 1):
+        self.done += count
+        now = time.perf_counter()
+        if now - self.last_report < self.interval and self.done < self.total:
+            return
+        self.last_report = now
+        elapsed = now - self.start_time
+        eta = elapsed / self.done * (self.total - self.done)
+        print(
+            f"done with {self.done}/{self.total} jobs "
+            f"({100 * self.done / self.total:.1f}%), "
+            f"elapsed {elapsed:.0f}s, ETA {eta:.0f}s"
         )
-        print(f"done with {filename}")
-        count += 1
+
+
+def run_sim_parallel(
+    algorithms: List[type],
+    folder_path: str,
+    thresholds: Dict[str, list["str | float"]],
+    offline=False,
+    is_mobileye: bool = False,
+    is_critical: bool = False,
+    max_workers: int = None,
+    chunksize: int = None,
+    progress=True,
+):
+    """runs every (file, algorithm, threshold) in a folder on a process pool,
+    yields the results as soon as their chunk is done (not in job order)
+
+    Args:
+        algorithms (List[type]): the Algorithm classes to run
+        folder_path (str): folder of parsed json profiles
+        thresholds (Dict[str, list]): thresholds of every algorithm, by class name
+        max_workers (int, optional): worker processes. Defaults to the number of cores.
+        chunksize (int, optional): jobs sent to a worker at once. Defaults to about
+            four chunks per worker.
+        progress (bool, optional): print progress and ETA. Defaults to True.
+
+    Yields:
+        SimResult: the result of every job
+    """
+    jobs: List[SimJob] = []
+    for filename in sorted(list_profiles(folder_path)):
+        for algorithm in algorithms:
+            for threshold in algorithm_thresholds(
+                algorithm, thresholds[algorithm.__qualname__], offline
+            ):
+                jobs.append(
+                    (
+                        f"{folder_path}/{filename}",
+                        algorithm,
+                        threshold,
+                        offline,
+                        is_mobileye,
+                        is_critical,
+                    )
+                )
+    if not jobs:
+        return
+
+    max_workers = max_workers or os.cpu_count() or 1
+    if chunksize is None:
+        chunksize = max(1, -(-len(jobs) // (max_workers * 4)))
+    chunks = [jobs[i : i + chunksize] for i in range(0, len(jobs), chunksize)]
+
+    report = ProgressReport(len(jobs)) if progress else None
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_run_chunk, chunk) for chunk in chunks]
+        for future in as_completed(futures):
+            results = future.result()
+            if report:
+                report.update(len(results))
+            yield from results
 
 
 def init_sheets_and_thresholds(output_file, num_rand_files=5):
-    sim = Sim()
     random_files = random.sample(
         [
             "Parser/Data/parsed/" + file_name
-            for file_name in os.listdir("Parser/Data/parsed")
+            for file_name in list_profiles("Parser/Data/parsed")
         ],
         num_rand_files,
     )
+    # every sample is loaded once (through its binary cache), the thresholds only
+    # need the graphs' columns
+    graphs = []
     for random_file in random_files:
+        sim = Sim()
         sim.read_data(random_file)
+        graphs.append(sim.graph)
     init_dictionary()
-    algorithms: list[Algorithm] = [
-        MinRuntimeFirst(
-            sim.tasks, sim.processors, sim.tasks, offline=False, is_mobileye=True
-        ),
-        MaxRuntimeFirst(
-            sim.tasks, sim.processors, sim.tasks, offline=False, is_mobileye=True
-        ),
-        OutDegreesFirst(
-            sim.tasks, sim.processors, sim.tasks, offline=False, is_mobileye=True
-        ),
-        OutDegreesLast(
-            sim.tasks, sim.processors, sim.tasks, offline=False, is_mobileye=True
-        ),
+    algorithms: list[type] = [
+        MinRuntimeFirst,
+        MaxRuntimeFirst,
+        OutDegreesFirst,
+        OutDegreesLast,
+        UpwardRank,
     ]
 
     thresholds = {}
@@ -389,10 +727,8 @@ def init_sheets_and_thresholds(output_file, num_rand_files=5):
 
     # yes mobileye
     for algo in algorithms:
-        thresholds[algo.__class__.__name__] = algo.find_thresholds(3)
-        init_sheet(
-            output_file, algo.__class__.__name__, thresholds[algo.__class__.__name__]
-        )
+        thresholds[algo.__qualname__] = find_thresholds(algo, graphs, 3)
+        init_sheet(output_file, algo.__qualname__, thresholds[algo.__qualname__])
 
     return thresholds
 
@@ -410,7 +746,7 @@ def main():
         offline=False,
         is_mobileye=False,
         is_critical=False,
-        thresholds={"Greedy": ["Regular"]},
+        thresholds=["Regular"],
     )
 
 
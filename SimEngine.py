@@ -0,0 +1,743 @@
+"""the event loop behind Sim.start
+
+a run is a SimEngine: the idle processors, the heap of (end time, task) of the
+running tasks and the heap of (time, task id) of the pending tasks, the ones that
+wait for their inputs or their release. every step of the loop is a method that the variants of the simulation
+override instead of copying the loop:
+
+    add_sources()          the tasks that are ready at time 0
+    add_ready(task)        a task can start, it goes to the ready queue
+    match(time)            the ready queue starts tasks on idle processors, then
+                           the preemptor lets critical tasks take busy ones
+    task_finished(...)     a task ended, its successors may get ready
+    release(task_id, time) a pending task's inputs arrived or it was released
+
+which ready task starts first is the ready queue's: DecideQueue asks the algorithm's
+decide() on every match, KeyQueue keeps heaps by the algorithm's static key (see
+Algorithm.static_key) and EligibleKeyQueue does the same for tasks that can run on
+more than one type (see TaskGraph.heterogeneous). Preemptor lets ready critical
+tasks take the processor of a running task (see Preemption)
+"""
+
+from abc import abstractmethod
+from collections import deque
+from typing import Any, Deque, Dict, List, NamedTuple, Set, Tuple, TYPE_CHECKING
+import abc
+import heapq
+import time
+
+from Task import Task
+
+if TYPE_CHECKING:
+    from Processor import Processor
+    from TaskGraph import TaskGraph, RunState
+    from ChromeTrace import ChromeTraceWriter
+    from RunStats import RunStats
+    from Algorithms.Algorithm import Algorithm
+
+
+class Preemption(NamedTuple):
+    """how Sim.start preempts: a critical task (see Task.TASK_PRIORITY_CRITICAL)
+    that gets ready while every processor of its type is busy takes the processor
+    of the lowest priority running task that isn't critical, the one that would end
+    last among equals. the preempted task is ready again with the rest of its work
+    ("suspend") or all of it ("restart"), the critical task starts after
+    context_switch
+    """
+
+    MODES = ("suspend", "restart")
+
+    mode: str = "suspend"
+    context_switch: float = 0.0
+
+
+class ReadyQueue(metaclass=abc.ABCMeta):
+    """the ready tasks of a run and the order they start in"""
+
+    def __init__(self, engine: "SimEngine"):
+        self.engine = engine
+
+    @abstractmethod
+    def add(self, task: Task):
+        pass
+
+    @abstractmethod
+    def match(self, current_time):
+        """starts ready tasks on the idle processors and pushes their ends"""
+        pass
+
+    def drop_started(self):
+        """forgets the ready tasks that started outside of match() (a preemption)"""
+        pass
+
+
+class DecideQueue(ReadyQueue):
+    """the whole ready list, ordered by the algorithm's decide() on every match"""
+
+    def __init__(self, engine: "SimEngine", order: List[Task]):
+        super().__init__(engine)
+        self.order = order
+        self.ready_tasks: List[Task] = []
+
+    def add(self, task: Task):
+        self.ready_tasks.append(task)
+
+    def match(self, current_time):
+        engine = self.engine
+        algorithm = engine.algorithm
+        ready_tasks = self.ready_tasks
+        stats = engine.stats
+        timed = stats is not None
+        if timed:
+            phase_seconds = stats.phase_seconds
+            counters = stats.counters
+            phase_start = time.perf_counter()
+            counters["decide_calls"] += 1
+            counters["ready_tasks_seen"] += len(ready_tasks)
+            if len(ready_tasks) > counters["max_ready_tasks"]:
+                counters["max_ready_tasks"] = len(ready_tasks)
+
+        algorithm.update_lists(engine.processors, ready_tasks, engine.tasks)
+        if algorithm.offline:
+            ready_tasks_order = algorithm.decide(self.order)
+        else:
+            ready_tasks_order = algorithm.decide()
+
+        if timed:
+            match_start = time.perf_counter()
+            phase_seconds["decide"] += match_start - phase_start
+            queue_seconds = 0.0
+
+        events = engine.events
+        end_time = engine.end_time
+        heterogeneous = engine.heterogeneous
+        idle_processors = engine.idle_processors
+        matched = False
+        for task in ready_tasks_order:
+            if engine.idle_count == 0:
+                break
+            if timed:
+                counters["matches_attempted"] += 1
+            if heterogeneous:
+                idle, duration = engine.fastest_idle(task.id)
+                if idle is None:
+                    continue
+                engine.start_on(task, heapq.heappop(idle)[1], current_time, duration)
+            else:
+                idle = idle_processors.get(task.processor_type)
+                if not idle:
+                    continue
+                engine.start(task, heapq.heappop(idle), current_time)
+            if timed:
+                counters["matches_made"] += 1
+                queue_start = time.perf_counter()
+                heapq.heappush(events, (end_time[task.id], task))
+                queue_seconds += time.perf_counter() - queue_start
+            else:
+                heapq.heappush(events, (end_time[task.id], task))
+            matched = True
+
+        if matched:
+            self.drop_started()
+
+        if timed:
+            phase_seconds["queue"] += queue_seconds
+            phase_seconds["match"] += time.perf_counter() - match_start - queue_seconds
+
+    def drop_started(self):
+        # in one pass, keeping the order of the rest
+        processed_by = self.engine.processed_by
+        self.ready_tasks[:] = [
+            task for task in self.ready_tasks if processed_by[task.id] == -1
+        ]
+
+
+class KeyQueue(ReadyQueue):
+    """the ready tasks of every processor type, as heaps of (key, order of becoming
+    ready, task)
+    """
+
+    def __init__(self, engine: "SimEngine", key):
+        super().__init__(engine)
+        self.key = key
+        self.ready_heaps: Dict[int, List[Tuple[Any, int, Task]]] = {}
+        self.ready_count = 0
+        self.stats = engine.stats
+
+    def add(self, task: Task):
+        stats = self.stats
+        if stats is not None:
+            phase_start = time.perf_counter()
+        heapq.heappush(
+            self.ready_heaps.setdefault(task.processor_type, []),
+            (self.key(task), self.ready_count, task),
+        )
+        self.ready_count += 1
+        if stats is not None:
+            stats.phase_seconds["decide"] += time.perf_counter() - phase_start
+
+    def match(self, current_time):
+        engine = self.engine
+        stats = self.stats
+        if stats is not None:
+            phase_start = time.perf_counter()
+        preemptive = engine.preemptor is not None
+        if preemptive:
+            preempted_in = engine.preemptor.preempted_in
+        ready_heaps = self.ready_heaps
+        heappop = heapq.heappop
+        matched = []
+        for processor_type, idle in engine.idle_processors.items():
+            ready = ready_heaps.get(processor_type)
+            while idle and ready:
+                entry = heappop(ready)
+                if preemptive and entry[2].id in preempted_in:
+                    # a critical task that already preempted its way in
+                    preempted_in.remove(entry[2].id)
+                    continue
+                engine.start(entry[2], heappop(idle), current_time)
+                matched.append(entry)
+        # start them in the order decide() would have listed them
+        matched.sort()
+        if stats is not None:
+            queue_start = time.perf_counter()
+            stats.phase_seconds["match"] += queue_start - phase_start
+            stats.counters["matches_attempted"] += len(matched)
+            stats.counters["matches_made"] += len(matched)
+        events = engine.events
+        end_time = engine.end_time
+        for _, _, task in matched:
+            heapq.heappush(events, (end_time[task.id], task))
+        if stats is not None:
+            stats.phase_seconds["queue"] += time.perf_counter() - queue_start
+
+
+class EligibleKeyQueue(ReadyQueue):
+    """the ready tasks of every set of types they can run on, as heaps of (key,
+    order of becoming ready, task)
+    """
+
+    def __init__(self, engine: "SimEngine", key):
+        super().__init__(engine)
+        self.key = key
+        self.ready_heaps: Dict[Tuple[int, ...], List[Tuple[Any, int, Task]]] = {}
+        self.ready_count = 0
+        self.stats = engine.stats
+
+    def add(self, task: Task):
+        stats = self.stats
+        if stats is not None:
+            phase_start = time.perf_counter()
+        eligible_types = tuple(
+            processor_type for processor_type, _ in self.engine.eligible[task.id]
+        )
+        heapq.heappush(
+            self.ready_heaps.setdefault(eligible_types, []),
+            (self.key(task), self.ready_count, task),
+        )
+        self.ready_count += 1
+        if stats is not None:
+            stats.phase_seconds["decide"] += time.perf_counter() - phase_start
+
+    def match(self, current_time):
+        engine = self.engine
+        stats = self.stats
+        if stats is not None:
+            phase_start = time.perf_counter()
+        idle_processors = engine.idle_processors
+        matched = []
+        while engine.idle_count:
+            # the smallest key of the tasks that have an idle processor
+            best_ready = None
+            for eligible_types, ready in self.ready_heaps.items():
+                if not ready or (best_ready is not None and best_ready[0] < ready[0]):
+                    continue
+                for processor_type in eligible_types:
+                    if idle_processors.get(processor_type):
+                        best_ready = ready
+                        break
+            if best_ready is None:
+                break
+            entry = heapq.heappop(best_ready)
+            task = entry[2]
+            idle, duration = engine.fastest_idle(task.id)
+            engine.start_on(task, heapq.heappop(idle)[1], current_time, duration)
+            matched.append(entry)
+        # start them in the order decide() would have listed them
+        matched.sort()
+        if stats is not None:
+            queue_start = time.perf_counter()
+            stats.phase_seconds["match"] += queue_start - phase_start
+            stats.counters["matches_attempted"] += len(matched)
+            stats.counters["matches_made"] += len(matched)
+        events = engine.events
+        end_time = engine.end_time
+        for _, _, task in matched:
+            heapq.heappush(events, (end_time[task.id], task))
+        if stats is not None:
+            stats.phase_seconds["queue"] += time.perf_counter() - queue_start
+
+
+class Preemptor:
+    """lets ready critical tasks take the processors of running tasks that aren't
+    critical (see Preemption)
+
+    the running tasks of every type are a heap of (-priority, -end time, processor,
+    task id), the lowest priority task that ends last on top. entries of tasks that
+    ended or were preempted since are dropped when they reach the top
+    """
+
+    def __init__(self, engine: "SimEngine", preemption: Preemption):
+        if preemption.mode not in Preemption.MODES:
+            raise ValueError(
+                f"unknown preemption mode {preemption.mode}, "
+                f"use one of {Preemption.MODES}"
+            )
+        self.engine = engine
+        self.suspend = preemption.mode == "suspend"
+        self.context_switch = preemption.context_switch
+        self.running_heaps: Dict[int, List[Tuple[int, float, int, int]]] = {
+            processor_type: [] for processor_type in engine.idle_processors
+        }
+        self.type_sizes = {
+            processor_type: len(idle)
+            for processor_type, idle in engine.idle_processors.items()
+        }
+        # task id -> (processor, end time) of every running task
+        self.running: Dict[int, Tuple[int, float]] = {}
+        # task id -> end times of its preempted runs, still in the events heap
+        self.stale_ends: Dict[int, List[float]] = {}
+        # critical tasks that got ready, by type, in the order they did, and the
+        # ids of the ones that didn't start yet
+        self.waiting: Dict[int, Deque[Task]] = {}
+        self.unstarted: Set[int] = set()
+        # ids of the critical tasks that started by preempting, their entries are
+        # still in the ready queue
+        self.preempted_in: Set[int] = set()
+
+    def is_running(self, entry) -> bool:
+        _, end, processor_id, task_id = entry
+        return self.running.get(task_id) == (processor_id, -end)
+
+    def ready(self, task: Task):
+        if task.priority == Task.TASK_PRIORITY_CRITICAL:
+            self.waiting.setdefault(task.processor_type, deque()).append(task)
+            self.unstarted.add(task.id)
+
+    def started(self, task: Task, processor_id: int):
+        engine = self.engine
+        task_id = task.id
+        engine.run_durations[task_id] = engine.work[task_id]
+        end = engine.end_time[task_id]
+        self.running[task_id] = (processor_id, end)
+        self.unstarted.discard(task_id)
+        heap = self.running_heaps[task.processor_type]
+        heapq.heappush(heap, (-task.priority, -end, processor_id, task_id))
+        if len(heap) > 2 * self.type_sizes[task.processor_type] + 8:
+            # mostly stale, keep it O(processors)
+            heap[:] = [entry for entry in heap if self.is_running(entry)]
+            heapq.heapify(heap)
+
+    def ends_run(self, task_id: int, current_time) -> bool:
+        """
+        Returns:
+            bool: whether an end event is the end of the task's run, False for the
+            ends of the runs it was preempted in
+        """
+        stale = self.stale_ends.get(task_id)
+        if stale is not None and current_time in stale:
+            stale.remove(current_time)
+            if not stale:
+                del self.stale_ends[task_id]
+            return False
+        del self.running[task_id]
+        return True
+
+    def preempt(self, current_time):
+        """after match(): critical tasks still waiting have no idle processor of
+        their type
+        """
+        engine = self.engine
+        end_time = engine.end_time
+        processed_by = engine.processed_by
+        preempted = False
+        for processor_type, waiting in self.waiting.items():
+            heap = self.running_heaps.get(processor_type)
+            while waiting and heap is not None:
+                task = waiting[0]
+                if task.id not in self.unstarted:
+                    waiting.popleft()
+                    continue
+                while heap and not self.is_running(heap[0]):
+                    heapq.heappop(heap)
+                if not heap or -heap[0][0] <= Task.TASK_PRIORITY_CRITICAL:
+                    break
+                _, _, processor_id, victim_id = heapq.heappop(heap)
+                waiting.popleft()
+
+                # the victim's segment ends now, it's ready again with the rest of
+                # its work (or all of it)
+                segment_start = end_time[victim_id] - engine.run_durations[victim_id]
+                engine.segments.append(
+                    (victim_id, processor_id, segment_start, current_time)
+                )
+                engine.total_time += current_time - segment_start
+                if engine.trace_writer is not None:
+                    engine.trace_writer.add_slice(
+                        victim_id, processor_id, segment_start, current_time
+                    )
+                if self.suspend:
+                    engine.work[victim_id] = end_time[victim_id] - current_time
+                self.stale_ends.setdefault(victim_id, []).append(end_time[victim_id])
+                del self.running[victim_id]
+                processed_by[victim_id] = -1
+                end_time[victim_id] = float("inf")
+                engine.idle_count += 1
+                if engine.keep_work_order:
+                    engine.processors[processor_id].task_finished()
+
+                engine.start(task, processor_id, current_time + self.context_switch)
+                heapq.heappush(engine.events, (end_time[task.id], task))
+                self.preempted_in.add(task.id)
+                engine.add_ready(engine.tasks[victim_id])
+                preempted = True
+                if engine.stats is not None:
+                    engine.stats.count("preemptions")
+
+        if preempted:
+            engine.queue.drop_started()
+
+
+class SimEngine:
+    def __init__(
+        self,
+        graph: "TaskGraph",
+        state: "RunState",
+        algorithm: "Algorithm",
+        stats: "RunStats" = None,
+        keep_work_order=True,
+        trace_writer: "ChromeTraceWriter" = None,
+        preemption: Preemption = None,
+        release_times: List[float] = None,
+    ):
+        """a run of the graph, resets the state
+
+        Args:
+            graph (TaskGraph): the compiled graph, its tasks and processors
+            state (RunState): filled with the schedule
+            algorithm (Algorithm): orders the ready tasks
+            stats (RunStats, optional): see Sim.start. Defaults to None.
+            keep_work_order (bool, optional): see Sim.start. Defaults to True.
+            trace_writer (ChromeTraceWriter, optional): gets a slice for every run
+                that ends. Defaults to None.
+            preemption (Preemption, optional): see Sim.start. Defaults to None.
+            release_times (List[float], optional): see Sim.start. Defaults to None.
+        """
+        self.graph = graph
+        self.state = state
+        state.reset()
+        self.tasks = graph.tasks
+        self.end_time = state.end_time
+        self.processed_by = state.processed_by
+        self.remaining_in_degree = state.remaining_in_degree
+        self.succ_offsets = graph.succ_offsets_list
+        self.succ_ids = graph.succ_ids_list
+
+        # edges with transfer costs (see TaskGraph.succ_costs) and release times:
+        # a task whose predecessors all ended waits in pending until its inputs
+        # arrive and it's released
+        self.succ_costs = graph.succ_costs_list
+        self.data_ready: List[float] = None
+        if release_times is not None:
+            self.data_ready = list(release_times)
+        elif self.succ_costs is not None:
+            self.data_ready = [0.0] * len(graph)
+
+        # how long every task runs: its duration, on heterogeneous graphs its
+        # duration on the processor it got, with preemption what it has left
+        durations = graph.durations_list
+        self.work = self.run_durations = durations
+        heterogeneous = graph.heterogeneous
+        self.eligible: List[List[Tuple[int, float]]] = None
+        if heterogeneous:
+            self.run_durations = state.durations = [0.0] * len(graph)
+            self.eligible = graph.eligibility_lists()
+        self.segments: List[Tuple[int, int, float, float]] = None
+        if preemption is not None:
+            self.work = durations.copy()
+            self.run_durations = state.durations = durations.copy()
+            self.segments = state.segments = []
+
+        self._setup(
+            graph.processors,
+            algorithm,
+            stats,
+            keep_work_order,
+            trace_writer,
+            preemption,
+            heterogeneous,
+        )
+
+    def _setup(
+        self,
+        processors: List["Processor"],
+        algorithm: "Algorithm",
+        stats: "RunStats",
+        keep_work_order,
+        trace_writer: "ChromeTraceWriter",
+        preemption: Preemption,
+        heterogeneous: bool,
+    ):
+        """the processors, the heaps and the ready queue, set up the same way for
+        every kind of run
+        """
+        self.processors = processors
+        self.algorithm = algorithm
+        self.stats = stats
+        self.keep_work_order = keep_work_order
+        self.trace_writer = trace_writer
+        self.heterogeneous = heterogeneous
+        self.total_time = 0
+        self.final_end_time = 0
+        self.done_count = 0
+
+        # idle processors of every type, kept as heaps of indices into processors
+        # so the first idle processor (in list order) is picked. with speeds they
+        # are heaps of (-speed, index), fastest first, and every task starts on the
+        # idle processor it finishes first on
+        self.processor_types = [processor.type for processor in processors]
+        self.speeds = [processor.speed for processor in processors]
+        self.idle_processors: Dict[int, list] = {}
+        for i, processor in enumerate(processors):
+            processor.reset()
+            self.idle_processors.setdefault(processor.type, []).append(
+                (-processor.speed, i) if heterogeneous else i
+            )
+        if heterogeneous:
+            for idle in self.idle_processors.values():
+                heapq.heapify(idle)
+        self.idle_count = len(processors)
+
+        # (end time, task) of the running tasks and (time, task id) of the pending
+        # tasks
+        self.events: List[Tuple[float, Task]] = []
+        self.pending: List[Tuple[float, int]] = []
+
+        self.preemptor: Preemptor = None
+        if preemption is not None:
+            if heterogeneous:
+                raise ValueError("preemption needs a homogeneous graph")
+            self.preemptor = Preemptor(self, preemption)
+
+        if stats is not None:
+            phase_start = time.perf_counter()
+        order = algorithm.calculate() if algorithm.offline else None
+        key = algorithm.static_key(order)
+        if stats is not None:
+            stats.phase_seconds["calculate"] += time.perf_counter() - phase_start
+        if key is None:
+            self.queue: ReadyQueue = DecideQueue(self, order)
+        elif heterogeneous:
+            self.queue = EligibleKeyQueue(self, key)
+        else:
+            self.queue = KeyQueue(self, key)
+
+    def add_sources(self):
+        remaining_in_degree = self.remaining_in_degree
+        data_ready = self.data_ready
+        for task in self.tasks:
+            if remaining_in_degree[task.id] == 0:
+                if data_ready is not None and data_ready[task.id] > 0:
+                    heapq.heappush(self.pending, (data_ready[task.id], task.id))
+                else:
+                    self.add_ready(task)
+
+    def add_ready(self, task: Task):
+        self.queue.add(task)
+        if self.preemptor is not None:
+            self.preemptor.ready(task)
+
+    def match(self, current_time):
+        self.queue.match(current_time)
+        if self.preemptor is not None:
+            self.preemptor.preempt(current_time)
+
+    def release(self, task_id: int, current_time):
+        """a pending task's inputs arrived and it was released"""
+        self.add_ready(self.tasks[task_id])
+
+    def start(self, task: Task, processor_id: int, current_time):
+        """runs a task on an idle processor of its type, the caller pushes its end"""
+        self.idle_count -= 1
+        if self.keep_work_order:
+            self.processors[processor_id].work_on_task(task)
+        task_id = task.id
+        self.processed_by[task_id] = processor_id
+        self.end_time[task_id] = current_time + self.work[task_id]
+        if self.preemptor is not None:
+            self.preemptor.started(task, processor_id)
+
+    def start_on(self, task: Task, processor_id: int, current_time, duration):
+        """start() on heterogeneous graphs, for the task's duration there"""
+        self.idle_count -= 1
+        if self.keep_work_order:
+            self.processors[processor_id].work_on_task(task)
+        task_id = task.id
+        self.processed_by[task_id] = processor_id
+        self.run_durations[task_id] = duration
+        self.end_time[task_id] = current_time + duration
+
+    def fastest_idle(self, task_id: int):
+        """
+        Returns:
+            (List[Tuple[float, int]], float): the idle heap of the type the task
+            finishes first on and its duration there, None if every processor it
+            can run on is busy
+        """
+        idle_processors = self.idle_processors
+        best_idle = None
+        best_duration = 0.0
+        for processor_type, duration in self.eligible[task_id]:
+            idle = idle_processors.get(processor_type)
+            if idle:
+                duration = duration / -idle[0][0]
+                if best_idle is None or duration < best_duration:
+                    best_idle = idle
+                    best_duration = duration
+        return best_idle, best_duration
+
+    def task_finished(self, task: Task, processor_id: int, current_time):
+        """updates the successors' in-degrees, the ones whose predecessors all
+        ended are ready (or pending until their inputs arrive)
+        """
+        task_id = task.id
+        tasks = self.tasks
+        succ_ids = self.succ_ids
+        remaining_in_degree = self.remaining_in_degree
+        add_ready = self.add_ready
+        edges = range(self.succ_offsets[task_id], self.succ_offsets[task_id + 1])
+        if self.data_ready is None:
+            for i in edges:
+                successor = succ_ids[i]
+                remaining_in_degree[successor] -= 1
+                if remaining_in_degree[successor] == 0:
+                    add_ready(tasks[successor])
+            return
+
+        succ_costs = self.succ_costs
+        data_ready = self.data_ready
+        for i in edges:
+            successor = succ_ids[i]
+            if succ_costs is not None:
+                arrival = current_time + succ_costs[i]
+                if data_ready[successor] < arrival:
+                    data_ready[successor] = arrival
+            remaining_in_degree[successor] -= 1
+            if remaining_in_degree[successor] == 0:
+                if data_ready[successor] <= current_time:
+                    add_ready(tasks[successor])
+                else:
+                    heapq.heappush(self.pending, (data_ready[successor], successor))
+
+    def unfinished(self) -> int:
+        return len(self.tasks) - self.done_count
+
+    def run(self) -> Tuple[float, float]:
+        """
+        Raises:
+            ValueError: if some tasks never ran, they are on a cycle or no
+                processor can run them
+
+        Returns:
+            (float, float): total duration of all tasks, final end time of all tasks
+        """
+        # init - assign all the tasks you can
+        self.add_sources()
+        self.match(0)
+        return self.resume()
+
+    def resume(self) -> Tuple[float, float]:
+        """run() from the current heaps, e.g. ones restored from a checkpoint"""
+        stats = self.stats
+        timed = stats is not None
+        if timed:
+            perf_counter = time.perf_counter
+            phase_seconds = stats.phase_seconds
+            counters = stats.counters
+        events = self.events
+        pending = self.pending
+        processed_by = self.processed_by
+        run_durations = self.run_durations
+        processors = self.processors
+        processor_types = self.processor_types
+        idle_processors = self.idle_processors
+        speeds = self.speeds
+        heterogeneous = self.heterogeneous
+        keep_work_order = self.keep_work_order
+        trace_writer = self.trace_writer
+        preemptor = self.preemptor
+        task_finished = self.task_finished
+        match = self.match
+        release = self.release
+        heappush = heapq.heappush
+        heappop = heapq.heappop
+
+        while events or pending:
+            if pending and (not events or pending[0][0] <= events[0][0]):
+                # inputs arrive and tasks are released, before tasks that end at
+                # the same time
+                current_time = pending[0][0]
+                while pending and pending[0][0] == current_time:
+                    release(heappop(pending)[1], current_time)
+                match(current_time)
+                continue
+
+            # pop the first task to finish
+            if timed:
+                phase_start = perf_counter()
+                counters["events"] += 1
+            current_time, task = heappop(events)
+            if timed:
+                finished_start = perf_counter()
+                phase_seconds["queue"] += finished_start - phase_start
+            task_id = task.id
+            if preemptor is not None and not preemptor.ends_run(task_id, current_time):
+                # the end of a run that was preempted
+                continue
+            self.total_time += run_durations[task_id]
+            self.final_end_time = current_time
+
+            processor_id = processed_by[task_id]
+            if keep_work_order:
+                processors[processor_id].task_finished()
+            if trace_writer is not None:
+                trace_writer.add_slice(
+                    task_id,
+                    processor_id,
+                    current_time - run_durations[task_id],
+                    current_time,
+                )
+            task_finished(task, processor_id, current_time)
+
+            # free the processor
+            if heterogeneous:
+                heappush(
+                    idle_processors[processor_types[processor_id]],
+                    (-speeds[processor_id], processor_id),
+                )
+            else:
+                heappush(idle_processors[processor_types[processor_id]], processor_id)
+            self.idle_count += 1
+            self.done_count += 1
+            if timed:
+                phase_seconds["task_finished"] += perf_counter() - finished_start
+
+            match(current_time)
+
+        unfinished = self.unfinished()
+        if unfinished:
+            raise ValueError(
+                f"{unfinished} tasks never ran, they are on a cycle or no processor "
+                "can run them"
+            )
+        return self.total_time, self.final_end_time
@@ -0,0 +1,310 @@
+"""simulation of tasks that arrive while the simulation runs
+
+Sim.start needs the whole graph at time 0. here tasks come from an arrival source,
+any iterator of Arrival records ordered by release time (a generator, a file read a
+frame at a time...). the stream runs on Sim's engine (see StreamEngine), the next
+arrival is its one pending entry, so arrivals and finishing tasks are handled in time
+order, arrivals first. a task object
+is created when it arrives and dropped when it finishes, the simulator only keeps
+the tasks that arrived and didn't finish and the in-degrees of their successors, so
+memory follows the active window instead of the whole trace.
+
+a task must arrive no later than its successors, tasks arriving at the same time can
+come in any order. since successors may not have arrived yet, a streamed task's
+`blocking` holds their names
+"""
+
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Tuple
+import heapq
+import time
+
+from Task import Task
+from Processor import Processor
+from TaskGraph import TaskGraph
+from GraphCache import load_cached_graph
+from CriticalPath import topological_levels
+from RunStats import RunStats
+from SimEngine import Preemption, SimEngine
+from Algorithms.Algorithm import Algorithm
+
+
+class Arrival(NamedTuple):
+    release_time: float
+    name: str
+    duration: float
+    processor_type: int
+    priority: int
+    # names of the tasks this one blocks
+    blocking: List[str]
+
+
+def arrivals_from_graph(
+    graph: TaskGraph, release_time: float = 0, prefix: str = ""
+) -> Iterator[Arrival]:
+    """streams a loaded graph, all of it released at release_time, in task id order"""
+    names = graph.names
+    durations = graph.durations_list
+    types = graph.types_list
+    priorities = graph.priorities.tolist()
+    succ_offsets = graph.succ_offsets_list
+    succ_ids = graph.succ_ids_list
+    for task_id, name in enumerate(names):
+        yield Arrival(
+            release_time,
+            prefix + name,
+            durations[task_id],
+            types[task_id],
+            priorities[task_id],
+            [
+                prefix + names[successor]
+                for successor in succ_ids[
+                    succ_offsets[task_id] : succ_offsets[task_id + 1]
+                ]
+            ],
+        )
+
+
+def arrivals_from_frames(
+    frame_paths: Iterable[str], frame_period: float
+) -> Iterator[Arrival]:
+    """streams parsed profiles as frames (see FrameSim), frame k released at
+    k * frame_period with its tasks named "k:<task>". a frame is loaded when the
+    simulation reaches its release
+    """
+    for frame, path in enumerate(frame_paths):
+        yield from arrivals_from_graph(
+            load_cached_graph(path), frame * frame_period, f"{frame}:"
+        )
+
+
+def arrivals_by_level(
+    graph: TaskGraph, level_period: float, prefix: str = ""
+) -> Iterator[Arrival]:
+    """streams a graph a topological level at a time, level k released at
+    k * level_period, e.g. to test the simulator with sub-DAGs that keep arriving
+    """
+    names = graph.names
+    durations = graph.durations_list
+    types = graph.types_list
+    priorities = graph.priorities.tolist()
+    succ_offsets = graph.succ_offsets_list
+    succ_ids = graph.succ_ids_list
+    for level, task_ids in enumerate(topological_levels(graph)):
+        for task_id in task_ids:
+            yield Arrival(
+                level * level_period,
+                prefix + names[task_id],
+                durations[task_id],
+                types[task_id],
+                priorities[task_id],
+                [
+                    prefix + names[successor]
+                    for successor in succ_ids[
+                        succ_offsets[task_id] : succ_offsets[task_id + 1]
+                    ]
+                ],
+            )
+
+
+class StreamEngine(SimEngine):
+    """SimEngine over an arrival source: the next arrival is the only pending
+    entry, and every per-task list of the graph run is a dict by task id that only
+    holds the tasks of the active window
+    """
+
+    def __init__(
+        self,
+        processors: List[Processor],
+        algorithm: Algorithm,
+        arrivals: Iterable[Arrival],
+        on_finish: Callable[[Task, int], None] = None,
+        stats: RunStats = None,
+        preemption: Preemption = None,
+    ):
+        heterogeneous = any(processor.speed != 1 for processor in processors)
+        # the active window: tasks that arrived and didn't finish, by id and by
+        # name, and how many unfinished predecessors every task (arrived or not)
+        # still waits for
+        self.tasks: Dict[int, Task] = {}
+        self.window: Dict[str, Task] = {}
+        self.waiting_for: Dict[str, int] = {}
+        self.processed_by: Dict[int, int] = {}
+        self.end_time: Dict[int, float] = {}
+        self.work: Dict[int, float] = {}
+        self.run_durations = self.work
+        self.eligible: Dict[int, List[Tuple[int, float]]] = None
+        if heterogeneous:
+            self.eligible = {}
+        if heterogeneous or preemption is not None:
+            self.run_durations = {}
+        self.segments: List[Tuple[int, int, float, float]] = None
+        if preemption is not None:
+            self.segments = []
+
+        self.source = iter(arrivals)
+        self.next_arrival: Arrival = None
+        self.arrived_count = 0
+        # the most tasks that had arrived and not finished at once
+        self.peak_window = 0
+        self.on_finish = on_finish
+        self._setup(
+            processors, algorithm, stats, False, None, preemption, heterogeneous
+        )
+
+    def add_sources(self):
+        self.next_arrival = next(self.source, None)
+        if self.next_arrival is not None:
+            # the next arrival is the only pending entry, with no task id
+            heapq.heappush(self.pending, (self.next_arrival.release_time, -1))
+
+    def release(self, task_id: int, current_time):
+        """every arrival released by now arrives, their successor counts first so
+        tasks arriving together can come in any order
+        """
+        batch: List[Task] = []
+        arrival = self.next_arrival
+        while arrival is not None and arrival.release_time <= current_time:
+            if arrival.release_time < current_time:
+                raise ValueError(
+                    f"{arrival.name} is released at {arrival.release_time}, "
+                    f"after the arrivals of {current_time}"
+                )
+            task = Task(
+                arrival.name,
+                arrival.duration,
+                arrival.processor_type,
+                arrival.priority,
+                arrival.blocking,
+                [],
+                release_time=arrival.release_time,
+            )
+            # the order of arrival
+            task.id = self.arrived_count
+            self.arrived_count += 1
+            self.tasks[task.id] = task
+            self.window[task.name] = task
+            self.processed_by[task.id] = -1
+            self.work[task.id] = arrival.duration
+            if self.run_durations is not self.work:
+                self.run_durations[task.id] = arrival.duration
+            if self.eligible is not None:
+                self.eligible[task.id] = [(arrival.processor_type, arrival.duration)]
+            for successor in arrival.blocking:
+                self.waiting_for[successor] = self.waiting_for.get(successor, 0) + 1
+            batch.append(task)
+            arrival = next(self.source, None)
+        self.next_arrival = arrival
+        if arrival is not None:
+            heapq.heappush(self.pending, (arrival.release_time, -1))
+
+        for task in batch:
+            if task.name not in self.waiting_for:
+                self.add_ready(task)
+        if len(self.window) > self.peak_window:
+            self.peak_window = len(self.window)
+
+    def task_finished(self, task: Task, processor_id: int, current_time):
+        """successors that didn't arrive yet are ready when they do, the task is
+        dropped
+        """
+        waiting_for = self.waiting_for
+        window = self.window
+        for successor in task.blocking:
+            waiting_for[successor] -= 1
+            if waiting_for[successor] == 0:
+                del waiting_for[successor]
+                if successor in window:
+                    self.add_ready(window[successor])
+
+        task_id = task.id
+        task.end_time = current_time
+        del window[task.name]
+        del self.tasks[task_id]
+        del self.processed_by[task_id]
+        del self.end_time[task_id]
+        del self.work[task_id]
+        if self.run_durations is not self.work:
+            del self.run_durations[task_id]
+        if self.eligible is not None:
+            del self.eligible[task_id]
+        if self.on_finish is not None:
+            self.on_finish(task, processor_id)
+
+    def unfinished(self) -> int:
+        return len(self.window)
+
+
+class StreamSim:
+    def __init__(self, processors: List[Processor]):
+        self.processors = processors
+        self.algorithm: Algorithm = None
+
+        self.total_time = 0
+        self.final_end_time = 0
+        self.done_count = 0
+        # the most tasks that had arrived and not finished at once
+        self.peak_window = 0
+        # (task id, processor, start, end) of the runs that were preempted, ids
+        # are the order of arrival. None without preemption
+        self.segments: List[Tuple[int, int, float, float]] = None
+
+    def start(
+        self,
+        algorithm: Algorithm,
+        arrivals: Iterable[Arrival],
+        on_finish: Callable[[Task, int], None] = None,
+        stats: RunStats = None,
+        preemption: Preemption = None,
+    ) -> Tuple[float, float]:
+        """simulates the tasks of an arrival source until all of them finished
+
+        Args:
+            algorithm (Algorithm): an online algorithm with a static key that only
+                reads the task (duration, blocking, priority), nothing here knows
+                the whole graph to color it
+            arrivals (Iterable[Arrival]): the arrival source, by release time
+            on_finish (Callable[[Task, int], None], optional): called with every task
+                and its processor's index when it finishes, before it's dropped
+            stats (RunStats, optional): see Sim.start. Defaults to None.
+            preemption (Preemption, optional): see Sim.start. Defaults to None.
+
+        Raises:
+            ValueError: for algorithms without a static key or with one that reads
+                the graph by task id, offline algorithms, arrivals out of release
+                time order or tasks that never got ready
+
+        Returns:
+            (float, float): total duration of all tasks, final end time of all tasks
+        """
+        if algorithm.offline:
+            raise ValueError("offline algorithms need the whole graph, use Sim")
+        if algorithm.static_key() is None:
+            raise ValueError(
+                f"{algorithm.__class__.__qualname__} has no static key, "
+                "it can't be simulated on a stream"
+            )
+        if algorithm.keys_by_graph_id:
+            # streamed ids are the order of arrival, not the graph's
+            raise ValueError(
+                f"{algorithm.__class__.__qualname__} keys tasks by their graph id, "
+                "it can't be simulated on a stream"
+            )
+        run_start = time.perf_counter()
+        self.algorithm = algorithm
+        if stats is not None:
+            stats.algorithm_name = algorithm.__class__.__qualname__
+        algorithm.stats = stats
+
+        engine = StreamEngine(
+            self.processors, algorithm, arrivals, on_finish, stats, preemption
+        )
+        try:
+            self.total_time, self.final_end_time = engine.run()
+        finally:
+            self.done_count = engine.done_count
+            self.peak_window = engine.peak_window
+            self.segments = engine.segments
+        if stats is not None:
+            stats.total_seconds = time.perf_counter() - run_start
+            stats.final_end_time = self.final_end_time
+        return self.total_time, self.final_end_time
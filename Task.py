@@ -1,4 +1,4 @@
-from typing import List, TYPE_CHECKING
+from typing import Dict, List, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from Processor import Processor
@@ -19,8 +19,11 @@ class Task:
         blocking: List["Task"],
         blocked_by: List["Task"],
         critical_time=0,
+        release_time=0,
     ):
         self.name = name
+        # index in the compiled TaskGraph, set by TaskGraph.compile
+        self.id = -1
         self.processor_type = processor_type
         self.duration = duration
         self.end_time = 0
@@ -29,10 +32,18 @@ class Task:
         # whether a task has stopped running
         self.done = False
         self.critical_time = critical_time
+        # the earliest time the task exists, for tasks that arrive while
+        # simulating (see StreamSim)
+        self.release_time = release_time
+        # every processor type the task can run on -> its duration there, None
+        # when it only runs on processor_type
+        self.durations_by_type: Dict[int, float] = None
 
         # In and Out degrees
         self.blocking = blocking
         self.blocked_by = blocked_by
+        # the transfer cost of every edge in blocking, None when they're free
+        self.blocking_costs: List[float] = None
 
         # Latest/Earliest start time (LS and ES)
         self.es = 0
@@ -0,0 +1,418 @@
+from typing import Dict, List, Tuple, TYPE_CHECKING
+import gc
+import json
+import numpy as np
+
+from Task import Task
+from Processor import Processor
+
+if TYPE_CHECKING:
+    from GraphAnalytics import GraphAnalytics
+
+
+class TaskGraph:
+    """a compiled, read-only view of a loaded profile
+
+    every task is identified by its index (task.id), edges are stored in CSR form:
+    the successors of task i are succ_ids[succ_offsets[i] : succ_offsets[i + 1]]
+    (in the order of task.blocking), and the same goes for pred_offsets/pred_ids.
+    nothing in here changes while simulating, per-run state lives in RunState
+
+    tasks that can run on more than one processor type have an eligibility table in
+    the same form: task i runs on eligible_types[eligible_offsets[i] :
+    eligible_offsets[i + 1]] for the matching eligible_durations. graphs where every
+    task only runs on its own type don't have one (eligible_offsets is None)
+
+    edges can have a transfer cost, succ_costs[j] is how long after task i ends
+    succ_ids[j] can start (pred_costs is the same by predecessor). None when every
+    successor can start the moment its predecessors end. costs are per edge, costs
+    by type pair (from_json's TransferCosts) are only read for graphs where every
+    task runs on its own type
+    """
+
+    def __init__(
+        self,
+        names: List[str],
+        durations,
+        types,
+        priorities,
+        succ_offsets,
+        succ_ids,
+        processors: List["Processor"],
+        eligible_offsets=None,
+        eligible_types=None,
+        eligible_durations=None,
+        succ_costs=None,
+    ):
+        self.names = names
+        self.durations = np.asarray(durations, dtype=np.float64)
+        self.types = np.asarray(types, dtype=np.int64)
+        self.priorities = np.asarray(priorities, dtype=np.int64)
+        self.succ_offsets = np.asarray(succ_offsets, dtype=np.int64)
+        self.succ_ids = np.asarray(succ_ids, dtype=np.int64)
+        self.processors = processors
+
+        # predecessors, a stable sort keeps them in the order read_data
+        # appends them to task.blocked_by
+        n = len(names)
+        out_degrees = np.diff(self.succ_offsets)
+        sources = np.repeat(np.arange(n, dtype=np.int64), out_degrees)
+        by_target = np.argsort(self.succ_ids, kind="stable")
+        self.pred_ids = sources[by_target]
+        self.in_degrees = np.bincount(self.succ_ids, minlength=n).astype(np.int64)
+        self.pred_offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(self.in_degrees, out=self.pred_offsets[1:])
+
+        # plain lists are much faster than numpy scalars inside the event loop
+        self.durations_list: List[float] = self.durations.tolist()
+        self.types_list: List[int] = self.types.tolist()
+        self.succ_offsets_list: List[int] = self.succ_offsets.tolist()
+        self.succ_ids_list: List[int] = self.succ_ids.tolist()
+        self.in_degrees_list: List[int] = self.in_degrees.tolist()
+
+        self.succ_costs = None
+        self.pred_costs = None
+        self.succ_costs_list: List[float] = None
+        if succ_costs is not None:
+            self.succ_costs = np.asarray(succ_costs, dtype=np.float64)
+            self.pred_costs = self.succ_costs[by_target]
+            self.succ_costs_list = self.succ_costs.tolist()
+
+        self.eligible_offsets = None
+        self.eligible_types = None
+        self.eligible_durations = None
+        if eligible_offsets is not None:
+            self.eligible_offsets = np.asarray(eligible_offsets, dtype=np.int64)
+            self.eligible_types = np.asarray(eligible_types, dtype=np.int64)
+            self.eligible_durations = np.asarray(eligible_durations, dtype=np.float64)
+
+        self.tasks: List["Task"] = []
+        self._analytics: "GraphAnalytics" = None
+
+    @property
+    def analytics(self) -> "GraphAnalytics":
+        """degrees, critical path, per-type work... of the graph, each computed once
+        and shared by every algorithm and threshold that runs on it
+        """
+        if self._analytics is None:
+            from GraphAnalytics import GraphAnalytics
+
+            self._analytics = GraphAnalytics(self)
+        return self._analytics
+
+    def clear_analytics(self):
+        """drops the analytics, the next read computes them again (e.g. to time
+        them)
+        """
+        self._analytics = None
+
+    @property
+    def heterogeneous(self) -> bool:
+        """whether tasks can run on more than one type or processors have speeds,
+        the simulator then matches every task to the processor it finishes first on
+        """
+        return self.eligible_offsets is not None or any(
+            processor.speed != 1 for processor in self.processors
+        )
+
+    def eligibility_lists(self) -> List[List[Tuple[int, float]]]:
+        """
+        Returns:
+            List[List[Tuple[int, float]]]: by task id, (processor type, duration) of
+            every type the task can run on
+        """
+        if self.eligible_offsets is None:
+            return [
+                [(processor_type, duration)]
+                for processor_type, duration in zip(
+                    self.types_list, self.durations_list
+                )
+            ]
+        offsets = self.eligible_offsets.tolist()
+        pairs = list(
+            zip(self.eligible_types.tolist(), self.eligible_durations.tolist())
+        )
+        return [pairs[offsets[i] : offsets[i + 1]] for i in range(len(self))]
+
+    def eligibility(self, task_id: int) -> Dict[int, float]:
+        """
+        Returns:
+            Dict[int, float]: every processor type the task can run on -> its
+            duration there
+        """
+        if self.eligible_offsets is None:
+            return {self.types_list[task_id]: self.durations_list[task_id]}
+        start = self.eligible_offsets[task_id]
+        end = self.eligible_offsets[task_id + 1]
+        return dict(
+            zip(
+                self.eligible_types[start:end].tolist(),
+                self.eligible_durations[start:end].tolist(),
+            )
+        )
+
+    @classmethod
+    def compile(cls, tasks: List["Task"], processors: List["Processor"]) -> "TaskGraph":
+        """compiles task objects (as built by Sim.read_data) into a graph,
+        sets task.id to the index of every task
+
+        Args:
+            tasks (List[Task]): all the tasks, with blocking/blocked_by filled in
+            processors (List[Processor]): all the processors
+
+        Returns:
+            TaskGraph: the compiled graph, graph.tasks[i].id == i
+        """
+        for i, task in enumerate(tasks):
+            task.id = i
+
+        succ_offsets = [0]
+        succ_ids = []
+        for task in tasks:
+            succ_ids.extend(blocking.id for blocking in task.blocking)
+            succ_offsets.append(len(succ_ids))
+
+        succ_costs = None
+        if any(task.blocking_costs for task in tasks):
+            succ_costs = []
+            for task in tasks:
+                costs = task.blocking_costs or [0.0] * len(task.blocking)
+                if len(costs) != len(task.blocking):
+                    # the costs are concatenated, they'd land on other edges
+                    raise ValueError(
+                        f"{task.name} has {len(costs)} blocking_costs for "
+                        f"{len(task.blocking)} blocking tasks"
+                    )
+                succ_costs.extend(costs)
+
+        eligible_offsets = eligible_types = eligible_durations = None
+        if any(task.durations_by_type for task in tasks):
+            eligible_offsets = [0]
+            eligible_types = []
+            eligible_durations = []
+            for task in tasks:
+                table = task.durations_by_type or {task.processor_type: task.duration}
+                if table.get(task.processor_type, task.duration) != task.duration:
+                    # the engine would run it for one, the bounds and the critical
+                    # path would count the other
+                    raise ValueError(
+                        f"{task.name} runs for {task.duration} on its type "
+                        f"{task.processor_type}, its durations table says "
+                        f"{table[task.processor_type]}"
+                    )
+                eligible_types.extend(table)
+                eligible_durations.extend(table.values())
+                eligible_offsets.append(len(eligible_types))
+
+        graph = cls(
+            [task.name for task in tasks],
+            [task.duration for task in tasks],
+            [task.processor_type for task in tasks],
+            [task.priority for task in tasks],
+            succ_offsets,
+            succ_ids,
+            processors,
+            eligible_offsets,
+            eligible_types,
+            eligible_durations,
+            succ_costs,
+        )
+        graph.tasks = tasks
+        return graph
+
+    @classmethod
+    def from_json(cls, file_path: str) -> "TaskGraph":
+        """reads a parsed profile (see Parser.to_json) into tasks and processors
+        and compiles them
+
+        Args:
+            file_path (str): full path to the json file
+
+        Returns:
+            TaskGraph: the compiled graph, with its task and processor objects
+        """
+        with open(file_path) as input_file:
+            data = json.load(input_file)
+
+        tasks_json = data["Tasks"]
+        processors_json: List[str] = data["Processors"]
+        # {"<from type>:<to type>": cost}, for edges without their own cost
+        transfer_costs: Dict[Tuple[int, int], float] = {}
+        for type_pair, cost in data.get("TransferCosts", {}).items():
+            from_type, to_type = type_pair.split(":")
+            transfer_costs[int(from_type), int(to_type)] = cost
+        has_costs = bool(transfer_costs) or any(
+            "blocking_costs" in task_info for task_info in tasks_json.values()
+        )
+
+        # to connect a task name to its object, improves efficiency
+        # when adding in and out degrees
+        temp: Dict[str, Task] = {}
+        tasks: List[Task] = []
+
+        # create all tasks
+        for task_name in tasks_json:
+            task_info = tasks_json[task_name]
+            task = Task(
+                task_name,
+                task_info["duration"],
+                task_info["processor_type"],
+                task_info["priority"],
+                [],
+                [],
+            )
+            if "durations" in task_info:
+                # the types it can run on, its own type is always one of them
+                # with "duration" (compile() rejects another one). a table of only
+                # its own type is no table, as build_tasks() reads it back
+                own_type = task_info["processor_type"]
+                table = {own_type: task_info["duration"]}
+                table.update(
+                    (int(processor_type), duration)
+                    for processor_type, duration in task_info["durations"].items()
+                )
+                if len(table) > 1 or table[own_type] != task_info["duration"]:
+                    task.durations_by_type = table
+            tasks.append(task)
+            temp[task_name] = task
+
+        if transfer_costs and any(task.durations_by_type for task in tasks):
+            # the costs are fixed here from the types of both ends, a task that can
+            # run on another type would still pay the pair of its own
+            raise ValueError(
+                "TransferCosts between types need every task to run on its own "
+                'type, give the edges of tasks with "durations" blocking_costs'
+            )
+
+        # add in and out degrees to the tasks
+        for task_name in tasks_json:
+            # add out-degrees
+            task_info = tasks_json[task_name]
+
+            blocking = [
+                temp[task_name_blocking] for task_name_blocking in task_info["blocking"]
+            ]
+            temp[task_name].blocking = blocking
+
+            # add in-degrees
+            for task in temp[task_name].blocking:
+                task.blocked_by.append(temp[task_name])
+
+            # transfer costs, the edge's own or its types'
+            if has_costs:
+                processor_type = task_info["processor_type"]
+                temp[task_name].blocking_costs = task_info.get("blocking_costs") or [
+                    transfer_costs.get((processor_type, task.processor_type), 0.0)
+                    for task in blocking
+                ]
+
+        # read processors
+        processors: List[Processor] = []
+        for processor_str in processors_json:
+            # "name:type", or "name:type:speed"
+            processor_info = processor_str.split(":")
+            processor_name = processor_info[0]
+            processor_type = int(processor_info[1])
+            speed = float(processor_info[2]) if len(processor_info) > 2 else 1.0
+            processors.append(Processor(processor_name, processor_type, speed))
+
+        return cls.compile(tasks, processors)
+
+    def build_tasks(self) -> List[Task]:
+        """creates the task objects of a graph that was loaded from arrays
+        (see GraphCache), sets graph.tasks
+
+        Returns:
+            List[Task]: the tasks, tasks[i].id == i
+        """
+        # none of these objects is garbage, but creating this many of them keeps
+        # triggering the cyclic garbage collector
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            durations = self.durations_list
+            types = self.types_list
+            priorities = self.priorities.tolist()
+            tasks = [
+                Task(name, durations[i], types[i], priorities[i], [], [])
+                for i, name in enumerate(self.names)
+            ]
+            succ_offsets = self.succ_offsets_list
+            succ_ids = self.succ_ids_list
+            if self.eligible_offsets is not None:
+                eligible_offsets = self.eligible_offsets.tolist()
+                for i, task in enumerate(tasks):
+                    if eligible_offsets[i + 1] - eligible_offsets[i] > 1:
+                        task.durations_by_type = self.eligibility(i)
+            for i, task in enumerate(tasks):
+                task.id = i
+                task.blocking = [
+                    tasks[j] for j in succ_ids[succ_offsets[i] : succ_offsets[i + 1]]
+                ]
+                for blocking in task.blocking:
+                    blocking.blocked_by.append(task)
+            if self.succ_costs is not None:
+                succ_costs = self.succ_costs_list
+                for i, task in enumerate(tasks):
+                    task.blocking_costs = succ_costs[
+                        succ_offsets[i] : succ_offsets[i + 1]
+                    ]
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+        self.tasks = tasks
+        return tasks
+
+    def __len__(self):
+        return len(self.names)
+
+    def successors(self, task_id: int) -> np.ndarray:
+        return self.succ_ids[
+            self.succ_offsets[task_id] : self.succ_offsets[task_id + 1]
+        ]
+
+    def predecessors(self, task_id: int) -> np.ndarray:
+        return self.pred_ids[
+            self.pred_offsets[task_id] : self.pred_offsets[task_id + 1]
+        ]
+
+    def restore_tasks(self):
+        """undoes what algorithms write on the task objects (coloring, critical
+        time, ES/LS), so the next run starts from the loaded profile
+        """
+        for task, priority in zip(self.tasks, self.priorities.tolist()):
+            task.priority = priority
+            task.critical_time = 0
+            task.es = 0
+            task.ls = 0
+
+    def new_state(self) -> "RunState":
+        return RunState(self)
+
+
+class RunState:
+    """everything a single simulation run changes, reset() makes it ready
+    for the next run in O(V) without touching the graph
+    """
+
+    def __init__(self, graph: TaskGraph):
+        self.graph = graph
+        self.reset()
+
+    def reset(self):
+        n = len(self.graph)
+        self.remaining_in_degree: List[int] = self.graph.in_degrees_list.copy()
+        self.end_time: List[float] = [0.0] * n
+        # index into graph.processors, -1 while the task wasn't assigned
+        self.processed_by: List[int] = [-1] * n
+        # how long every task ran, for heterogeneous graphs where it depends on
+        # the processor (see TaskGraph.heterogeneous), None when it's the duration
+        self.durations: List[float] = None
+        # (task id, processor, start, end) of the runs that were preempted, None
+        # without preemption
+        self.segments: List[Tuple[int, int, float, float]] = None
+        self.done_count = 0
+
+    def is_assigned(self, task_id: int) -> bool:
+        return self.processed_by[task_id] != -1
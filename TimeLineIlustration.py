@@ -1,11 +1,62 @@
 import numpy as np
-from typing import List, TYPE_CHECKING
-from matplotlib import pyplot as plt
+from typing import Dict, List, Tuple, TYPE_CHECKING
+from matplotlib import colormaps
+from matplotlib.figure import Figure
 from matplotlib.widgets import Slider
 
 if TYPE_CHECKING:
+    from matplotlib.axes import Axes
     from Processor import Processor
     from Task import Task
+    from ScheduleTrace import ScheduleTrace
+
+# bars drawn per processor row before neighbouring tasks are merged
+MAX_BARS_PER_ROW = 2000
+# when zoomed out, tasks closer than this many pixels are merged into one bar
+MERGE_PIXELS = 1
+
+
+class _Row:
+    """one processor's timeline as sorted arrays, tasks on a processor don't
+    overlap so both starts and ends are sorted and a time window is two binary
+    searches
+    """
+
+    def __init__(self, starts: np.ndarray, ends: np.ndarray, critical: np.ndarray):
+        self.starts = starts
+        self.ends = ends
+        self.critical = critical
+
+    @classmethod
+    def from_timeline(cls, timeline: List[Tuple[str, float, float]], critical: set):
+        return cls(
+            np.array([start for _, start, _ in timeline], dtype=np.float64),
+            np.array([end for _, _, end in timeline], dtype=np.float64),
+            np.array([name in critical for name, _, _ in timeline], dtype=bool),
+        )
+
+    def window(self, start_time: float, end_time: float) -> slice:
+        first = np.searchsorted(self.ends, start_time, side="left")
+        last = np.searchsorted(self.starts, end_time, side="right")
+        return slice(first, max(first, last))
+
+
+def _merge(starts: np.ndarray, ends: np.ndarray, min_gap: float):
+    """merges neighbouring bars whose gap is below min_gap
+
+    Returns:
+        (np.ndarray, np.ndarray): starts and ends of the merged bars
+    """
+    if starts.size <= 1:
+        return starts, ends
+    breaks = np.flatnonzero(starts[1:] - ends[:-1] > min_gap)
+    first = np.concatenate(([0], breaks + 1))
+    last = np.concatenate((breaks, [starts.size - 1]))
+    return starts[first], ends[last]
+
+
+def _colors(count: int) -> np.ndarray:
+    return colormaps["tab10"](np.linspace(0, 1, max(count, 1)))
 
 
 class TimeLineIlustartion:
@@ -18,6 +69,14 @@ class TimeLineIlustartion:
         self.end_time = 100  # Default end time, adjust as needed
 
         self.critical_path = None
+        # a run's whole schedule, see set_trace
+        self.trace: "ScheduleTrace" = None
+        self.task_names: List[str] = None
+
+    def set_trace(self, trace: "ScheduleTrace", task_names: List[str]):
+        """uses a run's columnar schedule instead of add_to_timeline() tuples"""
+        self.trace = trace
+        self.task_names = task_names
 
     def add_to_timeline(self, processor, task, start_time):
         self.timeLines[processor.name].append(
@@ -30,55 +89,121 @@ class TimeLineIlustartion:
     def set_critical_path(self, critical_path):
         self.critical_path = critical_path
 
+    def _rows(self) -> Dict[str, _Row]:
+        critical = set(self.critical_path or [])
+        if self.trace is None:
+            return {
+                processor: _Row.from_timeline(timeline, critical)
+                for processor, timeline in self.timeLines.items()
+            }
+
+        # the trace is ordered by start time, so every processor's rows are too
+        trace = self.trace
+        names = self.task_names
+        is_critical = np.array(
+            [names[task_id] in critical for task_id in trace.task_id.tolist()],
+            dtype=bool,
+        )
+        rows = {}
+        for processor_id, processor in enumerate(self.timeLines):
+            mask = trace.processor_id == processor_id
+            rows[processor] = _Row(
+                trace.start[mask], trace.end[mask], is_critical[mask]
+            )
+        return rows
+
+    @staticmethod
+    def _max_end_time(rows: Dict[str, _Row]) -> float:
+        return max((row.ends[-1] for row in rows.values() if row.ends.size), default=0)
+
+    def _draw(
+        self,
+        ax: "Axes",
+        rows: Dict[str, _Row],
+        start_time: float,
+        end_time: float,
+        width_pixels: float,
+    ):
+        """draws the window [start_time, end_time], a broken_barh collection per
+        processor row (and one for its critical tasks)
+        """
+        ax.clear()
+        colors = [tuple(color) for color in _colors(len(rows))]
+        min_gap = MERGE_PIXELS * (end_time - start_time) / max(width_pixels, 1)
+
+        for i, (processor, row) in enumerate(rows.items(), 1):
+            y = len(rows) - i
+            window = row.window(start_time, end_time)
+            starts = np.maximum(row.starts[window], start_time)
+            ends = np.minimum(row.ends[window], end_time)
+            critical = row.critical[window]
+
+            for is_critical in (False, True):
+                mask = critical == is_critical
+                bar_starts, bar_ends = starts[mask], ends[mask]
+                if bar_starts.size == 0:
+                    continue
+                merged = bar_starts.size > MAX_BARS_PER_ROW
+                if merged:
+                    # zoomed out, a bar per group of tasks closer than a pixel
+                    bar_starts, bar_ends = _merge(bar_starts, bar_ends, min_gap)
+
+                if is_critical:
+                    facecolors = "black"
+                elif merged:
+                    facecolors = colors[(i - 1) % len(colors)]
+                else:
+                    # neighbouring tasks in different colors
+                    indices = np.arange(window.start, window.stop)[mask]
+                    facecolors = [colors[j % len(colors)] for j in indices.tolist()]
+                ax.broken_barh(
+                    np.column_stack((bar_starts, bar_ends - bar_starts)),
+                    (y - 0.4, 0.8),
+                    facecolors=facecolors,
+                    edgecolors="red" if is_critical else "#000000",
+                    alpha=0.5,
+                    linewidth=0.5,
+                )
+
+        ax.set_xlim(start_time, end_time)
+        ax.set_ylim(-1, len(rows))
+        ax.set_yticks(range(len(rows) - 1, -1, -1), list(rows))
+
+    def save(self, file_path: str, start_time: float = None, end_time: float = None):
+        """renders the timelines to an image without a display (the format comes
+        from the extension, .png, .svg...)
+
+        Args:
+            file_path (str): the image to write
+            start_time (float, optional): Defaults to 0.
+            end_time (float, optional): Defaults to the last end time.
+        """
+        rows = self._rows()
+        start_time = 0 if start_time is None else start_time
+        end_time = self._max_end_time(rows) if end_time is None else end_time
+        figure = Figure(figsize=(10, max(2, len(self.timeLines) * 0.5)))
+        ax = figure.add_subplot()
+        self._draw(
+            ax,
+            rows,
+            start_time,
+            max(end_time, start_time + 1e-9),
+            ax.get_window_extent().width,
+        )
+        figure.tight_layout()
+        figure.savefig(file_path)
+
     def showTimelines(self):
+        from matplotlib import pyplot as plt
+
+        rows = self._rows()
         fig, ax = plt.subplots(figsize=(10, len(self.timeLines) * 2))
         plt.subplots_adjust(bottom=0.25)
 
-        # Generate a color map with enough colors for all tasks
-        colors = plt.cm.tab10(np.linspace(0, 1, len(self.timeLines)))
-
-        for i, (processor, timeline) in enumerate(self.timeLines.items(), 1):
-            # Calculate y-coordinate for the current timeline
-            y = len(self.timeLines) - i
-
-            for j, (task_name, start_time, end_time) in enumerate(timeline):
-                # Plot a rectangle for each task with a different color if within time range
-                if (
-                    self.start_time <= start_time <= self.end_time
-                    or self.start_time <= end_time <= self.end_time
-                ):
-
-                    color = colors[j % len(colors)]
-                    edge_color = "#000000"
-                    # color critical path with black
-                    if task_name in self.critical_path:
-                        color = "black"
-                        edge_color = "red"
-
-                    plt.fill_betweenx(
-                        [y - 0.4, y + 0.4],
-                        max(start_time, self.start_time),
-                        min(end_time, self.end_time),
-                        color=color,
-                        alpha=0.5,
-                        edgecolor=edge_color,
-                    )
-                    # Add text for the task name
-                    # plt.text((max(start_time, self.start_time) + min(end_time, self.end_time)) / 2, y, task_name, ha='center', va='center')
-
-            # Set y-ticks and y-tick labels
-            plt.yticks([y], [processor])
-
         ax_start = plt.axes([0.1, 0.1, 0.65, 0.03])
         ax_end = plt.axes([0.1, 0.05, 0.65, 0.03])
 
-        val_max = max(
-            [
-                end_time
-                for _, timeline in self.timeLines.items()
-                for _, _, end_time in timeline
-            ]
-        )
+        val_max = self._max_end_time(rows)
 
         slider_start = Slider(
             ax_start,
@@ -98,34 +223,18 @@ class TimeLineIlustartion:
         def update(val):
             self.start_time = slider_start.val
             self.end_time = slider_end.val
-            ax.clear()
-            for i, (processor, timeline) in enumerate(self.timeLines.items(), 1):
-                y = len(self.timeLines) - i
-                for j, (task_name, start_time, end_time) in enumerate(timeline):
-                    if (
-                        self.start_time <= start_time <= self.end_time
-                        or self.start_time <= end_time <= self.end_time
-                    ):
-                        color = colors[j % len(colors)]
-                        edge_color = "#000000"
-                        # color critical path with black
-                        if task_name in self.critical_path:
-                            color = "black"
-                            edge_color = "red"
-
-                        ax.fill_betweenx(
-                            [y - 0.4, y + 0.4],
-                            max(start_time, self.start_time),
-                            min(end_time, self.end_time),
-                            color=color,
-                            alpha=0.5,
-                            edgecolor=edge_color,
-                        )
-                        # ax.text((max(start_time, self.start_time) + min(end_time, self.end_time)) / 2, y, task_name, ha='center', va='center')
-                plt.yticks([y], [processor])
+            if self.end_time <= self.start_time:
+                return
+            # only the tasks inside the window are drawn
+            self._draw(
+                ax,
+                rows,
+                self.start_time,
+                self.end_time,
+                ax.get_window_extent().width,
+            )
             fig.canvas.draw_idle()
 
-        slider_end.set_val(val_max)
         update(val_max)
 
         slider_start.on_changed(update)
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from Algorithms import ALGORITHMS
+from Benchmark import generate_profile
+from FrameSim import FrameSim
+from Sim import Sim, run_threshold
+from test_lower_bounds import write_heterogeneous_profile
+
+
+def write_profile(path: str, heterogeneous: bool):
+    if heterogeneous:
+        write_heterogeneous_profile(path, 0)
+    else:
+        generate_profile(path, 200, 10, processor_types=3, seed=0)
+
+
+@pytest.mark.parametrize("heterogeneous", [False, True])
+@pytest.mark.parametrize("name", ["OutDegreesFirst", "FromCriticalPath", "UpwardRank"])
+def test_frames_far_apart_run_like_one_frame(tmp_path, heterogeneous, name):
+    path = str(tmp_path / "frame.json")
+    write_profile(path, heterogeneous)
+    algorithm, offline = ALGORITHMS[name]
+    sim = Sim()
+    sim.read_data(path)
+    _, final_end_time = run_threshold(sim, algorithm, -1, offline, False)
+
+    # every frame ends before the next one is released
+    period = 10 * final_end_time
+    frame_sim = FrameSim([path], period, repeat=3)
+    report = frame_sim.run(algorithm, offline=offline)
+    assert report.latencies.tolist() == pytest.approx([final_end_time] * 3)
+    assert report.makespan == pytest.approx(2 * period + final_end_time)
+    assert report.backlog.tolist() == [1, 1, 1]
+
+
+def test_no_task_starts_before_its_frame(tmp_path):
+    path = str(tmp_path / "frame.json")
+    write_profile(path, False)
+    sim = Sim()
+    sim.read_data(path)
+    _, final_end_time = run_threshold(
+        sim, ALGORITHMS["UpwardRank"][0], -1, False, False
+    )
+
+    # frames overlap, a frame's sources are ready before it's released
+    frame_sim = FrameSim([path], final_end_time / 4, repeat=6)
+    frame_sim.run(ALGORITHMS["UpwardRank"][0])
+    trace = frame_sim.sim.schedule_trace()
+    frame_of = np.repeat(np.arange(6), np.diff(frame_sim.frame_offsets))
+    releases = frame_sim.release_time(frame_of[trace.task_id])
+    assert (trace.start >= releases).all()
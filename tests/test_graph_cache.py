@@ -0,0 +1,42 @@
+import json
+import os
+
+from Benchmark import generate_profile
+from GraphCache import cache_path, load_cached_graph
+
+
+def rewrite(path: str, edit):
+    """edits the profile, the json keeps its size so only its content tells"""
+    stat = os.stat(path)
+    with open(path) as profile_file:
+        profile = json.load(profile_file)
+    edit(profile)
+    with open(path, "w") as profile_file:
+        json.dump(profile, profile_file)
+    assert os.stat(path).st_size == stat.st_size
+    # a later mtime even on file systems with coarse timestamps
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+def test_a_changed_profile_rebuilds_its_cache(tmp_path):
+    path = str(tmp_path / "profile.json")
+    generate_profile(path, 100, 6, processor_types=4, seed=0)
+    graph = load_cached_graph(path)
+    assert os.path.exists(cache_path(path))
+    task_id = graph.names.index("t0")
+    processor_type = graph.types_list[task_id]
+
+    # touched, same content: the cache is still used
+    cache_mtime = os.stat(cache_path(path)).st_mtime_ns
+    rewrite(path, lambda profile: None)
+    load_cached_graph(path)
+    assert os.stat(cache_path(path)).st_mtime_ns == cache_mtime
+
+    def edit(profile):
+        profile["Tasks"]["t0"]["processor_type"] = (processor_type + 1) % 4
+
+    rewrite(path, edit)
+    graph = load_cached_graph(path)
+    assert graph.types_list[task_id] == (processor_type + 1) % 4
+    # and the rebuilt cache is read back
+    assert load_cached_graph(path).types_list == graph.types_list
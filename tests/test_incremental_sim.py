@@ -0,0 +1,145 @@
+import json
+import random
+
+import pytest
+
+from Algorithms.PriorityOrder import PriorityOrder
+from Benchmark import generate_profile
+from IncrementalSim import IncrementalSim
+from Sim import Sim
+from TaskGraph import TaskGraph
+from test_lower_bounds import write_heterogeneous_profile
+
+
+def full_run(sim: Sim, priorities, durations, release_times=None):
+    """Sim.start on a copy of the loaded graph with these durations"""
+    graph = sim.graph
+    changed = TaskGraph(
+        graph.names,
+        durations,
+        graph.types,
+        graph.priorities,
+        graph.succ_offsets,
+        graph.succ_ids,
+        graph.processors,
+        succ_costs=graph.succ_costs,
+    )
+    changed.build_tasks()
+    full = Sim()
+    full.use_graph(changed)
+    algorithm = PriorityOrder(
+        full.tasks, full.processors, full.tasks, offline=False, graph=changed
+    )
+    algorithm.priorities = priorities
+    full.start(algorithm, keep_work_order=False, release_times=release_times)
+    return full
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_rerun_matches_a_full_run(tmp_path, seed):
+    path = str(tmp_path / f"profile{seed}.json")
+    generate_profile(path, 400, 12, processor_types=3, seed=seed)
+    sim = Sim()
+    sim.read_data(path)
+    rng = random.Random(seed)
+    n = len(sim.graph)
+    priorities = list(range(n))
+    rng.shuffle(priorities)
+    durations = list(sim.graph.durations_list)
+
+    algorithm = PriorityOrder(
+        sim.tasks, sim.processors, sim.tasks, offline=False, graph=sim.graph
+    )
+    algorithm.priorities = priorities
+    incremental = IncrementalSim(sim, checkpoint_interval=8)
+    incremental.run(algorithm, durations)
+
+    reused = 0
+    for _ in range(100):
+        changed = set(rng.sample(range(n), rng.randint(1, 4)))
+        if rng.random() < 0.5:
+            # swap ranks, as the optimizer does
+            a, b = rng.sample(sorted(changed), 2) if len(changed) > 1 else (0, 1)
+            changed.update((a, b))
+            priorities[a], priorities[b] = priorities[b], priorities[a]
+        else:
+            durations = list(durations)
+            for task_id in changed:
+                durations[task_id] = round(durations[task_id] * rng.uniform(0.5, 2), 3)
+
+        total_time, final_end_time = incremental.rerun(algorithm, changed, durations)
+        reused += incremental.reused_events
+        full = full_run(sim, priorities, durations)
+        assert final_end_time == full.final_end_time
+        assert total_time == pytest.approx(full.total_time)
+        assert incremental.processed_by == full.state.processed_by
+        assert incremental.end_time == full.state.end_time
+    # most reruns started from a checkpoint, not from time 0
+    assert reused > 0
+
+
+def write_profile(path: str, variant: str, rng: random.Random):
+    if variant == "heterogeneous":
+        write_heterogeneous_profile(path, 0)
+        return
+    generate_profile(path, 300, 10, processor_types=3, seed=0)
+    if variant == "transfer costs":
+        with open(path) as profile_file:
+            profile = json.load(profile_file)
+        profile["TransferCosts"] = {
+            f"{a}:{b}": rng.randint(0, 20) for a in range(3) for b in range(3)
+        }
+        with open(path, "w") as profile_file:
+            json.dump(profile, profile_file)
+
+
+@pytest.mark.parametrize(
+    "variant", ["transfer costs", "release times", "heterogeneous"]
+)
+def test_rerun_matches_a_full_run_on_the_engine(tmp_path, variant):
+    path = str(tmp_path / "profile.json")
+    rng = random.Random(0)
+    write_profile(path, variant, rng)
+    sim = Sim()
+    sim.read_data(path)
+    n = len(sim.graph)
+    priorities = list(range(n))
+    rng.shuffle(priorities)
+    durations = None
+    release_times = None
+    if variant == "release times":
+        release_times = [rng.choice([0, 0, 50000, 200000]) for _ in range(n)]
+
+    algorithm = PriorityOrder(
+        sim.tasks, sim.processors, sim.tasks, offline=False, graph=sim.graph
+    )
+    algorithm.priorities = priorities
+    incremental = IncrementalSim(
+        sim, checkpoint_interval=8, release_times=release_times
+    )
+    incremental.run(algorithm)
+
+    reused = 0
+    for _ in range(50):
+        changed = set(rng.sample(range(n), 2))
+        a, b = changed
+        priorities[a], priorities[b] = priorities[b], priorities[a]
+        if variant != "heterogeneous" and rng.random() < 0.5:
+            durations = list(durations or sim.graph.durations_list)
+            durations[a] = round(durations[a] * rng.uniform(0.5, 2), 3)
+
+        total_time, final_end_time = incremental.rerun(algorithm, changed, durations)
+        reused += incremental.reused_events
+        if variant == "heterogeneous":
+            full = Sim()
+            full.use_graph(sim.graph)
+            full.start(algorithm, keep_work_order=False)
+        else:
+            full = full_run(
+                sim, priorities, durations or sim.graph.durations_list, release_times
+            )
+        assert final_end_time == full.final_end_time
+        assert total_time == pytest.approx(full.total_time)
+        assert incremental.processed_by == full.state.processed_by
+        assert incremental.end_time == full.state.end_time
+    assert reused > 0
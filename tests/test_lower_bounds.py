@@ -0,0 +1,127 @@
+import json
+import random
+
+import numpy as np
+import pytest
+
+from Algorithms import ALGORITHMS
+from Benchmark import generate_profile
+from Sim import Sim, run_threshold
+from TaskGraph import TaskGraph
+
+
+def write_heterogeneous_profile(path: str, seed: int):
+    """a generated profile where some tasks can run on other types too (some
+    tables repeat their own type) and the processors have speeds
+    """
+    generate_profile(path, 120, 8, processor_types=3, seed=seed)
+    rng = np.random.default_rng(seed)
+    with open(path) as profile_file:
+        profile = json.load(profile_file)
+    for task_info in profile["Tasks"].values():
+        if rng.random() < 0.5:
+            own_type = task_info["processor_type"]
+            durations = {
+                str(processor_type): round(task_info["duration"] * rng.uniform(0.3, 3))
+                for processor_type in range(3)
+                if processor_type != own_type and rng.random() < 0.6
+            }
+            if rng.random() < 0.5:
+                durations[str(own_type)] = task_info["duration"]
+            task_info["durations"] = durations
+    profile["Processors"] = [
+        f"{processor}:{rng.choice([0.5, 1, 2])}" for processor in profile["Processors"]
+    ]
+    with open(path, "w") as profile_file:
+        json.dump(profile, profile_file)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_makespan_is_at_least_the_bound(tmp_path, seed):
+    path = str(tmp_path / f"heterogeneous{seed}.json")
+    write_heterogeneous_profile(path, seed)
+    sim = Sim()
+    sim.read_data(path)
+    assert sim.graph.heterogeneous
+    bound = sim.lower_bounds().combined
+
+    random.seed(seed)
+    for name, (algorithm, offline) in ALGORITHMS.items():
+        for is_mobileye in (False, True):
+            _, final_end_time = run_threshold(
+                sim, algorithm, -1, offline, is_mobileye, keep_work_order=False
+            )
+            assert final_end_time >= bound * (1 - 1e-9), (name, is_mobileye)
+
+
+def test_cache_keeps_the_eligibility(tmp_path):
+    path = str(tmp_path / "heterogeneous.json")
+    write_heterogeneous_profile(path, 0)
+    from_json = TaskGraph.from_json(path)
+    # the first load writes the cache, the second reads it
+    sim = Sim()
+    sim.read_data(path)
+    cached = Sim()
+    cached.read_data(path)
+    for graph in (sim.graph, cached.graph):
+        assert graph.eligibility_lists() == from_json.eligibility_lists()
+        assert [task.durations_by_type for task in graph.tasks] == [
+            task.durations_by_type for task in from_json.tasks
+        ]
+
+
+def test_own_type_with_another_duration_is_rejected(tmp_path):
+    path = str(tmp_path / "conflict.json")
+    generate_profile(path, 10, 2, seed=0)
+    with open(path) as profile_file:
+        profile = json.load(profile_file)
+    task_info = profile["Tasks"]["t0"]
+    task_info["durations"] = {
+        str(task_info["processor_type"]): task_info["duration"] + 1
+    }
+    with open(path, "w") as profile_file:
+        json.dump(profile, profile_file)
+    with pytest.raises(ValueError):
+        TaskGraph.from_json(path)
+
+
+@pytest.mark.parametrize("extra", [1, -1])
+def test_blocking_costs_of_the_wrong_length_are_rejected(tmp_path, extra):
+    path = str(tmp_path / "costs.json")
+    generate_profile(path, 40, 4, seed=0)
+    with open(path) as profile_file:
+        profile = json.load(profile_file)
+    name, task_info = next(
+        (name, task_info)
+        for name, task_info in profile["Tasks"].items()
+        if len(task_info["blocking"]) > 1
+    )
+    task_info["blocking_costs"] = [1.0] * (len(task_info["blocking"]) + extra)
+    with open(path, "w") as profile_file:
+        json.dump(profile, profile_file)
+    with pytest.raises(ValueError, match=name):
+        TaskGraph.from_json(path)
+
+
+@pytest.mark.parametrize("top_type", ["zero durations", "durations tables"])
+def test_upward_rank_handles_a_top_type_without_own_work(tmp_path, top_type):
+    path = str(tmp_path / "top_type.json")
+    generate_profile(path, 120, 8, processor_types=3, seed=0)
+    with open(path) as profile_file:
+        profile = json.load(profile_file)
+    for task_info in profile["Tasks"].values():
+        if task_info["processor_type"] == 2:
+            if top_type == "zero durations":
+                task_info["duration"] = 0
+            else:
+                task_info["durations"] = {"1": task_info["duration"]}
+    with open(path, "w") as profile_file:
+        json.dump(profile, profile_file)
+    sim = Sim()
+    sim.read_data(path)
+    assert 2 not in sim.graph.analytics.type_work
+
+    _, final_end_time = run_threshold(
+        sim, ALGORITHMS["UpwardRank"][0], -1, False, False, keep_work_order=False
+    )
+    assert final_end_time >= sim.lower_bounds().combined * (1 - 1e-9)
@@ -0,0 +1,49 @@
+from Algorithms import ALGORITHMS
+from Benchmark import generate_profile
+from ResultsStore import ResultsStore
+from Sim import run_threshold_sweep
+
+
+def test_a_sweep_round_trips_through_sqlite(tmp_path):
+    path = str(tmp_path / "profile.json")
+    generate_profile(path, 200, 8, seed=0)
+    db_path = str(tmp_path / "results.sqlite")
+
+    expected = []
+    with ResultsStore(db_path, batch_size=2) as store:
+        for name, is_mobileye in [
+            ("OutDegreesFirst", True),
+            ("FromCriticalPath", False),
+        ]:
+            algorithm, offline = ALGORITHMS[name]
+            for result in run_threshold_sweep(
+                algorithm, path, offline=offline, is_mobileye=is_mobileye
+            ):
+                store.add(
+                    result.file_path,
+                    result.algorithm,
+                    result.threshold,
+                    is_mobileye,
+                    result.final_end_time,
+                    result.lower_bound,
+                )
+                expected.append(
+                    (
+                        "profile.json",
+                        result.algorithm,
+                        result.threshold,
+                        is_mobileye,
+                        result.final_end_time,
+                        result.lower_bound,
+                    )
+                )
+        sweep = store.sweep
+    assert len(expected) > 2
+    assert any(row[2] == "Offline" for row in expected)
+
+    # another connection reads the same rows, thresholds keep their types
+    with ResultsStore(db_path, sweep=sweep) as reopened:
+        assert reopened.rows() == expected
+    with ResultsStore(db_path) as other_sweep:
+        assert other_sweep.rows() == []
+        assert other_sweep.rows(all_sweeps=True) == expected
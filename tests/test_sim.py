@@ -0,0 +1,116 @@
+import json
+
+import numpy as np
+import pytest
+
+from Algorithms import ALGORITHMS
+from Benchmark import generate_profile
+from Sim import Preemption, Sim
+
+
+def load(path: str, tasks: dict, processors: list, **extra) -> Sim:
+    with open(path, "w") as profile_file:
+        json.dump({"Tasks": tasks, "Processors": processors, **extra}, profile_file)
+    sim = Sim()
+    sim.read_data(path, use_cache=False)
+    return sim
+
+
+def run(sim: Sim, name: str = "Greedy", **options):
+    algorithm, offline = ALGORITHMS[name]
+    sim.graph.restore_tasks()
+    return sim.start(
+        algorithm(
+            sim.tasks,
+            sim.processors,
+            sim.tasks,
+            offline=offline,
+            is_mobileye=True,
+            is_critical=True,
+            graph=sim.graph,
+        ),
+        keep_work_order=False,
+        **options,
+    )
+
+
+@pytest.mark.parametrize("mode", Preemption.MODES)
+def test_preempted_runs_dont_overlap_and_keep_the_work(tmp_path, mode):
+    path = str(tmp_path / "preemption.json")
+    generate_profile(path, 300, 12, processor_types=2, seed=0)
+    sim = Sim()
+    sim.read_data(path)
+    run(sim, "OutDegreesFirst", preemption=Preemption(mode, context_switch=1.0))
+    segments = sim.state.segments
+    assert segments
+
+    # start is end - duration, off by rounding from the previous end
+    trace = sim.schedule_trace()
+    for processor_id in np.unique(trace.processor_id):
+        on_processor = trace.processor_id == processor_id
+        gaps = trace.start[on_processor][1:] - trace.end[on_processor][:-1]
+        assert (gaps >= -1e-6).all()
+    types = sim.graph.types
+    processor_types = np.array([processor.type for processor in sim.processors])
+    assert (processor_types[trace.processor_id] == types[trace.task_id]).all()
+
+    durations = sim.graph.durations
+    preempted = sum(end - start for _, _, start, end in segments)
+    if mode == "suspend":
+        # the runs of a task add up to its duration
+        work = np.bincount(
+            trace.task_id, weights=trace.end - trace.start, minlength=len(durations)
+        )
+        assert work == pytest.approx(durations)
+        assert sim.total_time == pytest.approx(durations.sum())
+    else:
+        # the last run is all of it, the preempted runs are lost
+        assert sim.state.durations == pytest.approx(durations)
+        assert sim.total_time == pytest.approx(durations.sum() + preempted)
+
+
+def test_tasks_run_where_they_finish_first(tmp_path):
+    sim = load(
+        str(tmp_path / "heterogeneous.json"),
+        {
+            # 10 on type 0, 8 / speed 2 on type 1
+            "a": {
+                "duration": 10,
+                "processor_type": 0,
+                "priority": 1,
+                "blocking": ["c"],
+                "durations": {"1": 8},
+            },
+            "b": {"duration": 6, "processor_type": 0, "priority": 1, "blocking": []},
+            # only type 0, it waits for the processor b runs on
+            "c": {"duration": 3, "processor_type": 0, "priority": 1, "blocking": []},
+        },
+        ["p0:0", "p1:1:2"],
+    )
+    assert sim.graph.heterogeneous
+    run(sim)
+    names = sim.graph.names
+    processed_by = dict(zip(names, sim.state.processed_by))
+    end_time = dict(zip(names, sim.state.end_time))
+    assert processed_by == {"a": 1, "b": 0, "c": 0}
+    assert end_time == {"a": 4.0, "b": 6.0, "c": 9.0}
+    assert sim.final_end_time == 9.0
+
+
+@pytest.mark.parametrize("source", ["blocking_costs", "TransferCosts"])
+def test_a_transfer_cost_delays_the_successor(tmp_path, source):
+    tasks = {
+        "a": {"duration": 5, "processor_type": 0, "priority": 1, "blocking": ["b"]},
+        "b": {"duration": 2, "processor_type": 1, "priority": 1, "blocking": []},
+    }
+    extra = {}
+    if source == "blocking_costs":
+        tasks["a"]["blocking_costs"] = [3]
+    else:
+        extra["TransferCosts"] = {"0:1": 3, "1:0": 100}
+    sim = load(str(tmp_path / "costs.json"), tasks, ["p0:0", "p1:1"], **extra)
+    run(sim)
+    end_time = dict(zip(sim.graph.names, sim.state.end_time))
+    # b's input arrives 3 after a ends, its processor idles until then
+    assert end_time == {"a": 5.0, "b": 10.0}
+    assert sim.lower_bounds().critical_path == 10.0
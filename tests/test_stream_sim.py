@@ -0,0 +1,81 @@
+import json
+
+import pytest
+
+from Algorithms import ALGORITHMS
+from Benchmark import generate_profile
+from Sim import Preemption, Sim
+from StreamSim import StreamSim, arrivals_from_graph, arrivals_by_level
+
+
+def load_profile(path: str, speeds: bool) -> Sim:
+    generate_profile(path, 300, 12, processor_types=3, seed=1)
+    if speeds:
+        with open(path) as profile_file:
+            profile = json.load(profile_file)
+        profile["Processors"] = [
+            f"{processor}:{[0.5, 1, 2][i % 3]}"
+            for i, processor in enumerate(profile["Processors"])
+        ]
+        with open(path, "w") as profile_file:
+            json.dump(profile, profile_file)
+    sim = Sim()
+    sim.read_data(path)
+    return sim
+
+
+@pytest.mark.parametrize(
+    "speeds, preemption",
+    [
+        (False, None),
+        (True, None),
+        (False, Preemption()),
+        (False, Preemption("restart", context_switch=2.0)),
+    ],
+)
+@pytest.mark.parametrize("name", ["Greedy", "OutDegreesFirst", "MaxRuntimeFirst"])
+def test_a_graph_streamed_at_once_runs_like_sim(tmp_path, speeds, preemption, name):
+    sim = load_profile(str(tmp_path / "stream.json"), speeds)
+    algorithm, _ = ALGORITHMS[name]
+    expected = sim.start(
+        algorithm(sim.tasks, sim.processors, sim.tasks, graph=sim.graph),
+        preemption=preemption,
+    )
+
+    finished = {}
+    stream_sim = StreamSim(sim.processors)
+    result = stream_sim.start(
+        algorithm([], sim.processors, [], graph=sim.graph),
+        arrivals_from_graph(sim.graph),
+        on_finish=lambda task, processor_id: finished.update(
+            {task.id: (task.end_time, processor_id)}
+        ),
+        preemption=preemption,
+    )
+    assert result == expected
+    assert finished == {
+        task_id: (sim.state.end_time[task_id], sim.state.processed_by[task_id])
+        for task_id in range(len(sim.tasks))
+    }
+    assert stream_sim.segments == sim.state.segments
+
+
+def test_the_window_only_holds_arrived_tasks(tmp_path):
+    sim = load_profile(str(tmp_path / "stream.json"), False)
+    stream_sim = StreamSim(sim.processors)
+    stream_sim.start(
+        ALGORITHMS["OutDegreesFirst"][0]([], sim.processors, [], graph=sim.graph),
+        arrivals_by_level(sim.graph, 10000.0),
+    )
+    assert stream_sim.done_count == len(sim.tasks)
+    assert stream_sim.peak_window < len(sim.tasks)
+
+
+def test_keys_by_graph_id_are_rejected(tmp_path):
+    sim = load_profile(str(tmp_path / "stream.json"), False)
+    stream_sim = StreamSim(sim.processors)
+    with pytest.raises(ValueError, match="graph id"):
+        stream_sim.start(
+            ALGORITHMS["UpwardRank"][0]([], sim.processors, [], graph=sim.graph),
+            arrivals_by_level(sim.graph, 0.0),
+        )